@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the storage options of NetCdf.write_variable: writes the same
+time series with several compression policies and reports, for each of them,
+the file size and the write and read throughput.
+
+Usage: python netcdf_storage_benchmark.py [number of records] [number of variables]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import logging
+import numpy
+import netCDF4
+import egads
+from egads.input import NetCdf
+
+logging.disable(logging.CRITICAL)
+
+POLICIES = [('uncompressed (default)', {}),
+            ('zlib level 1, shuffle', {'zlib': True}),
+            ('zlib level 4, shuffle', {'zlib': True, 'complevel': 4}),
+            ('zlib level 1, lsd=2', {'zlib': True, 'least_significant_digit': 2})]
+
+
+def make_data(records, variables):
+    time_line = numpy.arange(records) / 10.0
+    return [numpy.round(numpy.sin(time_line / (50.0 + i)) * 100 + numpy.random.normal(0, 0.5, records), 2)
+            for i in range(variables)]
+
+
+def write(filename, data, options):
+    start = time.time()
+    f = NetCdf(filename, 'w')
+    f.add_dim('time', len(data[0]))
+    for i, values in enumerate(data):
+        f.write_variable(values, 'var%d' % i, ('time',), 'double', **options)
+    f.close()
+    return time.time() - start
+
+
+def read(filename, variables):
+    start = time.time()
+    f = netCDF4.Dataset(filename)
+    for i in range(variables):
+        f.variables['var%d' % i][:]
+    f.close()
+    return time.time() - start
+
+
+def main(records=360000, variables=20):
+    data = make_data(records, variables)
+    size = records * variables * 8 / 1e6
+    filename = tempfile.mktemp('.nc')
+    print 'EGADS %s - %d variables of %d float64 records (%.1f MB raw)' % (egads.__version__, variables,
+                                                                          records, size)
+    print '%-24s %10s %16s %16s' % ('policy', 'size (MB)', 'write (MB/s)', 'read (MB/s)')
+    for label, options in POLICIES:
+        write_time = write(filename, data, options)
+        file_size = os.path.getsize(filename) / 1e6
+        read_time = read(filename, variables)
+        print '%-24s %10.1f %16.0f %16.0f' % (label, file_size, size / write_time, size / read_time)
+        os.remove(filename)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -1,6 +1,6 @@
 __author__ = "mfreer"
 __date__ = "2013-02-17 18:01"
-__version__ = "1.3"
+__version__ = "1.4"
 __all__ = ['LimitAngleRange']
 
 import egads.core.egads_core as egads_core
@@ -12,7 +12,7 @@ class LimitAngleRange(egads_core.EgadsAlgorithm):
 
     FILE        limit_angle_range.py
 
-    VERSION     1.3
+    VERSION     1.4
 
     CATEGORY    Mathematics
 
@@ -62,16 +62,20 @@ class LimitAngleRange(egads_core.EgadsAlgorithm):
         return egads_core.EgadsAlgorithm.run(self, angle)
 
     def _algorithm(self, angle):
-        angle_div = angle / 360.0
-        angle_fraction = abs(angle_div - numpy.int0(angle_div))
-        if angle.size == 1:
-            if angle >= 0:
-                angle_limited = 360 * angle_fraction
-            else:
-                angle_limited = 360 - 360 * angle_fraction
-        else:
-            angle_limited = numpy.zeros(angle.size)
-            angle_limited[angle >= 0] = 360 * angle_fraction[angle >= 0]
-            angle_limited[angle < 0] = 360 - 360 * angle_fraction[angle < 0]
-        return angle_limited
+        return limit_angle_range(angle)
 
+
+def limit_angle_range(angle, out=None):
+    """
+    Array-level kernel of LimitAngleRange, to be used by other algorithms without
+    going through the algorithm dispatch. Returns the angle, in degrees, limited
+    between 0 and 360 degrees.
+
+    :param angle:
+        Scalar or array of angles in degrees.
+    :param out:
+        Optional - array in which the result is written, can be the input array
+        itself for an in-place operation.
+    """
+
+    return numpy.mod(angle, 360.0, out=out)
@@ -3,10 +3,10 @@ __date__ = "2013-02-17 18:01"
 __version__ = "1.3"
 __all__ = ['CameraViewingAngles']
 
-import egads
 import egads.core.egads_core as egads_core
 import egads.core.metadata as egads_metadata
 import numpy
+from egads.algorithms.mathematics.limit_angle_range import limit_angle_range
 
 class CameraViewingAngles(egads_core.EgadsAlgorithm):
     
@@ -76,15 +76,10 @@ class CameraViewingAngles(egads_core.EgadsAlgorithm):
         return egads_core.EgadsAlgorithm.run(self, n_x, n_y, l_x, l_y, f)
 
     def _algorithm(self, n_x, n_y, l_x, l_y, f):
-        AngleLimit = egads.algorithms.mathematics.LimitAngleRange  # @UndefinedVariable
-        theta_c = numpy.zeros([n_x, n_y])
-        phi_c = numpy.zeros([n_x, n_y])
-        for i in range(n_x):
-            x = (i - n_x / 2.) / n_x * l_x
-            for j in range(n_y):
-                y = (j - n_y / 2.) / n_y * l_y
-                d = numpy.sqrt(x ** 2 + y ** 2)
-                theta_c[i, j] = AngleLimit().run(2 * numpy.arctan(d / (2. * f)) * 180.0 / numpy.pi)
-                phi_c[i, j] = AngleLimit().run(360 - numpy.arctan2(y, x) * 180.0 / numpy.pi)
+        x = (numpy.arange(n_x) - n_x / 2.) / n_x * l_x
+        y = (numpy.arange(n_y) - n_y / 2.) / n_y * l_y
+        x, y = numpy.meshgrid(x, y, indexing='ij')
+        d = numpy.sqrt(x ** 2 + y ** 2)
+        theta_c = limit_angle_range(2 * numpy.arctan(d / (2. * f)) * 180.0 / numpy.pi)
+        phi_c = limit_angle_range(360 - numpy.arctan2(y, x) * 180.0 / numpy.pi)
         return theta_c, phi_c
-
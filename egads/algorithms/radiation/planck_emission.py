@@ -61,10 +61,40 @@ class PlanckEmission(egads_core.EgadsAlgorithm):
         return egads_core.EgadsAlgorithm.run(self, T, Lambda)
 
     def _algorithm(self, T, Lambda):
-        h = 6.62606957e-34  # J s
-        kb = 1.3806e-23
-        c = 2.997925e8
-        l = Lambda * 1e-9
-        rad = 2 * h * c ** 2 / (l ** 5 * (numpy.exp(h * c / (kb * l * T)) - 1.0)) * 1e-9
-        return rad
+        return planck_emission(T, Lambda)
 
+
+def planck_constants(Lambda):
+    """
+    Return the two radiation constants c1 (W m-2 sr-1 nm-1) and c2 (K) of the Planck
+    law at wavelength Lambda (nm), such that rad = c1 / (exp(c2 / T) - 1) and
+    T = c2 / log(c1 / rad + 1). Computing them once per wavelength leaves a single
+    division and exponential (or logarithm) to evaluate per measurement.
+    """
+
+    h = 6.62606957e-34  # J s
+    kb = 1.3806e-23
+    c = 2.997925e8
+    l = Lambda * 1e-9
+    c1 = 2 * h * c ** 2 / l ** 5 * 1e-9
+    c2 = h * c / (kb * l)
+    return c1, c2
+
+
+def planck_emission(T, Lambda, out=None):
+    """
+    Array-level kernel of PlanckEmission, evaluated in place in a single output array.
+
+    :param T:
+        Scalar or array of temperatures in K.
+    :param Lambda:
+        Wavelength in nm.
+    :param out:
+        Optional - array in which the radiance is written.
+    """
+
+    c1, c2 = planck_constants(Lambda)
+    rad = numpy.asarray(numpy.divide(c2, T, out=out))
+    numpy.exp(rad, out=rad)
+    numpy.subtract(rad, 1.0, out=rad)
+    return numpy.divide(c1, rad, out=rad)
@@ -1,19 +1,19 @@
 __author__ = "mfreer, ohenry"
 __date__ = "2016-01-11 9:31"
-__version__ = "1.3"
+__version__ = "1.4"
 __all__ = ['RotateSolarVectorToAircraftFrame']
 
 import egads.core.egads_core as egads_core
 import egads.core.metadata as egads_metadata
 import numpy
-import egads
+from egads.algorithms.mathematics.limit_angle_range import limit_angle_range
 
 class RotateSolarVectorToAircraftFrame(egads_core.EgadsAlgorithm):
     
     """
     FILE        rotate_solar_vector_to_aircraft_frame.py
 
-    VERSION     1.3
+    VERSION     1.4
 
     CATEGORY    Radiation
 
@@ -77,28 +77,47 @@ class RotateSolarVectorToAircraftFrame(egads_core.EgadsAlgorithm):
         return egads_core.EgadsAlgorithm.run(self, theta_sun, phi_sun, roll, pitch, yaw)
 
     def _algorithm(self, theta_sun, phi_sun, roll, pitch, yaw):
-        cos = numpy.cos
-        sin = numpy.sin
         deg2rad = numpy.pi / 180.0
         rad2deg = 180.0 / numpy.pi
         phi_sun = 360 - phi_sun
         yaw = 360 - yaw
         theta_sun_r = theta_sun * deg2rad
         phi_sun_r = phi_sun * deg2rad
-        roll_r = roll * deg2rad
-        pitch_r = pitch * deg2rad
-        yaw_r = yaw * deg2rad
-        x = sin(theta_sun_r) * cos(phi_sun_r)
-        y = sin(theta_sun_r) * sin(phi_sun_r)
-        z = cos(theta_sun_r)
-        xx = x * (cos(pitch_r) * cos(yaw_r)) + y * (cos(pitch_r) * sin(yaw_r)) + z * (-sin(pitch_r))
-        yy = (x * (sin(roll_r) * sin(pitch_r) * cos(yaw_r) - cos(roll_r) * sin(yaw_r))
-              + y * (sin(roll_r) * sin(pitch_r) * sin(yaw_r) + cos(roll_r) * cos(yaw_r))
-              + z * (sin(roll_r) * cos(pitch_r)))
-        zz = (x * (cos(roll_r) * sin(pitch_r) * cos(yaw_r) + sin(roll_r) * sin(yaw_r))
-              + y * (cos(roll_r) * sin(pitch_r) * sin(yaw_r) - sin(roll_r) * cos(yaw_r))
-              + z * (cos(roll_r) * cos(pitch_r)))
-        theta_new = numpy.arccos(zz / numpy.sqrt(xx ** 2 + yy ** 2 + zz ** 2)) * rad2deg
-        phi_new = egads.EgadsData(value=360, units='deg', long_name='') - egads.algorithms.mathematics.LimitAngleRange().run(numpy.arctan(yy / xx) * rad2deg)  # @UndefinedVariable
+        sun_vector = numpy.stack(numpy.broadcast_arrays(numpy.sin(theta_sun_r) * numpy.cos(phi_sun_r),
+                                                        numpy.sin(theta_sun_r) * numpy.sin(phi_sun_r),
+                                                        numpy.cos(theta_sun_r)), axis=-1)
+        matrix = body_frame_rotation(roll * deg2rad, pitch * deg2rad, yaw * deg2rad)
+        xx, yy, zz = numpy.rollaxis(rotate_vector(matrix, sun_vector), -1)
+        theta_new = numpy.arctan2(numpy.sqrt(xx ** 2 + yy ** 2), zz) * rad2deg
+        phi_new = limit_angle_range(-numpy.arctan2(yy, xx) * rad2deg)
         return theta_new, phi_new
 
+
+def body_frame_rotation(roll, pitch, yaw):
+    """
+    Return the batch of matrices, of shape (..., 3, 3), rotating a vector by the
+    aircraft roll, pitch and yaw angles (radians) into the aircraft frame.
+    """
+
+    sin_r, cos_r = numpy.sin(roll), numpy.cos(roll)
+    sin_p, cos_p = numpy.sin(pitch), numpy.cos(pitch)
+    sin_y, cos_y = numpy.sin(yaw), numpy.cos(yaw)
+    matrix = numpy.empty(numpy.broadcast(roll, pitch, yaw).shape + (3, 3))
+    matrix[..., 0, 0] = cos_p * cos_y
+    matrix[..., 0, 1] = cos_p * sin_y
+    matrix[..., 0, 2] = -sin_p
+    matrix[..., 1, 0] = sin_r * sin_p * cos_y - cos_r * sin_y
+    matrix[..., 1, 1] = sin_r * sin_p * sin_y + cos_r * cos_y
+    matrix[..., 1, 2] = sin_r * cos_p
+    matrix[..., 2, 0] = cos_r * sin_p * cos_y + sin_r * sin_y
+    matrix[..., 2, 1] = cos_r * sin_p * sin_y - sin_r * cos_y
+    matrix[..., 2, 2] = cos_r * cos_p
+    return matrix
+
+
+def rotate_vector(matrix, vector):
+    """
+    Apply a batch of rotation matrices (..., 3, 3) to a batch of vectors (..., 3).
+    """
+
+    return numpy.einsum('...ij,...j->...i', matrix, vector)
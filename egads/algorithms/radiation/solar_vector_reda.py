@@ -8,7 +8,7 @@ import dateutil.parser as dateparser
 import egads  # @UnusedImport
 import egads.core.egads_core as egads_core
 import egads.core.metadata as egads_metadata
-import egads.algorithms.mathematics
+from egads.algorithms.mathematics.limit_angle_range import limit_angle_range
 
 
 class SolarVectorReda(egads_core.EgadsAlgorithm):
@@ -576,7 +576,7 @@ class SolarVectorReda(egads_core.EgadsAlgorithm):
              R4_sum * JME ** 4) / (1.0e8)
              
         # Calculate the geocentric longitude and latitude
-        Theta = egads.algorithms.mathematics.LimitAngleRange().run(L + 180).value
+        Theta = limit_angle_range(L + 180)
         beta = -B
 
         # Calculate the nutation in longitude and obliquity
@@ -611,14 +611,14 @@ class SolarVectorReda(egads_core.EgadsAlgorithm):
 
         # Calculate apparent sidereal time at Greenwich
         nu_0 = (280.46061837 + 360.98564736629 * (JD - 2451545) + 0.000387933 * JC ** 2 - JC ** 3 / 38710000.0)
-        nu_0 = egads.algorithms.mathematics.LimitAngleRange().run(nu_0).value
+        limit_angle_range(nu_0, out=nu_0)
         nu = nu_0 + delta_psi * numpy.cos(epsilon * DEG_TO_RAD)
 
         # Calculate geocentric sun right ascension
         alpha = numpy.arctan2(numpy.sin(lambda_sun * DEG_TO_RAD) * numpy.cos(epsilon * DEG_TO_RAD) -
                               numpy.tan(beta * DEG_TO_RAD) * numpy.sin(epsilon * DEG_TO_RAD),
                               numpy.cos(lambda_sun * DEG_TO_RAD)) * RAD_TO_DEG
-        alpha = egads.algorithms.mathematics.LimitAngleRange().run(alpha).value
+        limit_angle_range(alpha, out=alpha)
 
         # Calculate geocentric sun declination
         delta = numpy.arcsin(numpy.sin(beta * DEG_TO_RAD) * numpy.cos(epsilon * DEG_TO_RAD) +
@@ -627,7 +627,7 @@ class SolarVectorReda(egads_core.EgadsAlgorithm):
 
         # Calculate the observer local hour angle
         H = nu + lon - alpha
-        H = egads.algorithms.mathematics.LimitAngleRange().run(H).value
+        limit_angle_range(H, out=H)
 
         # Calculate the topocentric sun right ascension
         xi = 8.794 / (3600.0 * R)
@@ -662,9 +662,8 @@ class SolarVectorReda(egads_core.EgadsAlgorithm):
         Gamma = numpy.arctan2(numpy.sin(H_prime * DEG_TO_RAD),
                               numpy.cos(H_prime * DEG_TO_RAD) * numpy.sin(lat * DEG_TO_RAD) -
                               numpy.tan(delta_prime * DEG_TO_RAD) * numpy.cos(lat * DEG_TO_RAD)) * RAD_TO_DEG
-        Gamma = egads.algorithms.mathematics.LimitAngleRange().run(Gamma).value
-        Phi = Gamma + 180
-        Phi = egads.algorithms.mathematics.LimitAngleRange().run(Phi).value
+        limit_angle_range(Gamma, out=Gamma)
+        Phi = limit_angle_range(Gamma + 180)
         return [theta, Phi]
     
     def __compute_delta_T(self, year):
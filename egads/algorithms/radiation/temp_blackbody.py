@@ -6,6 +6,7 @@ __all__ = ['TempBlackbody']
 import egads.core.egads_core as egads_core
 import egads.core.metadata as egads_metadata
 import numpy
+from egads.algorithms.radiation.planck_emission import planck_constants
 
 class TempBlackbody(egads_core.EgadsAlgorithm):
     
@@ -61,11 +62,23 @@ class TempBlackbody(egads_core.EgadsAlgorithm):
         return egads_core.EgadsAlgorithm.run(self, rad, Lambda)
 
     def _algorithm(self, rad, Lambda):
-        h = 6.62606957e-34  # J s
-        kb = 1.3806e-23
-        c = 2.997925e8
-        l = Lambda * 1e-9
-        rad = rad * 1e9
-        T = h * c / (kb * l * numpy.log(2 * h * c ** 2 / (l ** 5 * rad) + 1))
-        return T
+        return temp_blackbody(rad, Lambda)
 
+
+def temp_blackbody(rad, Lambda, out=None):
+    """
+    Array-level kernel of TempBlackbody, evaluated in place in a single output array.
+
+    :param rad:
+        Scalar or array of radiances in W m-2 sr-1 nm-1.
+    :param Lambda:
+        Wavelength in nm.
+    :param out:
+        Optional - array in which the temperature is written.
+    """
+
+    c1, c2 = planck_constants(Lambda)
+    T = numpy.asarray(numpy.divide(c1, rad, out=out))
+    numpy.add(T, 1.0, out=T)
+    numpy.log(T, out=T)
+    return numpy.divide(c2, T, out=T)
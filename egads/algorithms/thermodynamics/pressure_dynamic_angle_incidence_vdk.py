@@ -113,29 +113,12 @@ class PressureAngleIncidenceVdk(egads_core.EgadsAlgorithm):
         k_a = (delta_P_t - delta_P_b) / P_tot
         k_b = (delta_P_r - delta_P_l) / P_tot
 
-        sum_out = numpy.zeros((12, len(k_a)))
-        for i in range(0,12):
-            sum_in = numpy.zeros((12, len(k_b)))
-            for j in range(0,12):
-                sum_in[j] = C_alpha[i][j] * (k_b ** j)
-            sum_out[i] = (k_a**i) * numpy.sum(sum_in, axis = 0)
-        alpha_cp = numpy.sum(sum_out, axis = 0)
-        
-        sum_out = numpy.zeros((12, len(k_a)))
-        for i in range(0,12):
-            sum_in = numpy.zeros((12, len(k_b)))
-            for j in range(0,12):
-                sum_in[j] = C_beta[i][j] * (k_b ** j)
-            sum_out[i] = (k_a**i) * numpy.sum(sum_in, axis = 0)
-        beta_cp = numpy.sum(sum_out, axis = 0)
-
-        sum_out = numpy.zeros((12, len(k_a)))
-        for i in range(0,12):
-            sum_in = numpy.zeros((12, len(k_b)))
-            for j in range(0,12):
-                sum_in[j] = C_dyn[i][j] * (k_b ** j)
-            sum_out[i] = (k_a**i) * numpy.sum(sum_in, axis = 0)
-        k_q = numpy.sum(sum_out, axis = 0)
+        # the power tables of k_a and k_b are computed once and shared by the three
+        # 12x12 calibration polynomials, which are then evaluated in a single pass
+        coeffs = numpy.array([C_alpha, C_beta, C_dyn], dtype='float64')[:, :12, :12]
+        pow_a = numpy.polynomial.polynomial.polyvander(k_a, coeffs.shape[1] - 1)
+        pow_b = numpy.polynomial.polynomial.polyvander(k_b, coeffs.shape[2] - 1)
+        alpha_cp, beta_cp, k_q = numpy.einsum('...kj,...j->k...', numpy.dot(pow_a, coeffs), pow_b)
         
         P_d = delta_P_s + P_tot * k_q
         alpha = alpha_cp
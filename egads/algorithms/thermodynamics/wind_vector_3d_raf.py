@@ -3,7 +3,7 @@ __date__ = "2012-06-22 17:19"
 __version__ = "1.2"
 __all__ = ['WindVector3dRaf']
 
-from numpy import sin, cos, tan, sqrt
+import numpy
 import egads.core.egads_core as egads_core
 import egads.core.metadata as egads_metadata
 
@@ -44,11 +44,17 @@ class WindVector3dRaf(egads_core.EgadsAlgorithm):
 
     REFERENCES  NCAR-RAF Bulletin #23
 
+    NOTES       The computation is done by the module-level function wind_vector_3d, which
+                accepts preallocated output arrays (out=) and a work dictionary holding
+                its temporary buffers. Each instance keeps its own work dictionary, so
+                successive calls on chunks of the same size reuse the same buffers.
+
     """
 
     def __init__(self, return_Egads=True):
         egads_core.EgadsAlgorithm.__init__(self, return_Egads)
 
+        self._work = {}
         self.output_metadata = []
         self.output_metadata.append(egads_metadata.VariableMetadata({'units':'m/s',
                                                                'long_name':'easterly wind velocity',
@@ -94,16 +100,127 @@ class WindVector3dRaf(egads_core.EgadsAlgorithm):
         return egads_core.EgadsAlgorithm.run(self, U_a, alpha, beta, u_p, v_p, w_p, phi, theta, psi, theta_dot, psi_dot, L)
 
     def _algorithm(self, U_a, alpha, beta, u_p, v_p, w_p, phi, theta, psi, theta_dot, psi_dot, L):
-        D = sqrt(1 + tan(alpha) ** 2 + tan(beta) ** 2)
-        u = ((-U_a / D) * (sin(psi) * cos(theta) + tan(beta) * (cos(psi) * cos(phi) 
-                         + sin(psi) * sin(theta) * sin(phi)) + tan(alpha) * (sin(psi) * sin(theta) * cos(phi) 
-                         - cos(psi) * sin(phi))) + u_p - L * (theta_dot * sin(theta) * sin(psi) - psi_dot * cos(psi) * cos(theta)))
-        v = ((-U_a / D) * (cos(psi) * cos(theta) -
-                         tan(beta) * (sin(psi) * cos(phi) - cos(psi) * sin(theta) * sin(phi)) +
-                         tan(alpha) * (cos(psi) * sin(theta) * cos(phi) + sin(psi) * sin(phi))) +
-             v_p - L * (psi_dot * sin(psi) * cos(theta) + theta_dot * cos(psi) * sin(theta)))
-        w = ((-U_a / D) * (sin(theta) - tan(beta) * cos(theta) * sin(phi) -
-                         tan(alpha) * cos(theta) * cos(phi)) +
-             w_p + L * theta_dot * cos(theta))
-        return u, v, w
+        return wind_vector_3d(U_a, alpha, beta, u_p, v_p, w_p, phi, theta, psi, theta_dot, psi_dot, L,
+                              work=self._work)
+
+
+def wind_vector_3d(U_a, alpha, beta, u_p, v_p, w_p, phi, theta, psi, theta_dot, psi_dot, L,
+                   out=None, work=None):
+    """
+    Array-level kernel of WindVector3dRaf. Each trigonometric term is evaluated
+    once and every intermediate result is written into a buffer of the work
+    dictionary, so that repeated calls on arrays of the same shape, with
+    preallocated outputs, do not allocate any memory.
+
+    :param out:
+        Optional - tuple of three float arrays (u, v, w) with the broadcast
+        shape of the inputs, in which the results are written.
+    :param dict work:
+        Optional - dictionary in which the temporary buffers are stored; it
+        should be kept between calls to reuse the buffers.
+    """
+
+    shape = numpy.broadcast(U_a, alpha, beta, u_p, v_p, w_p, phi, theta, psi,
+                            theta_dot, psi_dot, L).shape
+    if work is None:
+        work = {}
+    if out is None:
+        out = (numpy.empty(shape), numpy.empty(shape), numpy.empty(shape))
+    u, v, w = out
+    sin_psi, cos_psi, sin_theta, cos_theta, sin_phi, cos_phi, tan_alpha, tan_beta, k, p1, p2, t1, t2 = [
+        _buffer(work, name, shape) for name in ('sin_psi', 'cos_psi', 'sin_theta', 'cos_theta',
+                                                'sin_phi', 'cos_phi', 'tan_alpha', 'tan_beta',
+                                                'k', 'p1', 'p2', 't1', 't2')]
+    numpy.sin(psi, out=sin_psi)
+    numpy.cos(psi, out=cos_psi)
+    numpy.sin(theta, out=sin_theta)
+    numpy.cos(theta, out=cos_theta)
+    numpy.sin(phi, out=sin_phi)
+    numpy.cos(phi, out=cos_phi)
+    numpy.tan(alpha, out=tan_alpha)
+    numpy.tan(beta, out=tan_beta)
+
+    # k = -U_a / D, with D = sqrt(1 + tan(alpha)**2 + tan(beta)**2)
+    numpy.multiply(tan_alpha, tan_alpha, out=k)
+    numpy.multiply(tan_beta, tan_beta, out=t1)
+    numpy.add(k, t1, out=k)
+    numpy.add(k, 1., out=k)
+    numpy.sqrt(k, out=k)
+    numpy.divide(U_a, k, out=k)
+    numpy.negative(k, out=k)
+
+    # products shared by u and v
+    numpy.multiply(sin_theta, sin_phi, out=p1)
+    numpy.multiply(sin_theta, cos_phi, out=p2)
+
+    # u: k * (sin(psi)cos(theta) + tan(beta)(cos(psi)cos(phi) + sin(psi)sin(theta)sin(phi))
+    #         + tan(alpha)(sin(psi)sin(theta)cos(phi) - cos(psi)sin(phi)))
+    numpy.multiply(cos_psi, cos_phi, out=t1)
+    numpy.multiply(sin_psi, p1, out=u)
+    numpy.add(u, t1, out=u)
+    numpy.multiply(u, tan_beta, out=u)
+    numpy.multiply(sin_psi, p2, out=t1)
+    numpy.multiply(cos_psi, sin_phi, out=t2)
+    numpy.subtract(t1, t2, out=t1)
+    numpy.multiply(t1, tan_alpha, out=t1)
+    numpy.add(u, t1, out=u)
+    numpy.multiply(sin_psi, cos_theta, out=t1)
+    numpy.add(u, t1, out=u)
+    numpy.multiply(u, k, out=u)
+
+    # v: k * (cos(psi)cos(theta) - tan(beta)(sin(psi)cos(phi) - cos(psi)sin(theta)sin(phi))
+    #         + tan(alpha)(cos(psi)sin(theta)cos(phi) + sin(psi)sin(phi)))
+    numpy.multiply(sin_psi, cos_phi, out=t1)
+    numpy.multiply(cos_psi, p1, out=t2)
+    numpy.subtract(t1, t2, out=t1)
+    numpy.multiply(t1, tan_beta, out=v)
+    numpy.multiply(cos_psi, p2, out=t1)
+    numpy.multiply(sin_psi, sin_phi, out=t2)
+    numpy.add(t1, t2, out=t1)
+    numpy.multiply(t1, tan_alpha, out=t1)
+    numpy.subtract(t1, v, out=v)
+    numpy.multiply(cos_psi, cos_theta, out=t1)
+    numpy.add(v, t1, out=v)
+    numpy.multiply(v, k, out=v)
+
+    # w: k * (sin(theta) - cos(theta)(tan(beta)sin(phi) + tan(alpha)cos(phi)))
+    numpy.multiply(tan_beta, sin_phi, out=t1)
+    numpy.multiply(tan_alpha, cos_phi, out=t2)
+    numpy.add(t1, t2, out=t1)
+    numpy.multiply(t1, cos_theta, out=t1)
+    numpy.subtract(sin_theta, t1, out=w)
+    numpy.multiply(w, k, out=w)
+
+    # INS and lever arm corrections
+    numpy.multiply(theta_dot, sin_theta, out=p1)
+    numpy.multiply(psi_dot, cos_theta, out=p2)
+    numpy.multiply(p1, sin_psi, out=t1)
+    numpy.multiply(p2, cos_psi, out=t2)
+    numpy.subtract(t1, t2, out=t1)
+    numpy.multiply(t1, L, out=t1)
+    numpy.subtract(u, t1, out=u)
+    numpy.add(u, u_p, out=u)
+    numpy.multiply(p2, sin_psi, out=t1)
+    numpy.multiply(p1, cos_psi, out=t2)
+    numpy.add(t1, t2, out=t1)
+    numpy.multiply(t1, L, out=t1)
+    numpy.subtract(v, t1, out=v)
+    numpy.add(v, v_p, out=v)
+    numpy.multiply(theta_dot, cos_theta, out=t1)
+    numpy.multiply(t1, L, out=t1)
+    numpy.add(w, t1, out=w)
+    numpy.add(w, w_p, out=w)
+    return u, v, w
+
+
+def _buffer(work, name, shape):
+    """
+    Return the buffer stored under name in the work dictionary, allocating a
+    new one if it is missing or if its shape doesn't match.
+    """
 
+    buff = work.get(name)
+    if buff is None or buff.shape != shape:
+        buff = numpy.empty(shape)
+        work[name] = buff
+    return buff
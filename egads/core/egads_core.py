@@ -463,6 +463,9 @@ class EgadsAlgorithm(object):
     logging.info('egads - egads_core.py - EgadsAlgorithm has been loaded')
 
 
+_validated_units = {}
+
+
 def _validate_units(units):
     """
     Function to pre-validate units to be passed into Quantities for comprehension.
@@ -481,9 +484,15 @@ def _validate_units(units):
     
     In quantities, the time unit 'time since ...' is not correctly recognized. Thus
     corrects the 'time since ...' to 'time'.
+    
+    Results are cached for string units, as the same units are validated for each
+    variable read from a file.
     """
 
     logging.debug('egads - egads_core.py - _validate_units - units ' + str(units))
+    if isinstance(units, basestring) and units in _validated_units:
+        return _validated_units[units]
+    original_units = units
     
     # few patches have been introduced for compatibility"
     if "degree_" in units or "decimal degree" in units:
@@ -510,5 +519,7 @@ def _validate_units(units):
             units = 'dimensionless'
         if units == '0.01':
             units = 'percent'
+    if isinstance(original_units, basestring):
+        _validated_units[original_units] = units
     return units
 
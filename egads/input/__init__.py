@@ -4,10 +4,16 @@ __version__ = "1.1"
 
 
 from input_core import FileCore
+from input_core import ColumnCache
 from input_core import get_file_list
 from nasa_ames_io import NasaAmes
 from netcdf_io import NetCdf
 from netcdf_io import EgadsNetCdf
+from netcdf_io import EgadsVariableProxy
+from netcdf_io import EgadsNetCdfStream
+from netcdf_io import EgadsNetCdfDataset
+from netcdf_io import EgadsDatasetVariable
 from text_file_io import EgadsFile
 from text_file_io import EgadsCsv
 from text_file_io import parse_string_array
+from convert import convert_files
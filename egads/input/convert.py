@@ -0,0 +1,192 @@
+__version__ = "1.0"
+__all__ = ["convert_files"]
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import egads
+from egads.input import get_file_list
+from nappy.utils.process_utils import iterTasks, LostTaskError
+
+
+FORMAT_EXTENSIONS = {'nc': '.nc', 'na': '.na', 'csv': '.csv'}
+MEMORY_FACTOR = 4
+
+
+def convert_files(path, output_format, output_dir=None, workers=None, memory_budget=None, progress=None, **kwargs):
+    """
+    Converts a set of files, e.g. all the flight files of a campaign, in parallel
+    worker processes, one per file. NetCDF files are converted to NASA Ames or CSV files
+    with :class:`~egads.input.netcdf_io.EgadsNetCdf`, NASA Ames files to NetCDF
+    with :class:`~egads.input.nasa_ames_io.NasaAmes`. Each file is converted by
+    the same method as in a serial conversion, thus outputs are identical.
+
+    Example::
+
+        results = convert_files('data/*.nc', 'na', workers=4)
+
+    :param string|list path:
+        Path of the files to convert, wildcards are supported (see
+        :func:`~egads.input.get_file_list`), or list of file names.
+    :param string output_format:
+        Format of output files: ``na`` or ``csv`` for NetCDF input files, ``nc`` for
+        NASA Ames input files.
+    :param string output_dir:
+        Optional - Directory of output files. By default, output files are written next
+        to the input files. A ValueError is raised if several input files would be
+        converted to the same output file.
+    :param int workers:
+        Optional - Number of worker processes. Default - number of cores. If 1, files
+        are converted in the current process.
+    :param float memory_budget:
+        Optional - Memory in MB which can be used by the conversions running at the
+        same time, each being estimated to MEMORY_FACTOR times the size of its input
+        file. A file is always converted if no other conversion is running.
+    :param callable progress:
+        Optional - Function called after each conversion with the number of files
+        converted, the total number of files and the result of the conversion.
+    :param kwargs:
+        Optional - Keyword arguments passed to the conversion method, e.g. ``float_format``.
+
+    :returns:
+        List of dictionaries, one for each file in the order of the input list, with
+        ``input`` and ``output`` file names, conversion ``time`` in seconds and ``error``
+        message, None if the conversion succeeded.
+    """
+
+    logging.debug('egads - convert.py - convert_files - path ' + str(path) + ', output_format ' +
+                  str(output_format) + ', workers ' + str(workers) + ', memory_budget ' + str(memory_budget))
+    if output_format not in FORMAT_EXTENSIONS:
+        logging.error('egads - convert.py - convert_files - ValueError, unknown output format ' + str(output_format))
+        raise ValueError("ERROR: Unknown output format %s" % output_format)
+    if isinstance(path, basestring):
+        filenames = sorted(get_file_list(path))
+    else:
+        filenames = list(path)
+    tasks = []
+    for filename in filenames:
+        output = os.path.splitext(filename)[0] + FORMAT_EXTENSIONS[output_format]
+        if output_dir is not None:
+            output = os.path.join(output_dir, os.path.basename(output))
+        tasks.append((filename, output, output_format, kwargs))
+    outputs = {}
+    for filename, output, _, _ in tasks:
+        other = outputs.setdefault(os.path.abspath(output), filename)
+        if other != filename:
+            logging.error('egads - convert.py - convert_files - ValueError, ' + str(other) + ' and ' +
+                          str(filename) + ' are converted to the same file ' + str(output))
+            raise ValueError("ERROR: %s and %s are converted to the same file %s" % (other, filename, output))
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    results = [None] * len(tasks)
+    if workers <= 1 or len(tasks) <= 1:
+        for i, task in enumerate(tasks):
+            results[i] = _convert_file(task)
+            _report(progress, i + 1, len(tasks), results[i])
+        return results
+    if memory_budget is None:
+        memory_budget = float('inf')
+    estimates = [_memory_estimate(filename) for filename in filenames]
+    admit = lambda running, i: sum(estimates[j] for j in running) + estimates[i] <= memory_budget
+    completed = 0
+    try:
+        # each file is converted in its own process, a process killed during a conversion
+        # (e.g. by the OOM killer) raises LostTaskError instead of blocking the call
+        for i, result in iterTasks(_convert_file, tasks, workers, admit):
+            results[i] = result
+            completed += 1
+            _report(progress, completed, len(tasks), result)
+    except LostTaskError, e:
+        files = ', '.join(tasks[i][0] for i in e.indices)
+        logging.error('egads - convert.py - convert_files - RuntimeError, a worker process died ' +
+                      'while converting ' + files)
+        raise RuntimeError("ERROR: A worker process died while converting %s" % files)
+    return results
+
+
+def _convert_file(task):
+    """
+    Converts one file and returns the result dictionary. Exceptions are caught
+    and returned as error message, so that they don't stop the other conversions.
+    """
+
+    filename, output, output_format, kwargs = task
+    start = time.time()
+    error = None
+    f = None
+    try:
+        if output_format == 'nc':
+            f = egads.input.NasaAmes(filename)
+            f.convert_to_netcdf(output, **kwargs)
+        else:
+            f = egads.input.EgadsNetCdf(filename)
+            if output_format == 'csv':
+                f.convert_to_csv(output, **kwargs)
+            else:
+                f.convert_to_nasa_ames(output, **kwargs)
+    except Exception as e:
+        logging.exception('egads - convert.py - _convert_file - Exception, conversion of ' + str(filename) +
+                          ' failed')
+        error = str(e) or e.__class__.__name__
+    finally:
+        if f is not None:
+            f.close()
+    return {'input': filename, 'output': output, 'time': time.time() - start, 'error': error}
+
+
+def _memory_estimate(filename):
+    """
+    Returns the estimated memory in MB used by the conversion of a file.
+    """
+
+    try:
+        return os.path.getsize(filename) * MEMORY_FACTOR / 1e6
+    except OSError:
+        return 0.0
+
+
+def _report(progress, completed, total, result):
+    """
+    Logs the result of a conversion and calls the progress function.
+    """
+
+    logging.info('egads - convert.py - ' + str(completed) + '/' + str(total) + ' - ' + str(result['input']) +
+                 ' -> ' + str(result['output']) + ' in ' + '%.2f' % result['time'] + ' s' +
+                 (', error: ' + result['error'] if result['error'] else ''))
+    if progress is not None:
+        progress(completed, total, result)
+
+
+def main(argv=None):
+    """
+    Command line interface of :func:`convert_files`::
+
+        python -m egads.input.convert "data/*.nc" na --workers 4 --memory 2000
+    """
+
+    parser = argparse.ArgumentParser(description='Convert NetCDF and NASA Ames files with EGADS.')
+    parser.add_argument('path', help='path of the files to convert, wildcards are supported')
+    parser.add_argument('format', choices=sorted(FORMAT_EXTENSIONS), help='output format')
+    parser.add_argument('-o', '--output-dir', default=None, help='directory of output files')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('-m', '--memory', type=float, default=None, help='memory budget in MB')
+    args = parser.parse_args(argv)
+
+    def progress(completed, total, result):
+        status = 'ERROR ' + result['error'] if result['error'] else 'OK'
+        print '[%d/%d] %s -> %s (%.2f s) %s' % (completed, total, result['input'], result['output'],
+                                               result['time'], status)
+        sys.stdout.flush()
+
+    start = time.time()
+    results = convert_files(args.path, args.format, args.output_dir, args.workers, args.memory, progress)
+    failed = len([result for result in results if result['error']])
+    print '%d files converted, %d failed, in %.2f s' % (len(results) - failed, failed, time.time() - start)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,16 @@
 __author__ = "mfreer"
 __date__ = "2011-09-15 17:09"
 __version__ = "1.6"
-__all__ = ["FileCore", "get_file_list"]
+__all__ = ["FileCore", "ColumnCache", "get_file_list"]
 
 import glob
+import hashlib
+import json
 import logging
+import os
+import shutil
+import tempfile
+import numpy
 
 class FileCore(object):
     """
@@ -94,6 +100,184 @@ class FileCore(object):
 
     logging.info('egads - input_core.py - FileCore has been loaded')
 
+
+class ColumnCache(object):
+    """
+    Size-bounded directory of sidecar files holding the parsed columns of text
+    files, e.g. NASA Ames or CSV files, so that they are not parsed again each
+    time they are opened. Each column is stored as a ``.npy`` file, with a small
+    JSON metadata file, under a key made of the path, size and modification
+    time of the text file and of the options used to parse it. Columns are
+    memory-mapped when they are loaded. When the size of the directory exceeds
+    max_size, the least recently used entries are removed.
+
+    Example::
+
+        cache = ColumnCache('/data/egads_cache', max_size=2000)
+        f = NasaAmes('flight.na', cache=cache)
+    """
+
+    def __init__(self, directory=None, max_size=1024):
+        """
+        Initializes cache instance.
+
+        :param string directory:
+            Optional - Directory of the cache, created when needed. Default is an
+            ``egads_cache`` directory in the temporary directory of the system.
+        :param float max_size:
+            Optional - Maximum size of the cache in MB. Default is 1024 MB.
+        """
+
+        logging.debug('egads - input_core.py - ColumnCache - __init__ - directory ' + str(directory) +
+                      ', max_size ' + str(max_size))
+        if directory is None:
+            directory = os.path.join(tempfile.gettempdir(), 'egads_cache')
+        self.directory = directory
+        self.max_size = max_size
+
+    def load(self, filename, options=None):
+        """
+        Returns the list of memory-mapped, read-only columns stored for a file, or
+        None if the file is not in the cache or has changed since it was stored.
+
+        :param string filename:
+            Name of the text file.
+        :param options:
+            Optional - Options used to parse the file, any value with a stable ``repr``.
+        """
+
+        logging.debug('egads - input_core.py - ColumnCache - load - filename ' + str(filename) +
+                      ', options ' + str(options))
+        key = self._get_key(filename, options)
+        if key is None:
+            return None
+        entry = os.path.join(self.directory, key)
+        metadata_file = os.path.join(entry, 'metadata.json')
+        try:
+            with open(metadata_file) as f:
+                metadata = json.load(f)
+            columns = [numpy.load(os.path.join(entry, name), mmap_mode='r') for name in metadata['columns']]
+            os.utime(metadata_file, None)
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        logging.debug('egads - input_core.py - ColumnCache - load - filename ' + str(filename) + ' -> ' +
+                      str(len(columns)) + ' columns loaded from ' + entry)
+        return columns
+
+    def store(self, filename, columns, options=None):
+        """
+        Stores the columns parsed from a file and returns True, or False if they
+        can't be stored, e.g. if they are larger than the cache or hold objects.
+
+        :param string filename:
+            Name of the text file.
+        :param list columns:
+            List of arrays, or lists of values, parsed from the file.
+        :param options:
+            Optional - Options used to parse the file, any value with a stable ``repr``.
+        """
+
+        logging.debug('egads - input_core.py - ColumnCache - store - filename ' + str(filename) +
+                      ', options ' + str(options))
+        key = self._get_key(filename, options)
+        if key is None:
+            return False
+        columns = [numpy.asarray(column) for column in columns]
+        if (any(column.dtype.hasobject for column in columns) or
+                sum(column.nbytes for column in columns) > self.max_size * 1e6):
+            return False
+        entry = os.path.join(self.directory, key)
+        tmp_entry = None
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            tmp_entry = tempfile.mkdtemp(prefix='.tmp', dir=self.directory)
+            names = []
+            for i, column in enumerate(columns):
+                names.append('column_%d.npy' % i)
+                numpy.save(os.path.join(tmp_entry, names[-1]), column)
+            with open(os.path.join(tmp_entry, 'metadata.json'), 'w') as f:
+                json.dump({'filename': os.path.abspath(filename), 'options': repr(options), 'columns': names}, f)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, True)
+            os.rename(tmp_entry, entry)
+        except (IOError, OSError):
+            logging.exception('egads - input_core.py - ColumnCache - store - IOError, columns of ' + str(filename) +
+                              ' not stored in ' + str(self.directory))
+            if tmp_entry is not None:
+                shutil.rmtree(tmp_entry, True)
+            return False
+        self._evict()
+        logging.debug('egads - input_core.py - ColumnCache - store - filename ' + str(filename) + ' -> ' +
+                      str(len(columns)) + ' columns stored in ' + entry)
+        return True
+
+    def get_size(self):
+        """
+        Returns the size of the cache in MB.
+        """
+
+        logging.debug('egads - input_core.py - ColumnCache - get_size')
+        return sum(size for _, size, _ in self._get_entries()) / 1e6
+
+    def clear(self):
+        """
+        Removes all the entries of the cache.
+        """
+
+        logging.debug('egads - input_core.py - ColumnCache - clear - directory ' + str(self.directory))
+        for _, _, entry in self._get_entries():
+            shutil.rmtree(entry, True)
+
+    def _get_key(self, filename, options):
+        """
+        Returns the key of a file in the cache, None if the file doesn't exist.
+        """
+
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        return hashlib.sha1(repr((os.path.abspath(filename), stat.st_size, stat.st_mtime, options))).hexdigest()
+
+    def _get_entries(self):
+        """
+        Returns the list of complete entries of the cache as (last use, size, path)
+        tuples, the least recently used first.
+        """
+
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if name.startswith('.tmp'):
+                continue
+            entry = os.path.join(self.directory, name)
+            try:
+                last_use = os.path.getmtime(os.path.join(entry, 'metadata.json'))
+                size = sum(os.path.getsize(os.path.join(entry, column)) for column in os.listdir(entry))
+            except OSError:
+                continue
+            entries.append((last_use, size, entry))
+        return sorted(entries)
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_size.
+        """
+
+        entries = self._get_entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        while entries and size > self.max_size * 1e6:
+            _, entry_size, entry = entries.pop(0)
+            logging.debug('egads - input_core.py - ColumnCache - _evict - ' + entry + ' removed')
+            shutil.rmtree(entry, True)
+            size -= entry_size
+
+    logging.info('egads - input_core.py - ColumnCache has been loaded')
+
 def get_file_list(path):
     """
     Given path, returns a list of all files in that path. Wildcards are supported.
@@ -9,6 +9,7 @@ import egads
 import copy
 import re
 import os
+import numpy
 from egads.input import FileCore
 try:
     import nappy
@@ -24,6 +25,8 @@ except ImportError:
     raise ImportError('EGADS couldn''t find Nappy. Please check for a valid installation of Nappy'
                  + ' or the presence of Nappy in third-party software directory.')
 
+_CACHE_OPTIONS = ('NasaAmes', 1001, 'block')
+
 
 class NasaAmes(FileCore):
     """
@@ -34,7 +37,7 @@ class NasaAmes(FileCore):
     under Linux and Unix.
     """
 
-    def __init__(self, filename=None, perms='r'):
+    def __init__(self, filename=None, perms='r', cache=None):
         """
         Initializes NASA Ames instance.
 
@@ -44,20 +47,36 @@ class NasaAmes(FileCore):
             Optional -  Permissions used to open file.
             Options are ``w`` for write (overwrites data), ``a`` and ``r+`` for append, 
             and ``r`` for read. ``r`` is the default value.
+        :param ColumnCache cache:
+            Optional - Cache of parsed columns (see :class:`~egads.input.input_core.ColumnCache`).
+            If provided, the data of FFI 1001 files opened for reading are stored in the
+            cache the first time they are read, and memory-mapped from it afterwards.
         """
         
         logging.debug('egads - nasa_ames_io.py - NasaAmes - get_filename - filename ' + str(filename) + ', perms' + str(perms))
         self.file_metadata = None
+        self.cache = cache
+        self._block = None
+        self._scaled = None
         FileCore.__init__(self, filename, perms)
 
-    def read_na_dict(self):
+    def read_na_dict(self, share_data=False):
         """
         Read the dictionary from currently open NASA Ames file. Method accessible by
-        the user to read the dictionary in a custom object.
+        the user to read the dictionary in a custom object. The header fields are
+        always copied.
+
+        :param bool share_data:
+            Optional - If False (default), the data (``X``, ``V`` and ``A``) are copied
+            as lists, which can be modified freely. If True, the data arrays are shared
+            with the file as read-only views, so that they are not duplicated: modifying
+            them in place raises a ValueError, and they are changed by replacing them in
+            the dictionary, e.g. ``na_dict['V'][0] = new_values``, which leaves the file
+            untouched.
         """
         
-        logging.debug('egads - nasa_ames_io.py - NasaAmes - read_na_dict')
-        return copy.deepcopy(self.f.getNADict())
+        logging.debug('egads - nasa_ames_io.py - NasaAmes - read_na_dict - share_data ' + str(share_data))
+        return _copy_na_dict(self.f.getNADict(), share_data)
 
     def create_na_dict(self):
         """
@@ -79,7 +98,7 @@ class NasaAmes(FileCore):
             "SNAME":None,"V":[],"VMISS":[],"VNAME":[],"VSCAL":[],"X":[],"XNAME":[]}
         return na_dict
 
-    def read_variable(self, varname):
+    def read_variable(self, varname, mask_and_scale=False):
         """
         Read in variable from currently open NASA Ames file to :class: EgadsData
         object. Any additional variable metadata is additionally read in.
@@ -87,9 +106,15 @@ class NasaAmes(FileCore):
         :param string|int varname:
             String name or sequential number of variable to read in from currently
             open file.
+        :param bool mask_and_scale:
+            Optional - If True, values of a main variable are multiplied by its scale
+            factor (VSCAL) and its missing values (VMISS) are replaced by NaN. For FFI
+            1001 files, all the variables are scaled at once at the first call. Metadata
+            are unchanged. Default - False.
         """
         
-        logging.debug('egads - nasa_ames_io.py - NasaAmes - read_variable - varname ' + str(varname))
+        logging.debug('egads - nasa_ames_io.py - NasaAmes - read_variable - varname ' + str(varname) +
+                      ', mask_and_scale ' + str(mask_and_scale))
         var_type = "main"
         try:
             if isinstance(varname, int):
@@ -115,7 +140,10 @@ class NasaAmes(FileCore):
                                                                   '_FillValue':miss,
                                                                   'scale_factor':scale},
                                                                   self.file_metadata)
-        na_data = self.f.getVariableValues(varnum, var_type)
+        if mask_and_scale and var_type == "main":
+            na_data = self._get_scaled_values(varnum)
+        else:
+            na_data = self.f.getVariableValues(varnum, var_type)
         data = egads.EgadsData(na_data, variable_metadata)
         logging.debug('egads - nasa_ames_io.py - NasaAmes - read_variable - varname ' + str(varname) + ' -> data read OK')
         return data
@@ -154,13 +182,16 @@ class NasaAmes(FileCore):
                     else:
                         var_list = self.get_variable_list()
                         varnum = var_list.index(varname)
+                except ValueError:
+                    varnum = None
+                if varnum is not None:
                     if isinstance(data, egads.EgadsData):
-                        self.f.V[varnum] = data.value.tolist()
+                        self._set_values(varnum, data.value)
                     else:
-                        self.f.V[varnum] = data
-                except ValueError:
+                        self._set_values(varnum, data)
+                else:
                     if isinstance(data, egads.EgadsData):
-                        value = data.value.tolist()
+                        value = data.value
                         try:
                             name = data.metadata["standard_name"]
                         except KeyError:
@@ -215,11 +246,15 @@ class NasaAmes(FileCore):
                             except KeyError:
                                 logging.exception('egads - nasa_ames_io.py - NasaAmes - write_variable - The EgadsData object has no _FillValue or missing_value metadata')
                                 raise KeyError('The EgadsData object has no _FillValue or missing_value metadata')
+                    if self.f.FFI == 1001:
+                        # values are converted before the header is changed, so that it stays
+                        # consistent with the data if they can't be converted
+                        value = numpy.asarray(value, dtype=numpy.float64)
                     self.f.NV += 1
-                    self.f.V.append(value)
                     self.f.VNAME.append(name + " (" + units + ")")
                     self.f.VMISS.append(miss)
                     self.f.VSCAL.append(scale)
+                    self._set_values(len(self.f.V), value)
             elif vartype == "independant":
                 try:
                     if isinstance(varname, int):
@@ -227,11 +262,19 @@ class NasaAmes(FileCore):
                     else:
                         var_list = self.get_variable_list(vartype=vartype)
                         varnum = var_list.index(varname)
-                    if isinstance(data, egads.EgadsData):
+                except ValueError:
+                    varnum = None
+                if varnum is not None:
+                    if self.f.FFI == 1001:
+                        if isinstance(data, egads.EgadsData):
+                            data = data.value
+                        self.f.X = numpy.array(data, dtype=numpy.float64)
+                        self.na_dict['X'] = self.f.X
+                    elif isinstance(data, egads.EgadsData):
                         self.f.X[varnum] = data.value.tolist()
                     else:
                         self.f.X[varnum] = data
-                except ValueError:
+                else:
                     if isinstance(data, egads.EgadsData):
                         value = data.value.tolist()
                         try:
@@ -710,20 +753,26 @@ class NasaAmes(FileCore):
             args['annotation'] = annotation
         if no_header is True:
             args['no_header'] = no_header
-        saved_file = nappy.openNAFile(filename, mode="w", na_dict=na_dict)
+        saved_file = nappy.openNAFile(filename, mode="w", na_dict=_copy_na_dict(na_dict))
         saved_file.write(float_format=float_format, **args)
         saved_file.close()
 
-    def convert_to_netcdf(self, nc_file=None):
+    def convert_to_netcdf(self, nc_file=None, storage_options=None):
         """
         Convert a NASA/Ames dictionary to a NetCDF file.
 
         :param string nc_file:
             Optional - String name of the netcdf file to be written. If no filename is passed, 
             the function will used the name of the actually opened NASA/Ames file.
+        :param dict storage_options:
+            Optional - Compression options of the NetCDF file (``zlib``, ``complevel``, 
+            ``shuffle``, ``least_significant_digit``), see 
+            :meth:`~egads.input.netcdf_io.NetCdf.set_storage_options`. By default, variables
+            are not compressed.
         """
         
-        logging.debug('egads - nasa_ames_io.py - NasaAmes - convert_to_netcdf - nc_file ' + str(nc_file))
+        logging.debug('egads - nasa_ames_io.py - NasaAmes - convert_to_netcdf - nc_file ' + str(nc_file) + 
+                      ', storage_options ' + str(storage_options))
         if not nc_file:
             filename, _ = os.path.splitext(self.filename)
             nc_file = filename + '.nc'
@@ -757,6 +806,8 @@ class NasaAmes(FileCore):
         ind_variable_list = self.get_variable_list(vartype = 'independant')
         ind_dimension_list = self.get_dimension_list(vartype='independant')
         g = egads.input.EgadsNetCdf(nc_file, 'w')  # @UndefinedVariable
+        if storage_options:
+            g.set_storage_options(**storage_options)
         g.add_attribute('Conventions', 'CF-1.0')
         g.add_attribute('no_of_nasa_ames_header_lines', nlhead)
         g.add_attribute('file_format_index', ffi)
@@ -799,7 +850,7 @@ class NasaAmes(FileCore):
         self.close()
         try:
             self.f = nappy.openNAFile(filename, mode=perms)
-            self.f.readData()
+            self._read_data(filename, perms)
             self.filename = filename
             self.perms = perms
             self.na_dict = self.f.getNADict()
@@ -824,6 +875,98 @@ class NasaAmes(FileCore):
                            str(filename) + ' doesn''t exist')
             raise IOError("ERROR: File %s doesn't exist" % (filename))
 
+    def _read_data(self, filename, perms):
+        """
+        Private method reading the data section of the NASA Ames file, from the
+        cache if possible.
+        """
+
+        self._block = None
+        self._scaled = None
+        cached = self.cache is not None and perms == 'r' and self.f.FFI == 1001
+        if cached:
+            columns = self.cache.load(filename, _CACHE_OPTIONS)
+            if columns is not None and len(columns) == 2 and columns[1].shape == (self.f.NV, len(columns[0])):
+                logging.debug('egads - nasa_ames_io.py - NasaAmes - _read_data - data loaded from cache')
+                self.f.X = columns[0]
+                self._set_block(columns[1])
+                return
+        self.f.readData()
+        if self.f.FFI == 1001:
+            self.f.X = numpy.array(self.f.X, dtype=numpy.float64)
+            self._set_block(numpy.array(self.f.V, dtype=numpy.float64).reshape(self.f.NV, len(self.f.X)))
+            if cached:
+                self.cache.store(filename, [self.f.X, self._block], _CACHE_OPTIONS)
+
+    def _set_block(self, block):
+        """
+        Private method setting the 2-D array holding the values of all the main
+        variables of a FFI 1001 file, one variable per row. The variables of the
+        Nappy file become views of its rows.
+        """
+
+        self._block = block
+        self._scaled = None
+        if self.f.V is None:
+            self.f.V = list(block)
+        else:
+            self.f.V[:] = list(block)
+
+    def _set_values(self, varnum, values):
+        """
+        Private method storing the values of the main variable varnum, or of a new
+        variable if varnum is the number of variables. For FFI 1001 files, values
+        are stored as float64 in the data block and NaN are replaced by the missing
+        value of the variable.
+        """
+
+        if self.f.FFI != 1001:
+            if isinstance(values, numpy.ndarray):
+                values = values.tolist()
+            if varnum == len(self.f.V):
+                self.f.V.append(values)
+            else:
+                self.f.V[varnum] = values
+            return
+        values = numpy.array(values, dtype=numpy.float64)
+        missing = numpy.isnan(values)
+        if self.f.VMISS[varnum] is not None and missing.any():
+            values[missing] = self.f.VMISS[varnum]
+        block = self._block
+        if block is not None and values.shape == block.shape[1:]:
+            if varnum == len(block):
+                block = numpy.vstack((block, values[numpy.newaxis]))
+            else:
+                if not block.flags.writeable:
+                    block = numpy.array(block)
+                block[varnum] = values
+            self._set_block(block)
+        else:
+            self._block = None
+            self._scaled = None
+            if varnum == len(self.f.V):
+                self.f.V.append(values)
+            else:
+                self.f.V[varnum] = values
+
+    def _get_scaled_values(self, varnum):
+        """
+        Private method returning the values of the main variable varnum multiplied
+        by its scale factor, missing values being replaced by NaN. For FFI 1001
+        files, the whole data block is scaled once and kept until the data or the
+        missing values and scale factors change.
+        """
+
+        vmiss = [numpy.nan if miss is None else miss for miss in self.f.VMISS]
+        vscal = [1.0 if scale is None else scale for scale in self.f.VSCAL]
+        if self._block is None:
+            return _mask_and_scale(numpy.asarray(self.f.V[varnum], dtype=numpy.float64), vmiss[varnum], vscal[varnum])
+        key = (vmiss, vscal)
+        if self._scaled is None or self._scaled[0] != key:
+            self._scaled = (key, _mask_and_scale(self._block, numpy.array(vmiss)[:, numpy.newaxis],
+                                                 numpy.array(vscal)[:, numpy.newaxis]))
+        return self._scaled[1][varnum]
+
     def na_format_information(self):
         string = ("The goal of the 'na_format_information' function is to give few information\n"
                   + "about the file structure. Please see the following link for details:\n"
@@ -906,4 +1049,49 @@ class NasaAmes(FileCore):
     
     logging.info('egads - nasa_ames_io.py - NasaAmes has been loaded')
         
-        
\ No newline at end of file
+        
+
+
+def _mask_and_scale(values, miss, scale):
+    """
+    Returns values multiplied by scale, NaN replacing the values equal to miss.
+    """
+
+    return numpy.where(values == miss, numpy.nan, values * scale)
+
+
+def _copy_na_dict(na_dict, share_data=True):
+    """
+    Returns a copy of a NASA/Ames dictionary in which the header fields are
+    deep-copied and the data (X, V and A) are put in new lists. If share_data
+    is True, their arrays are shared as read-only views, otherwise they are
+    converted to lists. Data held in lists are copied.
+    """
+
+    na_copy = {}
+    for key, value in na_dict.iteritems():
+        if key in ('X', 'V', 'A'):
+            na_copy[key] = _share_data(value, share_data)
+        else:
+            na_copy[key] = copy.deepcopy(value)
+    return na_copy
+
+
+def _share_data(value, share_data=True):
+    """
+    Returns a read-only view of an array, or a list of its values if share_data
+    is False, or a copy of a list in which arrays are replaced in the same way.
+    Lists of scalars, which are immutable, are copied without copying the values.
+    """
+
+    if isinstance(value, numpy.ndarray):
+        if not share_data:
+            return value.tolist()
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, list):
+        if not any(issubclass(item_type, (list, numpy.ndarray)) for item_type in set(map(type, value))):
+            return list(value)
+        return [_share_data(item, share_data) for item in value]
+    return copy.deepcopy(value)
@@ -1,37 +1,27 @@
 __author__ = "ohenry"
 __date__ = "2017-1-11 14:52"
-__version__ = "0.1"
+__version__ = "0.2"
 __all__ = ["NasaAmes"]
 
 import logging
-import datetime
-import egads
-import copy
 import re
-import os
+import numpy
+import egads
 from egads.input import FileCore
-try:
-    import nappy
-    logging.info('egads - nasa_ames_io.py - nappy has been imported')
-    if 'egads' not in nappy.__path__[0]:
-        logging.warning('egads - nasa_ames_io.py - EGADS has imported an already installed version of Nappy. If issues occure,'
-                        + ' please check the version number of Nappy.')
-        print ('EGADS has imported an already installed version of Nappy. If issues occure,'
-               + ' please check the version number of Nappy.')
-except ImportError:
-    logging.exception('egads - nasa_ames_io.py - EGADS couldn''t find Nappy. Please check for a valid installation of Nappy'
-                 + ' or the presence of Nappy in third-party software directory.')
-    raise ImportError('EGADS couldn''t find Nappy. Please check for a valid installation of Nappy'
-                 + ' or the presence of Nappy in third-party software directory.')
+
+
+DATA_CHUNK_BYTES = 2 ** 22
+_curly_braces_pattern = re.compile("^(.+)\{[^{^}]*\}\s*$")
+_var_and_units_pattern = re.compile("^\s*(.*)\((.+?)\)(.*)\s*$")
 
 
 class NasaAmes(FileCore):
     """
-    EGADS module for interfacing with NASA Ames files. This module adapts the NAPpy 
-    library to the file access methods used in EGADS. To keep compatibility with
-    Windows, all functions calling CDMS or CDMS2 have been revoked. The user still
-    can use egads.thirdparty.nappy functions to have access to CDMS possibilities
-    under Linux and Unix.
+    EGADS module for reading NASA Ames files with the FFI 1001 without the
+    NAPpy library. The header is parsed once when the file is opened and the
+    position of the data section is recorded; variables are then read from
+    that position, block by block, only when requested, so that the data
+    section is never held in memory as text. Files are opened read-only.
     """
 
     def __init__(self, filename=None, perms='r'):
@@ -39,127 +29,395 @@ class NasaAmes(FileCore):
         Initializes NASA Ames instance.
 
         :param string filename:
-            Optional - Name of NetCDF file to open.
+            Optional - Name of NASA Ames file to open.
         :param char perms:
-            Optional -  Permissions used to open file.
-            Options are ``w`` for write (overwrites data), ``a`` and ``r+`` for append, 
-            and ``r`` for read. ``r`` is the default value.
+            Optional -  Permissions used to open file. Only ``r`` for read is supported.
         """
-        
-        logging.debug('egads - nasa_ames_io.py - NasaAmes - get_filename - filename ' + str(filename) + ', perms' + str(perms))
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - __init__ - filename ' + str(filename) + ', perms' + str(perms))
         self.file_metadata = None
+        self.na_dict = None
+        self._data_offset = None
+        self._row_count = None
         FileCore.__init__(self, filename, perms)
 
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
+    def read_na_dict(self):
+        """
+        Returns the header of currently open NASA Ames file as a NASA/Ames
+        dictionary, without the data (X and V).
+        """
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - read_na_dict')
+        return dict((key, list(value) if isinstance(value, list) else value)
+                    for key, value in self.na_dict.iteritems())
+
+    def read_variable(self, varname, input_range=None, chunk=None):
+        """
+        Read in variable from currently open NASA Ames file to :class: EgadsData
+        object. Any additional variable metadata is additionally read in.
+
+        :param string|int varname:
+            String name or sequential number of variable to read in from currently
+            open file. Main variables are searched first, then the independant variable.
+        :param tuple input_range:
+            Optional - Start and end indices of the records to read, as in a slice.
+        :param int chunk:
+            Optional - Size in bytes of the blocks of the data section parsed at once.
+        """
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - read_variable - varname ' + str(varname) +
+                      ', input_range ' + str(input_range))
+        return self.read_variables([varname], input_range, chunk)[0]
+
+    def read_variables(self, varnames, input_range=None, chunk=None):
+        """
+        Reads several variables from currently open NASA Ames file in one pass
+        over the data section and returns them as a list of :class: EgadsData
+        objects, in the order of varnames.
+
+        :param list varnames:
+            Names or sequential numbers of variables to read in.
+        :param tuple input_range:
+            Optional - Start and end indices of the records to read, as in a slice.
+        :param int chunk:
+            Optional - Size in bytes of the blocks of the data section parsed at once.
+        """
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - read_variables - varnames ' + str(varnames) +
+                      ', input_range ' + str(input_range))
+        columns = [self._get_column(varname) for varname in varnames]
+        blocks = list(self._iter_records([column for column, _ in columns], input_range, chunk))
+        if blocks:
+            values = numpy.concatenate(blocks)
+        else:
+            values = numpy.empty((0, len(columns)))
+        data = []
+        for i, (_, metadata) in enumerate(columns):
+            data.append(egads.EgadsData(values[:, i].copy(), egads.core.metadata.VariableMetadata(metadata, self.file_metadata)))
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - read_variables - varnames ' + str(varnames) + ' -> data read OK')
+        return data
+
+    def iter_variable(self, varname, chunk=None):
+        """
+        Generator reading one or several variables from currently open NASA Ames
+        file block by block.
+
+        :param string|int|list varname:
+            Name or sequential number of variable to read in, or list of them. In that
+            case, a list of arrays is returned at each iteration.
+        :param int chunk:
+            Optional - Size in bytes of the blocks of the data section read at each
+            iteration. Default is 4 MB.
+        """
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - iter_variable - varname ' + str(varname) +
+                      ', chunk ' + str(chunk))
+        if isinstance(varname, list):
+            columns = [self._get_column(name)[0] for name in varname]
+        else:
+            columns = [self._get_column(varname)[0]]
+        for records in self._iter_records(columns, None, chunk):
+            if isinstance(varname, list):
+                yield [records[:, i].copy() for i in range(len(columns))]
+            else:
+                yield records[:, 0].copy()
+
+    def get_variable_list(self, na_dict=None, vartype="main"):
+        """
+        Returns list of all variables in NASA Ames file.
+
+        :param dict na_dict:
+            Optional - The NASA/Ames dictionary in which to get the variable list. By default,
+            na_dict = None and the variable list is retrieved from the currently opened NASA/Ames
+            file.
+        :param string vartype:
+            Optional - the type of data to read
+            Options are ``independant`` for independant variables, ``main`` for main variables.
+        """
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - get_variable_list - vartype ' + str(vartype))
+        if na_dict is None:
+            na_dict = self.na_dict
+        if na_dict is None:
+            logging.error('egads - nasa_ames_io_2.py - NasaAmes - get_variable_list - AttributeError, no file opened')
+            raise AttributeError("ERROR: no file opened")
+        if vartype == "main":
+            names = na_dict['VNAME']
+        elif vartype == "independant":
+            names = na_dict['XNAME']
+        else:
+            logging.error('egads - nasa_ames_io_2.py - NasaAmes - get_variable_list - ValueError, unknown variable type ' +
+                          str(vartype))
+            raise ValueError("ERROR: Unknown variable type %s" % vartype)
+        return [self._attemptVarAndUnitsMatch(name)[0] for name in names]
+
+    def get_dimension_list(self, vartype="main"):
+        """
+        Returns a dictionary of all dimensions linked to their variables in NASA Ames file.
+        The number of records is counted once, without converting the values.
+
+        :param string vartype:
+            Optional - the type of data to read
+            Options are ``independant`` for independant variables, ``main`` for main variables.
+        """
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - get_dimension_list - vartype ' + str(vartype))
+        row_count = self._get_row_count()
+        return dict((var, row_count) for var in self.get_variable_list(vartype=vartype))
+
+    def get_attribute_list(self, varname=None, vartype="main"):
+        """
+        Returns a list of attributes found in current NASA Ames file either globally or
+        attached to a given variable, depending on the type
+
+        :param string|int varname:
+            Optional - Name or number of variable to get list of attributes from. If no
+            variable name is provided, the function returns global attributes.
+        :param string vartype:
+            Optional - type of variable to get list of attributes from. If no variable
+            type is provided with the variable name, the function returns an attribute
+            of the main variable .
+        """
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - get_attribute_list - varname ' + str(varname) +
+                      ', vartype ' + str(vartype))
+        if varname is None:
+            return self.na_dict.keys()
+        metadata = self._get_metadata(self._get_varnum(varname, vartype), vartype)
+        return [key for key in ('standard_name', 'units', '_FillValue', 'scale_factor')
+                if metadata.get(key) is not None]
+
+    def get_attribute_value(self, attrname, varname=None, vartype="main"):
+        """
+        Returns the value of an attribute found in current NASA Ames file either globally
+        or attached to a given variable (only name, units, _FillValue and scale_factor), depending on the type
+
+        :param string attrname:
+            String name of attribute to read.
+        :param string|int varname:
+            Optional - Name or number of variable to get attribute from. If no
+            variable name is provided, the function returns global attributes.
+        :param string vartype:
+            Optional - type of variable to get attribute from. If no variable type
+            is provided with the variable name, the function returns an attribute of
+            the main variable.
+        """
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - get_attribute_value - attrname ' + str(attrname) +
+                      ', varname ' + str(varname) + ', vartype ' + str(vartype))
+        if varname is None:
+            return self.na_dict[attrname]
+        return self._get_metadata(self._get_varnum(varname, vartype), vartype)[attrname]
+
     def _open_file(self, filename, perms):
         """
-        Private method for opening NASA Ames file using Nappy API.
+        Private method for opening NASA Ames file, reading its header and recording
+        the position of the data section.
 
         :parm string filename:
             Name of NASA Ames file to open.
         :param char perms:
-            Permissions used to open file. Options are ``w`` for write (overwrites data in file),
-            ``a`` and ``r+`` for append, and ``r`` for read.
+            Permissions used to open file. Only ``r`` for read is supported.
         """
-        
-        logging.debug('egads - nasa_ames_io.py - NasaAmes - open_file - filename ' + str(filename) + 
+
+        logging.debug('egads - nasa_ames_io_2.py - NasaAmes - open_file - filename ' + str(filename) +
                       ', perms ' + str(perms))
         self.close()
+        if perms != 'r':
+            logging.error('egads - nasa_ames_io_2.py - NasaAmes - open_file - ValueError, unsupported permissions ' +
+                          str(perms))
+            raise ValueError("ERROR: NASA Ames files can only be opened for reading, not %s" % perms)
         try:
-            
-            self.f = open(filename, mode=perms)
-            header_dict = self._get_header()
-            '''self.f = nappy.openNAFile(filename, mode=perms)
-            self.f.readData()
-            self.filename = filename
-            self.perms = perms
-            self.na_dict = self.f.getNADict()
-            attr_dict = {}
-            attr_dict['Comments'] = self.f.getNormalComments()
-            attr_dict['SpecialComments'] = self.f.getSpecialComments()
-            attr_dict['Organisation'] = self.f.getOrganisation()
-            dates = self.f.getFileDates()
-            attr_dict['CreationDate'] = dates[0]
-            attr_dict['RevisionDate'] = dates[1]
-            attr_dict['Originator'] = self.f.getOriginator()
-            attr_dict['Mission'] = self.f.getMission()
-            attr_dict['Source'] = self.f.getSource()
-            self.file_metadata = egads.core.metadata.FileMetadata(attr_dict, self.filename,
-                                                                  conventions="NASAAmes")'''
-        except RuntimeError:
-            logging.exception('egads - nasa_ames_io.py - NasaAmes - open_file - RuntimeError, File '+
-                           str(filename) + ' doesn''t exist')
-            raise RuntimeError("ERROR: File %s doesn't exist" % (filename))
+            self.f = open(filename, 'r')
         except IOError:
-            logging.exception('egads - nasa_ames_io.py - NasaAmes - open_file - IOError, File '+
+            logging.exception('egads - nasa_ames_io_2.py - NasaAmes - open_file - IOError, File '+
                            str(filename) + ' doesn''t exist')
             raise IOError("ERROR: File %s doesn't exist" % (filename))
+        try:
+            self.na_dict = self._get_header()
+        except Exception:
+            self.close()
+            raise
+        self._data_offset = self.f.tell()
+        self._row_count = None
+        self.filename = filename
+        self.perms = perms
+        attr_dict = {}
+        attr_dict['Comments'] = self.na_dict['NCOM']
+        attr_dict['SpecialComments'] = self.na_dict['SCOM']
+        attr_dict['Organisation'] = self.na_dict['ORG']
+        attr_dict['CreationDate'] = self.na_dict['DATE']
+        attr_dict['RevisionDate'] = self.na_dict['RDATE']
+        attr_dict['Originator'] = self.na_dict['ONAME']
+        attr_dict['Mission'] = self.na_dict['MNAME']
+        attr_dict['Source'] = self.na_dict['SNAME']
+        self.file_metadata = egads.core.metadata.FileMetadata(attr_dict, self.filename,
+                                                              conventions="NASAAmes")
 
+    def _get_header(self):
+        """
+        Reads the header of a NASA Ames file with the FFI 1001 from the beginning of
+        the file and returns it as a NASA/Ames dictionary. The file is left at the
+        first line of the data section.
+        """
 
+        line_count = [0]
+
+        def readline():
+            line_count[0] += 1
+            line = self.f.readline()
+            if not line:
+                logging.error('egads - nasa_ames_io_2.py - NasaAmes - _get_header - Exception, unexpected end of file')
+                raise Exception("ERROR: Unexpected end of file in the header of %s" % self.f.name)
+            return _strip_line(line)
+
+        def readlines(nlines):
+            return [readline() for _ in range(nlines)]
 
-    def _get_header(self):
         tmp = {}
-        tmp['NLHEAD'], tmp['FFI'] = self.f.readline().split()
-        tmp['ONAME'] = self.f.readline().rstrip('\n')
-        tmp['ORG'] = self.f.readline().rstrip('\n')
-        tmp['SNAME'] = self.f.readline().rstrip('\n')
-        tmp['MNAME'] = self.f.readline().rstrip('\n')
-        tmp['IVOL'], tmp['NVOL'] = self.f.readline().split()
-        yy1, mm1, dd1, yy2, mm2, dd2 = self.f.readline().split()
-        tmp['DATE'] = [int(yy1), int(mm1), int(dd1)]
-        tmp['RDATE'] = [int(yy2), int(mm2), int(dd2)]
-        tmp['DX'] = self.f.readline().rstrip('\n')
-        tmp['XNAME'] = self.f.readline().rstrip('\n')
-        tmp['NV'] = int(self.f.readline().rstrip('\n'))
-        vscal = self.f.readline().split()
-        tmp['VSCAL'] = [float(factor) for factor in vscal]
-        vmiss = self.f.readline().split()
-        tmp['VMISS'] = [float(miss) for miss in vmiss]
-        name_list = []
-        for _ in range(tmp['NV']):
-            name_list.append(self.f.readline().rstrip('\n'))
-        tmp['VNAME'] = name_list
-        tmp['NSCOML'] = int(self.f.readline().rstrip('\n'))
-        scom_list = []
-        for _ in range(tmp['NSCOML']):
-            scom_list.append(self.f.readline().rstrip('\n'))
-        tmp['SCOM'] = scom_list
-        tmp['NNCOML'] = int(self.f.readline().rstrip('\n'))
-        ncom_list = []
-        for _ in range(tmp['NNCOML']):
-            scom_list.append(self.f.readline().rstrip('\n'))
-        tmp['NCOM'] = ncom_list
-        
-        
-        
-        
-        
+        nlhead, ffi = readline().split()
+        tmp['NLHEAD'], tmp['FFI'] = int(nlhead), int(ffi)
+        if tmp['FFI'] != 1001:
+            logging.error('egads - nasa_ames_io_2.py - NasaAmes - _get_header - ValueError, unsupported FFI ' +
+                          str(tmp['FFI']))
+            raise ValueError("ERROR: Only the FFI 1001 is supported, %s found" % tmp['FFI'])
+        tmp['ONAME'] = readline()
+        tmp['ORG'] = readline()
+        tmp['SNAME'] = readline()
+        tmp['MNAME'] = readline()
+        tmp['IVOL'], tmp['NVOL'] = [int(value) for value in readline().split()]
+        dates = [int(value) for value in readline().split()]
+        tmp['DATE'], tmp['RDATE'] = dates[:3], dates[3:]
+        tmp['NIV'] = 1
+        tmp['DX'] = [float(value) for value in readline().split()]
+        tmp['XNAME'] = readlines(tmp['NIV'])
+        tmp['NV'] = int(readline())
+        tmp['VSCAL'] = _read_values(readline, tmp['NV'])
+        tmp['VMISS'] = _read_values(readline, tmp['NV'])
+        tmp['VNAME'] = readlines(tmp['NV'])
+        tmp['NSCOML'] = int(readline())
+        tmp['SCOM'] = readlines(tmp['NSCOML'])
+        tmp['NNCOML'] = int(readline())
+        tmp['NCOM'] = readlines(tmp['NNCOML'])
+        if line_count[0] > tmp['NLHEAD']:
+            logging.error('egads - nasa_ames_io_2.py - NasaAmes - _get_header - Exception, NLHEAD ' +
+                          str(tmp['NLHEAD']) + ' smaller than the header')
+            raise Exception("ERROR: The header of %s has more than NLHEAD (%s) lines" % (self.f.name, tmp['NLHEAD']))
+        readlines(tmp['NLHEAD'] - line_count[0])
         return tmp
-        
 
+    def _get_varnum(self, varname, vartype="main"):
+        """
+        Returns the sequential number of a variable from its name or number.
+        """
+
+        if isinstance(varname, int):
+            return varname
+        try:
+            return self.get_variable_list(vartype=vartype).index(varname)
+        except ValueError:
+            logging.error('egads - nasa_ames_io_2.py - NasaAmes - _get_varnum - KeyError, no ' + str(vartype) +
+                          ' variable called ' + str(varname))
+            raise KeyError("ERROR: Variable %s does not exist in %s" % (varname, self.filename))
 
+    def _get_metadata(self, varnum, vartype="main"):
+        """
+        Returns the metadata dictionary of a variable from its sequential number.
+        """
 
-   
+        if vartype == "main":
+            variable, units = self._attemptVarAndUnitsMatch(self.na_dict['VNAME'][varnum])
+            return {'standard_name':variable,
+                    'units':units,
+                    '_FillValue':self.na_dict['VMISS'][varnum],
+                    'scale_factor':self.na_dict['VSCAL'][varnum]}
+        variable, units = self._attemptVarAndUnitsMatch(self.na_dict['XNAME'][varnum])
+        return {'standard_name':variable,
+                'units':units,
+                '_FillValue':None,
+                'scale_factor':None}
 
+    def _get_column(self, varname):
+        """
+        Returns the column of a variable in the records of the data section, and its
+        metadata. Main variables are searched first, then the independant variable.
+        """
+
+        if isinstance(varname, int):
+            return self.na_dict['NIV'] + varname, self._get_metadata(varname, "main")
+        main_names = self.get_variable_list(vartype="main")
+        if varname in main_names:
+            varnum = main_names.index(varname)
+            return self.na_dict['NIV'] + varnum, self._get_metadata(varnum, "main")
+        independant_names = self.get_variable_list(vartype="independant")
+        if varname in independant_names:
+            varnum = independant_names.index(varname)
+            return varnum, self._get_metadata(varnum, "independant")
+        logging.error('egads - nasa_ames_io_2.py - NasaAmes - _get_column - KeyError, no variable called ' +
+                      str(varname))
+        raise KeyError("ERROR: Variable %s does not exist in %s" % (varname, self.filename))
 
+    def _iter_blocks(self, chunk=None):
+        """
+        Generator returning the lines of the data section in blocks of about chunk
+        bytes. The position in the file is restored before each block, so that
+        several generators can be used at the same time.
+        """
 
+        if self.f is None:
+            logging.error('egads - nasa_ames_io_2.py - NasaAmes - _iter_blocks - AttributeError, no file open')
+            raise AttributeError('No file open')
+        if chunk is None:
+            chunk = DATA_CHUNK_BYTES
+        position = self._data_offset
+        while True:
+            self.f.seek(position)
+            lines = self.f.readlines(chunk)
+            if not lines:
+                return
+            position = self.f.tell()
+            yield lines
 
+    def _iter_records(self, columns, input_range=None, chunk=None):
+        """
+        Generator parsing the data section block by block and returning, for each
+        block, a 2-D array with the requested columns of the records in input_range.
+        """
 
+        record_length = self.na_dict['NIV'] + self.na_dict['NV']
+        start, end = 0, None
+        if input_range is not None:
+            start, end, _ = slice(*input_range).indices(self._get_row_count())
+        row = 0
+        remainder = numpy.empty(0)
+        for lines in self._iter_blocks(chunk):
+            if end is not None and row >= end:
+                return
+            values = numpy.array(_split_lines(lines), dtype=numpy.float64)
+            if remainder.size:
+                values = numpy.concatenate((remainder, values))
+            nrecords = len(values) // record_length
+            records = values[:nrecords * record_length].reshape(nrecords, record_length)
+            remainder = values[nrecords * record_length:]
+            first = max(start - row, 0)
+            last = nrecords if end is None else min(end - row, nrecords)
+            if first < last:
+                yield records[first:last, columns]
+            row += nrecords
+        if remainder.size:
+            logging.error('egads - nasa_ames_io_2.py - NasaAmes - _iter_records - Exception, incomplete record at the '
+                          'end of the file')
+            raise Exception("ERROR: The last record of %s is incomplete" % self.filename)
 
+    def _get_row_count(self):
+        """
+        Returns the number of records in the data section, counted once.
+        """
 
+        if self._row_count is None:
+            record_length = self.na_dict['NIV'] + self.na_dict['NV']
+            self._row_count = sum(len(_split_lines(lines)) for lines in self._iter_blocks()) // record_length
+        return self._row_count
 
     def na_format_information(self):
         string = ("The goal of the 'na_format_information' function is to give few information\n"
@@ -232,7 +490,7 @@ class NasaAmes(FileCore):
         (var_name, units). Otherwise returns (item, None).
         """
         
-        match = re.compile("^\s*(.*)\((.+?)\)(.*)\s*$").match(item)
+        match = _var_and_units_pattern.match(item)
         if match:
             (v1, units, v2) = match.groups()
             var_name = v1 + " " + v2
@@ -241,6 +499,41 @@ class NasaAmes(FileCore):
         return (var_name.strip(), units)
     
     
-    logging.info('egads - nasa_ames_io.py - NasaAmes has been loaded')
+    logging.info('egads - nasa_ames_io_2.py - NasaAmes has been loaded')
+        
         
-        
\ No newline at end of file
+
+def _strip_line(line):
+    """
+    Returns a line of the header without its curly braces annotation and
+    surrounding whitespaces.
+    """
+
+    match = _curly_braces_pattern.match(line)
+    if match:
+        line = match.groups()[0]
+    return line.strip()
+
+
+def _read_values(readline, nvalues):
+    """
+    Reads lines with the readline function until nvalues floats are read.
+    """
+
+    values = []
+    while len(values) < nvalues:
+        values.extend(float(value) for value in readline().split())
+    if len(values) != nvalues:
+        logging.error('egads - nasa_ames_io_2.py - _read_values - Exception, ' + str(len(values)) + ' values found instead of ' +
+                      str(nvalues))
+        raise Exception("ERROR: %s values found in the header instead of %s" % (len(values), nvalues))
+    return values
+
+
+def _split_lines(lines):
+    """
+    Returns the list of the items of a list of data lines, ignoring curly braces
+    annotations.
+    """
+
+    return ' '.join(_strip_line(line) if '{' in line else line for line in lines).split()
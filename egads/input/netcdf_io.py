@@ -1,15 +1,21 @@
 __author__ = "mfreer, ohenry"
 __date__ = "2016-12-6 15:47"
 __version__ = "1.11"
-__all__ = ["NetCdf", "EgadsNetCdf"]
+__all__ = ["NetCdf", "EgadsNetCdf", "EgadsVariableProxy", "EgadsNetCdfStream", "EgadsNetCdfDataset",
+           "EgadsDatasetVariable"]
 
 import logging
 import netCDF4
+import numpy
 import egads
 import datetime
 import operator
+import collections
 import os
+import time
+from fractions import gcd
 from egads.input import FileCore
+from egads.input import get_file_list
 
 class NetCdf(FileCore):
     """
@@ -49,6 +55,16 @@ class NetCdf(FileCore):
         logging.debug('egads - netcdf_io.py - NetCdf - open - filename ' + str(filename) + ', perms ' + str(perms))
         FileCore.open(self, filename, perms)
 
+    def close(self):
+        """
+        Close opened file and clear cached attributes.
+        """
+        
+        logging.debug('egads - netcdf_io.py - NetCdf - close - filename ' + str(self.filename))
+        self._attribute_cache = {}
+        self._time_index = {}
+        FileCore.close(self)
+
     def get_attribute_list(self, varname=None):
         """
         Returns a dictionary of attributes and values found in current NetCDF file
@@ -115,7 +131,7 @@ class NetCdf(FileCore):
             logging.exception('egads - netcdf_io.py - NetCdf - get_perms - AttributeError, no file open')
             raise AttributeError('No file open')
 
-    def read_variable(self, varname, input_range=None):
+    def read_variable(self, varname, input_range=None, time_range=None):
         """
         Reads a variable from currently opened NetCDF file.
         
@@ -123,9 +139,15 @@ class NetCdf(FileCore):
             Name of NetCDF variable to read in.
         :param vector input_range:
             Optional - Range of values in each dimension to input. TODO add example
+        :param tuple time_range:
+            Optional - Start and end times of the window to read, included, along the
+            first dimension of the variable. Times are datetime objects or values in
+            the units of the coordinate variable of that dimension. Ignored if
+            input_range is provided.
         """
         
-        logging.debug('egads - netcdf_io.py - NetCdf - read_variable - varname ' + str(varname) + ', input_range ' + str(input_range))
+        logging.debug('egads - netcdf_io.py - NetCdf - read_variable - varname ' + str(varname) + ', input_range ' + 
+                      str(input_range) + ', time_range ' + str(time_range))
         try:
             varin = self.f.variables[varname]
         except KeyError:
@@ -134,15 +156,57 @@ class NetCdf(FileCore):
         except Exception:
             logging.exception('egads - netcdf_io.py - NetCdf - read_variable - Exception, unexpected error')
             raise Exception("Error: Unexpected error")
-        if input_range is None:
-            value = varin[:]
+        if input_range is not None:
+            value = varin[_get_slices(input_range)]
+        elif time_range is not None:
+            value = varin[self._time_slice(varin.dimensions[0], time_range)]
         else:
-            obj = 'slice(input_range[0], input_range[1])'
-            for i in xrange(2, len(input_range), 2):
-                obj = obj + ', slice(input_range[%i], input_range[%i])' % (i, i + 1)
-            value = varin[eval(obj)]
+            value = varin[:]
         logging.debug('egads - netcdf_io.py - NetCdf - read_variable - varname ' + str(varname) + ' -> data read OK')
         return value
+
+    def read_variables(self, varnames, input_range=None):
+        """
+        Reads several variables from currently opened NetCDF file and returns
+        them as a list, in the order of varnames.
+        
+        :param list varnames:
+            Names of NetCDF variables to read in.
+        :param vector input_range:
+            Optional - Range of values in each dimension to input, applied to all
+            variables.
+        """
+        
+        logging.debug('egads - netcdf_io.py - NetCdf - read_variables - varnames ' + str(varnames) + 
+                      ', input_range ' + str(input_range))
+        return [self.read_variable(varname, input_range) for varname in varnames]
+
+    def iter_variable(self, varname, chunk=None, dim=None):
+        """
+        Generator reading one or several variables from currently opened NetCDF
+        file chunk by chunk along a dimension. Chunk boundaries are aligned to the
+        storage chunks of the variables in the file.
+
+        :param string|list varname:
+            Name of NetCDF variable to read in, or list of names of variables sharing
+            the dimension dim. In that case, a list of aligned chunks is returned at
+            each iteration.
+        :param int chunk:
+            Optional - Number of values along dim in each chunk. The value is rounded
+            up to a common multiple of the storage chunk lengths of the variables. By default, the chunk length
+            is set to read about one million values at each iteration.
+        :param string dim:
+            Optional - Name of the dimension along which chunks are read. Default is
+            the first dimension of the (first) variable.
+        """
+
+        logging.debug('egads - netcdf_io.py - NetCdf - iter_variable - varname ' + str(varname) + 
+                      ', chunk ' + str(chunk) + ', dim ' + str(dim))
+        for values in self._iter_chunks(varname, chunk, dim):
+            if isinstance(varname, basestring):
+                yield values[0]
+            else:
+                yield values
     
     def change_variable_name(self, varname, newname):
         """
@@ -157,11 +221,16 @@ class NetCdf(FileCore):
         logging.debug('egads - netcdf_io.py - NetCdf - change_variable_name - varname ' + str(varname) + ', newname ' + str(newname))
         if self.f is not None:
             self.f.renameVariable(varname, newname)
+            self._attribute_cache.pop(varname, None)
+            self._attribute_cache.pop(newname, None)
+            self._time_index.pop(varname, None)
+            self._time_index.pop(newname, None)
         else:
             logging.error('egads - netcdf_io.py - NetCdf - .change_variable_name - AttributeError, no file open')
             raise AttributeError('No file open')
 
-    def write_variable(self, value, varname, dims=None, ftype='double', fillvalue=None):
+    def write_variable(self, value, varname, dims=None, ftype='double', fillvalue=None, zlib=None, 
+                       complevel=None, shuffle=None, chunksizes=None, least_significant_digit=None):
         """
         Writes/creates variable in currently opened NetCDF file.
 
@@ -178,39 +247,91 @@ class NetCdf(FileCore):
             ``short``, ``char``, and ``byte``
         :param float fill_value:
             Optional - Overrides default NetCDF _FillValue, if provided.
+        :param bool zlib:
+            Optional - If True, data are compressed with zlib. If not provided, the
+            storage options of the file are used (see :meth:`set_storage_options`).
+        :param int complevel:
+            Optional - Compression level, from 1 (fastest) to 9 (smallest).
+        :param bool shuffle:
+            Optional - If True, the HDF5 shuffle filter is applied before compression.
+        :param tuple chunksizes:
+            Optional - Length of storage chunks along each dimension. By default, chunks
+            span the whole variable along all dimensions but the first, or the chunk
+            length given to :meth:`add_dim`, and hold about 65536 values.
+        :param int least_significant_digit:
+            Optional - Power of ten of the smallest decimal place which has to be
+            retained in data (lossy compression).
         """
 
         logging.debug('egads - netcdf_io.py - NetCdf - write_variable - varname ' + str(varname) + 
                       ', dims ' + str(dims) + ', ftype ' + str(ftype) + ', fillvalue ' + str(fillvalue))
         if self.f is not None:
-            try:
-                varout = self.f.createVariable(varname, self.TYPE_DICT[ftype], dims, fill_value = fillvalue)
-            except KeyError:
-                varout = self.f.createVariable(varname, ftype, dims, fillvalue)
+            varout = self._create_variable(varname, self.TYPE_DICT.get(ftype, ftype), dims, fillvalue,
+                                           {'zlib': zlib, 'complevel': complevel, 'shuffle': shuffle,
+                                            'chunksizes': chunksizes,
+                                            'least_significant_digit': least_significant_digit})
             varout[:] = value
+            self._time_index.pop(varname, None)
         else:
             logging.error('egads - netcdf_io.py - NetCdf - change_variable_name - AttributeError, no file open')
             raise AttributeError('No file open')
         logging.debug('egads - netcdf_io.py - NetCdf - write_variable - varname ' + str(varname) + ' -> data write OK')
 
-    def add_dim(self, name, size):
+    def add_dim(self, name, size, chunk_length=None):
         """
         Adds dimension to currently open file.
 
         :param string name:
             Name of dimension to add
         :param integer size:
-            Integer size of dimension to add.
+            Integer size of dimension to add. None for an unlimited dimension.
+        :param integer chunk_length:
+            Optional - Length of the storage chunks along this dimension for the
+            variables written afterwards, if they don't set their own chunk sizes.
         """
 
-        logging.debug('egads - netcdf_io.py - NetCdf - add_dim - name ' + str(name) + ', size ' + str(size))
+        logging.debug('egads - netcdf_io.py - NetCdf - add_dim - name ' + str(name) + ', size ' + str(size) + 
+                      ', chunk_length ' + str(chunk_length))
         if self.f is not None:
             self.f.createDimension(name, size)
+            if chunk_length is not None:
+                self._dim_chunks[name] = chunk_length
         else:
             logging.error('egads - netcdf_io.py - NetCdf - change_variable_name - AttributeError, no file open')
             raise AttributeError('No file open')
         logging.debug('egads - netcdf_io.py - NetCdf - add_dim - name ' + str(name) + ' -> dim add OK')
 
+    def set_storage_options(self, zlib=None, complevel=None, shuffle=None, least_significant_digit=None):
+        """
+        Sets the compression options used by default for the variables written
+        afterwards in currently open file. By default, variables are not compressed;
+        if zlib is enabled, the compression level is 1 with the shuffle filter unless
+        specified otherwise. Options are ignored for NetCDF3 files.
+
+        :param bool zlib:
+            Optional - If True, data are compressed with zlib.
+        :param int complevel:
+            Optional - Compression level, from 1 (fastest) to 9 (smallest).
+        :param bool shuffle:
+            Optional - If True, the HDF5 shuffle filter is applied before compression.
+        :param int least_significant_digit:
+            Optional - Power of ten of the smallest decimal place which has to be
+            retained in data (lossy compression).
+        """
+
+        logging.debug('egads - netcdf_io.py - NetCdf - set_storage_options - zlib ' + str(zlib) + 
+                      ', complevel ' + str(complevel) + ', shuffle ' + str(shuffle) + 
+                      ', least_significant_digit ' + str(least_significant_digit))
+        if self.f is not None:
+            options = {'zlib': zlib, 'complevel': complevel, 'shuffle': shuffle,
+                       'least_significant_digit': least_significant_digit}
+            for key, value in options.iteritems():
+                if value is not None:
+                    self._storage_options[key] = value
+        else:
+            logging.error('egads - netcdf_io.py - NetCdf - set_storage_options - AttributeError, no file open')
+            raise AttributeError('No file open')
+
     def add_attribute(self, attrname, value, varname=None):
         """
         Adds attribute to currently open file. If varname is included, attribute
@@ -234,6 +355,8 @@ class NetCdf(FileCore):
                 setattr(varin, attrname, value)
             else:
                 setattr(self.f, attrname, value)
+            self._attribute_cache.pop(varname, None)
+            self._time_index.pop(varname, None)
         else:
             logging.error('egads - netcdf_io.py - NetCdf - change_variable_name - AttributeError, no file open')
             raise AttributeError('No file open')
@@ -259,6 +382,8 @@ class NetCdf(FileCore):
                 delattr(self.f.variables[varname], attrname)
             else:
                 delattr(self.f, attrname)
+            self._attribute_cache.pop(varname, None)
+            self._time_index.pop(varname, None)
         else:
             logging.error('egads - netcdf_io.py - NetCdf - delete_attribute - AttributeError, no file open')
             raise AttributeError('No file open')
@@ -342,12 +467,13 @@ class NetCdf(FileCore):
                     logging.exception('egads - netcdf_io.py - NetCdf - the actual convert_to_nasa_ames cant process data of multiple '
                                 + 'dimensions, FFI is set to 1001')
                 vvar = {}
-                value = self.read_variable(var).tolist()
+                value = self.read_variable(var)
                 attr_dict = {}
                 all_attr = self.get_attribute_list(var)
-                for index, item in enumerate(value):
-                    if item == None:
-                        value[index] = all_attr['_FillValue']
+                if numpy.ma.is_masked(value):
+                    value = numpy.ma.filled(value, all_attr['_FillValue'])
+                else:
+                    value = numpy.ma.getdata(value)
                 for attr in all_attr:
                     attr_dict[attr] = self.get_attribute_value(attr, var)
                 vvar[var] = [value, dims.keys()[0], attr_dict]
@@ -359,7 +485,7 @@ class NetCdf(FileCore):
         for key, _ in var_dims.iteritems():
             ivar = {}
             try:
-                var = self.read_variable(key).tolist()
+                var = numpy.ma.getdata(self.read_variable(key))
                 attr_dict = {}
                 all_attr = self.get_attribute_list(key)
                 for attr in all_attr:
@@ -549,6 +675,10 @@ class NetCdf(FileCore):
             self.f = netCDF4.Dataset(filename, perms)  # @UndefinedVariable
             self.filename = filename
             self.perms = perms
+            self._attribute_cache = {}
+            self._storage_options = dict(STORAGE_OPTIONS)
+            self._dim_chunks = {}
+            self._time_index = {}
         except RuntimeError:
             logging.exception('egads - netcdf_io.py - NetCdf - _open_file - RuntimeError, File '+
                            str(filename) + ' doesn''t exist')
@@ -561,31 +691,139 @@ class NetCdf(FileCore):
             logging.exception('egads - netcdf_io.py - NetCdf - _open_file - Exception, Unexpected error')
             raise Exception("ERROR: Unexpected error")
 
+    def _iter_chunks(self, varname, chunk, dim):
+        """
+        Private generator returning, at each iteration, the list of aligned chunks
+        of the variables listed in varname.
+        """
+
+        if isinstance(varname, basestring):
+            varname = [varname]
+        variables = []
+        for name in varname:
+            try:
+                variables.append(self.f.variables[name])
+            except KeyError:
+                logging.exception('egads - netcdf_io.py - NetCdf - _iter_chunks - KeyError, variable does not exist in netcdf file')
+                raise KeyError("ERROR: Variable %s does not exist in %s" % (name, self.filename))
+        if dim is None:
+            if not variables[0].dimensions:
+                logging.error('egads - netcdf_io.py - NetCdf - _iter_chunks - ValueError, variable ' + 
+                              variables[0].name + ' is a scalar')
+                raise ValueError("ERROR: Variable %s is a scalar and can't be read by chunks" % variables[0].name)
+            dim = variables[0].dimensions[0]
+        axes = []
+        for varin in variables:
+            if dim not in varin.dimensions:
+                logging.error('egads - netcdf_io.py - NetCdf - _iter_chunks - ValueError, variable ' + varin.name + 
+                              ' does not depend on dimension ' + str(dim))
+                raise ValueError("ERROR: Variable %s does not depend on dimension %s" % (varin.name, dim))
+            axes.append(varin.dimensions.index(dim))
+        length = len(self.f.dimensions[dim])
+        alignment = 1
+        for varin, axis in zip(variables, axes):
+            storage = _storage_chunk_length(varin, axis)
+            alignment = alignment * storage // gcd(alignment, storage)
+        if chunk is None:
+            chunk = _chunk_length(variables[0], axes[0], CHUNK_VALUES)
+        chunk = -(-chunk // alignment) * alignment
+        for start in xrange(0, length, chunk):
+            values = []
+            for varin, axis in zip(variables, axes):
+                index = [slice(None)] * varin.ndim
+                index[axis] = slice(start, start + chunk)
+                values.append(varin[tuple(index)])
+            yield values
+
+    def _create_variable(self, varname, datatype, dims, fillvalue, storage_options):
+        """
+        Private method for creating a variable, with the compression and chunking
+        options of the file overridden by the options which are not None in
+        storage_options. Scalar variables are neither chunked nor compressed.
+        """
+
+        if not dims:
+            return self.f.createVariable(varname, datatype, dims, fill_value=fillvalue)
+        options = dict(self._storage_options)
+        for key, value in storage_options.iteritems():
+            if value is not None:
+                options[key] = value
+        if options.get('chunksizes') is None:
+            options['chunksizes'] = self._default_chunk_sizes(dims)
+        logging.debug('egads - netcdf_io.py - NetCdf - _create_variable - varname ' + str(varname) + 
+                      ', options ' + str(options))
+        return self.f.createVariable(varname, datatype, dims, fill_value=fillvalue, **options)
+
+    def _default_chunk_sizes(self, dims):
+        """
+        Private method returning default chunk sizes for time series: chunks span
+        all dimensions but the first and hold about STORAGE_CHUNK_VALUES values,
+        unless a chunk length has been given for a dimension in add_dim.
+        """
+
+        if isinstance(dims, basestring):
+            dims = (dims,)
+        dimobjs = [self.f.dimensions[dim] for dim in dims]
+        sizes = [self._dim_chunks.get(dim, max(1, len(dimobj))) for dim, dimobj in zip(dims, dimobjs)]
+        if dims[0] not in self._dim_chunks:
+            sizes[0] = max(1, STORAGE_CHUNK_VALUES // reduce(operator.mul, sizes[1:], 1))
+        for i, dimobj in enumerate(dimobjs):
+            if not dimobj.isunlimited():
+                sizes[i] = min(sizes[i], len(dimobj))
+        return sizes
+
+    def _time_slice(self, dim, time_range):
+        """
+        Private method translating a time window into the slice of records of
+        the dimension dim which lie in the window. The values of the coordinate
+        variable of dim are read once while the file is open and searched with
+        a binary search.
+        """
+
+        try:
+            times, units, calendar = self._time_index[dim]
+        except KeyError:
+            try:
+                timevar = self.f.variables[dim]
+            except KeyError:
+                logging.error('egads - netcdf_io.py - NetCdf - _time_slice - KeyError, no coordinate variable ' + 
+                              'for dimension ' + str(dim))
+                raise KeyError("ERROR: No coordinate variable for dimension %s in %s" % (dim, self.filename))
+            times = numpy.asarray(timevar[:], dtype='float64')
+            units = getattr(timevar, 'units', '')
+            calendar = getattr(timevar, 'calendar', 'standard')
+            self._time_index[dim] = (times, units, calendar)
+        start, end = [_time_value(t, units, calendar) for t in time_range]
+        logging.debug('egads - netcdf_io.py - NetCdf - _time_slice - dim ' + str(dim) + ', start ' + str(start) + 
+                      ', end ' + str(end))
+        return slice(numpy.searchsorted(times, start, 'left'), numpy.searchsorted(times, end, 'right'))
+
     def _get_attribute_list(self, var=None):
         """
         Private method for getting attributes from a NetCDF file. Gets global
         attributes if no variable name is provided, otherwise gets attributes
         attached to specified variable. Function returns dictionary of values.
-        If multiple white spaces exist, they are removed.
+        If multiple white spaces exist, they are removed. Attributes are cached
+        while the file is open, and a copy of the cached dictionary is returned.
         """
         
         logging.debug('egads - netcdf_io.py - NetCdf - _get_attribute_list - var ' + str(var))
         if self.f is not None:
+            try:
+                return dict(self._attribute_cache[var])
+            except KeyError:
+                pass
             if var is not None:
-                attr_dict = {}
-                varin = self.f.variables[var]
-                for key, value in varin.__dict__.iteritems():
-                    if isinstance(value, basestring):
-                        value = " ".join(value.split())
-                    attr_dict[key] = value
-                return attr_dict
+                attrs = self.f.variables[var].__dict__
             else:
-                attr_dict = {}
-                for key, value in self.f.__dict__.iteritems():
-                    if isinstance(value, basestring):
-                        value = " ".join(value.split())
-                    attr_dict[key] = value
-                return attr_dict
+                attrs = self.f.__dict__
+            attr_dict = {}
+            for key, value in attrs.iteritems():
+                if isinstance(value, basestring):
+                    value = " ".join(value.split())
+                attr_dict[key] = value
+            self._attribute_cache[var] = attr_dict
+            return dict(attr_dict)
         else:
             logging.error('egads - netcdf_io.py - NetCdf - _get_attribute_list - AttributeError, No file open')
             raise AttributeError('No file open')
@@ -655,7 +893,7 @@ class EgadsNetCdf(NetCdf):
         self.file_metadata = None
         FileCore.__init__(self, filename, perms)
 
-    def read_variable(self, varname, input_range=None):
+    def read_variable(self, varname, input_range=None, lazy=False, time_range=None):
         """
         Reads in a variable from currently opened NetCDF file and maps the NetCDF
         attributies to an :class:`~egads.core.EgadsData` instance.
@@ -665,10 +903,19 @@ class EgadsNetCdf(NetCdf):
 
         :param vector input_range:
             Optional - Range of values in each dimension to input.
+        :param bool lazy:
+            Optional - If set to true, no data is read and an :class:`EgadsVariableProxy`
+            is returned instead, which reads from the file only the values which are
+            accessed. Ignored if input_range or time_range is provided. Default - False.
+        :param tuple time_range:
+            Optional - Start and end times of the window to read, included, along the
+            first dimension of the variable. Times are datetime objects or values in
+            the units of the coordinate variable of that dimension. Only the records
+            of the window are read. Ignored if input_range is provided.
         """
         
         logging.debug('egads - netcdf_io.py - EgadsNetCdf - read_variable - varname ' + str(varname) + 
-                      ', input_range ' + str(input_range))
+                      ', input_range ' + str(input_range) + ', lazy ' + str(lazy) + ', time_range ' + str(time_range))
         try:
             varin = self.f.variables[varname]
         except KeyError:
@@ -677,21 +924,81 @@ class EgadsNetCdf(NetCdf):
         except Exception:
             logging.exception('egads - netcdf_io.py - EgadsNetCdf - read_variable - Exception, unexpected error')
             raise Exception("Error: Unexpected error")
-        if input_range is None:
-            value = varin[:]
-        else:
-            obj = 'slice(input_range[0], input_range[1])'
-            for i in xrange(2, len(input_range), 2):
-                obj = obj + ', slice(input_range[%i], input_range[%i])' % (i, i + 1)
-            value = varin[eval(obj)]
         variable_attrs = self.get_attribute_list(varname)
         variable_attrs['cdf_name'] = varname
         variable_metadata = egads.core.metadata.VariableMetadata(variable_attrs, self.file_metadata)
+        if lazy and input_range is None and time_range is None:
+            logging.debug('egads - netcdf_io.py - EgadsNetCdf - read_variable - varname ' + str(varname) + ' -> proxy OK')
+            return EgadsVariableProxy(varin, variable_metadata)
+        if input_range is not None:
+            value = varin[_get_slices(input_range)]
+        elif time_range is not None:
+            value = varin[self._time_slice(varin.dimensions[0], time_range)]
+        else:
+            value = varin[:]
         data = egads.EgadsData(value, variable_metadata=variable_metadata)
         logging.debug('egads - netcdf_io.py - EgadsNetCdf - read_variable - varname ' + str(varname) + ' -> data read OK')
         return data
 
-    def write_variable(self, data, varname=None, dims=None, ftype='double'):
+    def read_variables(self, varnames, input_range=None):
+        """
+        Reads several variables from currently opened NetCDF file and returns
+        them as a list of :class:`~egads.core.EgadsData` instances, in the order of
+        varnames. Variable attributes are taken from the attribute cache of the
+        file and all variables share the same file metadata.
+
+        :param list varnames:
+            Names of NetCDF variables to read in.
+        :param vector input_range:
+            Optional - Range of values in each dimension to input, applied to all
+            variables.
+        """
+        
+        logging.debug('egads - netcdf_io.py - EgadsNetCdf - read_variables - varnames ' + str(varnames) + 
+                      ', input_range ' + str(input_range))
+        return [self.read_variable(varname, input_range) for varname in varnames]
+
+    def iter_variable(self, varname, chunk=None, dim=None):
+        """
+        Generator reading one or several variables from currently opened NetCDF
+        file chunk by chunk along a dimension, and mapping the NetCDF attributes
+        to :class:`~egads.core.EgadsData` instances. Chunk boundaries are aligned
+        to the storage chunks of the variables in the file.
+
+        :param string|list varname:
+            Name of NetCDF variable to read in, or list of names of variables sharing
+            the dimension dim. In that case, a list of aligned chunks is returned at
+            each iteration.
+        :param int chunk:
+            Optional - Number of values along dim in each chunk. The value is rounded
+            up to a common multiple of the storage chunk lengths of the variables. By default, the chunk length
+            is set to read about one million values at each iteration.
+        :param string dim:
+            Optional - Name of the dimension along which chunks are read. Default is
+            the first dimension of the (first) variable.
+        """
+
+        logging.debug('egads - netcdf_io.py - EgadsNetCdf - iter_variable - varname ' + str(varname) + 
+                      ', chunk ' + str(chunk) + ', dim ' + str(dim))
+        if isinstance(varname, basestring):
+            names = [varname]
+        else:
+            names = varname
+        variable_attrs = []
+        for name in names:
+            attrs = self.get_attribute_list(name)
+            attrs['cdf_name'] = name
+            variable_attrs.append(attrs)
+        for values in self._iter_chunks(names, chunk, dim):
+            data = [egads.EgadsData(value, variable_metadata=egads.core.metadata.VariableMetadata(attrs, self.file_metadata))
+                    for value, attrs in zip(values, variable_attrs)]
+            if isinstance(varname, basestring):
+                yield data[0]
+            else:
+                yield data
+
+    def write_variable(self, data, varname=None, dims=None, ftype='double', zlib=None, complevel=None, 
+                       shuffle=None, chunksizes=None, least_significant_digit=None):
         """
         Writes/creates variable in currently opened NetCDF file.
 
@@ -709,6 +1016,20 @@ class EgadsNetCdf(NetCdf):
             Optional - Data type of variable to write. Defaults to ``double``. If variable exists,
             data type remains unchanged. Options for type are ``double``, ``float``, ``int``, 
             ``short``, ``char``, and ``byte``
+        :param bool zlib:
+            Optional - If True, data are compressed with zlib. If not provided, the
+            storage options of the file are used (see :meth:`set_storage_options`).
+        :param int complevel:
+            Optional - Compression level, from 1 (fastest) to 9 (smallest).
+        :param bool shuffle:
+            Optional - If True, the HDF5 shuffle filter is applied before compression.
+        :param tuple chunksizes:
+            Optional - Length of storage chunks along each dimension. By default, chunks
+            span the whole variable along all dimensions but the first, or the chunk
+            length given to :meth:`add_dim`, and hold about 65536 values.
+        :param int least_significant_digit:
+            Optional - Power of ten of the smallest decimal place which has to be
+            retained in data (lossy compression).
         """
 
         logging.debug('egads - netcdf_io.py - EgadsNetCdf - write_variable - varname ' + str(varname) + 
@@ -724,12 +1045,17 @@ class EgadsNetCdf(NetCdf):
                         fillvalue = data.metadata['missing_value']
                     except KeyError:
                         fillvalue = None
-                varout = self.f.createVariable(varname, self.TYPE_DICT[ftype.lower()], dims, fill_value=fillvalue)
+                varout = self._create_variable(varname, self.TYPE_DICT[ftype.lower()], dims, fillvalue,
+                                               {'zlib': zlib, 'complevel': complevel, 'shuffle': shuffle,
+                                                'chunksizes': chunksizes,
+                                                'least_significant_digit': least_significant_digit})
             varout[:] = data.value
             for key, val in data.metadata.iteritems():
                 if key != '_FillValue':
                     if val:
                         setattr(varout, str(key), val)
+            self._attribute_cache.pop(varname, None)
+            self._time_index.pop(varname, None)
         logging.debug('egads - netcdf_io.py - EgadsNetCdf - write_variable - varname ' + str(varname) + ' -> data write OK')
         
     def convert_to_nasa_ames(self, na_file=None, requested_ffi=1001, float_format='%g', 
@@ -806,7 +1132,7 @@ class EgadsNetCdf(NetCdf):
                     logging.exception('egads - netcdf_io.py - EgadsNetCdf - the actual convert_to_nasa_ames cant process data of multiple '
                                 + 'dimensions, FFI is set to 1001')
                 vvar = {}
-                value = self.read_variable(var).value.tolist()
+                value = self.read_variable(var).value
                 attr_dict = {}
                 all_attr = self.get_attribute_list(var)
                 for attr in all_attr:
@@ -820,7 +1146,7 @@ class EgadsNetCdf(NetCdf):
         for key, _ in var_dims.iteritems():
             ivar = {}
             try:
-                var = self.read_variable(key).value.tolist()
+                var = self.read_variable(key).value
                 attr_dict = {}
                 all_attr = self.get_attribute_list(key)
                 for attr in all_attr:
@@ -1009,6 +1335,10 @@ class EgadsNetCdf(NetCdf):
             self.f = netCDF4.Dataset(filename, perms)  # @UndefinedVariable
             self.filename = filename
             self.perms = perms
+            self._attribute_cache = {}
+            self._storage_options = dict(STORAGE_OPTIONS)
+            self._dim_chunks = {}
+            self._time_index = {}
             attr_dict = self.get_attribute_list()
             self.file_metadata = egads.core.metadata.FileMetadata(attr_dict, self.filename)
         except RuntimeError:
@@ -1025,3 +1355,651 @@ class EgadsNetCdf(NetCdf):
         
     logging.info('egads - netcdf_io.py - EgadsNetCdf has been loaded')
 
+
+CHUNK_VALUES = 2 ** 20
+STORAGE_CHUNK_VALUES = 2 ** 16
+STORAGE_OPTIONS = {'zlib': False,
+                   'complevel': 1,
+                   'shuffle': True,
+                   'least_significant_digit': None}
+
+
+def _get_slices(input_range):
+    """
+    Converts an input range (start and end indices for each dimension) to a
+    tuple of slices.
+    """
+
+    return tuple(slice(input_range[i], input_range[i + 1]) for i in xrange(0, len(input_range), 2))
+
+
+def _storage_chunk_length(varin, axis):
+    """
+    Returns the length of the storage chunks of a NetCDF variable along one axis,
+    1 if the variable is contiguous.
+    """
+
+    chunking = varin.chunking()
+    if isinstance(chunking, list) and chunking[axis] > 0:
+        return chunking[axis]
+    return 1
+
+
+def _chunk_length(varin, axis, values):
+    """
+    Returns the chunk length along axis needed to read about the requested
+    number of values of a NetCDF variable, aligned to its storage chunks.
+    """
+
+    row_size = max(1, varin.size // max(1, varin.shape[axis]))
+    storage = _storage_chunk_length(varin, axis)
+    return max(1, values // row_size // storage) * storage
+
+
+def _combine_masked(combine, a, b):
+    """
+    Combines two partial results of a reduction with a binary function, keeping
+    the value of one operand where the other one is masked.
+    """
+
+    mask_a = numpy.ma.getmask(a)
+    mask_b = numpy.ma.getmask(b)
+    if mask_a is numpy.ma.nomask and mask_b is numpy.ma.nomask:
+        return combine(a, b)
+    mask_a = numpy.ma.getmaskarray(a)
+    mask_b = numpy.ma.getmaskarray(b)
+    result = numpy.ma.where(mask_a, b, numpy.ma.where(mask_b, a, combine(a, b)))
+    return numpy.ma.array(result, mask=mask_a & mask_b)
+
+
+class EgadsVariableProxy(object):
+    """
+    Lazy proxy on a variable of an open NetCDF file, returned by
+    :meth:`EgadsNetCdf.read_variable` in lazy mode. The proxy carries the variable
+    metadata and units, but values are read from the file only when they are
+    accessed, and only for the slice which is accessed. Reductions are computed
+    block by block along the first dimension, so that the whole variable is
+    never held in memory.
+    """
+
+    BLOCK_SIZE = CHUNK_VALUES
+
+    def __init__(self, varin, variable_metadata):
+        """
+        Initializes EgadsVariableProxy instance.
+
+        :param Variable varin:
+            NetCDF4 variable object.
+        :param VariableMetadata variable_metadata:
+            Metadata of the variable.
+        """
+
+        logging.debug('egads - netcdf_io.py - EgadsVariableProxy - __init__ - variable ' + str(varin.name))
+        self._varin = varin
+        self.metadata = variable_metadata
+
+    @property
+    def units(self):
+        return self.metadata.get('units', '')
+
+    @property
+    def shape(self):
+        return self._varin.shape
+
+    @property
+    def ndim(self):
+        return self._varin.ndim
+
+    @property
+    def size(self):
+        return self._varin.size
+
+    @property
+    def dtype(self):
+        return self._varin.dtype
+
+    @property
+    def value(self):
+        return self._varin[:]
+
+    def __len__(self):
+        return len(self._varin)
+
+    def __getitem__(self, key):
+        return self._egads_data(self._varin[key])
+
+    def __repr__(self):
+        return repr(['EgadsVariableProxy', self._varin.name, self.shape, self.units])
+
+    def read(self):
+        """
+        Reads all values of the variable and returns them as an EgadsData instance.
+        """
+
+        logging.debug('egads - netcdf_io.py - EgadsVariableProxy - read - variable ' + str(self._varin.name))
+        return self._egads_data(self._varin[:])
+
+    def min(self, axis=None):
+        """
+        Returns the minimum of the variable, computed block by block.
+        """
+
+        return self._egads_data(self._reduce(numpy.min, numpy.ma.minimum, axis))
+
+    def max(self, axis=None):
+        """
+        Returns the maximum of the variable, computed block by block.
+        """
+
+        return self._egads_data(self._reduce(numpy.max, numpy.ma.maximum, axis))
+
+    def sum(self, axis=None):
+        """
+        Returns the sum of the variable, computed block by block.
+        """
+
+        return self._egads_data(self._reduce(numpy.sum, numpy.ma.add, axis))
+
+    def mean(self, axis=None):
+        """
+        Returns the mean of the variable, computed block by block. Masked values
+        are not taken into account.
+        """
+
+        total = self._reduce(numpy.sum, numpy.ma.add, axis)
+        count = self._reduce(numpy.ma.count, numpy.add, axis)
+        count = numpy.ma.masked_equal(numpy.asarray(count, dtype='float64'), 0)
+        return self._egads_data(total / count)
+
+    def _egads_data(self, value):
+        fillvalue = self.metadata.get('_FillValue', self.metadata.get('missing_value'))
+        if fillvalue is not None and numpy.ma.is_masked(value):
+            value = numpy.ma.filled(value, fillvalue)
+        metadata = egads.core.metadata.VariableMetadata(self.metadata, self.metadata.parent)
+        return egads.EgadsData(value, variable_metadata=metadata)
+
+    def _blocks(self):
+        """
+        Generator returning the variable values block by block along the first
+        dimension. The length of the blocks is a multiple of the storage chunk
+        length of the first dimension.
+        """
+
+        if not self.ndim:
+            yield self._varin[...]
+            return
+        step = _chunk_length(self._varin, 0, self.BLOCK_SIZE)
+        for start in xrange(0, self.shape[0], step):
+            yield self._varin[start:start + step]
+
+    def _reduce(self, func, combine, axis):
+        """
+        Applies a reduction function on each block of the variable and combines
+        the partial results with the corresponding binary function. Blocks are cut
+        along the first dimension, thus partial results are concatenated when
+        reducing along another axis. Masked partial results, from blocks entirely
+        masked, are ignored when combining: the result is masked only where all
+        blocks are masked.
+        """
+
+        partials = [func(block, axis=axis) for block in self._blocks()]
+        if axis is not None and axis != 0 and self.ndim:
+            return numpy.ma.concatenate(partials, axis=0)
+        partials = [partial for partial in partials if partial is not numpy.ma.masked]
+        if not partials:
+            return numpy.ma.masked
+        return reduce(lambda a, b: _combine_masked(combine, a, b), partials)
+
+
+class EgadsNetCdfStream(object):
+    """
+    Streaming writer appending batches of :class:`~egads.core.EgadsData` records
+    to the variables of an open :class:`EgadsNetCdf` file, along an unlimited
+    dimension. Records are buffered and written in blocks aligned to the storage
+    chunks of the variables. Buffered records are flushed and the file is synced
+    to disk when a flush interval has elapsed, so that other processes can read
+    the file up to the last flush.
+    
+    The set of variables is fixed by the first batch: every batch has to provide
+    all of them with the same number of records.
+    """
+
+    def __init__(self, ncfile, dim='time', buffer_length=None, flush_interval=10.0):
+        """
+        Initializes EgadsNetCdfStream instance.
+
+        :param EgadsNetCdf ncfile:
+            EgadsNetCdf instance opened in write or append mode.
+        :param string dim:
+            Optional - Name of the unlimited dimension along which records are appended.
+            The dimension is created if it doesn't exist. Default - 'time'.
+        :param int buffer_length:
+            Optional - Number of records to buffer before writing them to the file. The
+            value is rounded up to a multiple of the storage chunk length of the variables.
+            By default, one storage chunk is buffered.
+        :param float flush_interval:
+            Optional - Maximum time in seconds between two flushes of the file. If None,
+            the file is flushed only by :meth:`flush` and :meth:`close`. Default - 10 s.
+        """
+
+        logging.debug('egads - netcdf_io.py - EgadsNetCdfStream - __init__ - dim ' + str(dim) + 
+                      ', buffer_length ' + str(buffer_length) + ', flush_interval ' + str(flush_interval))
+        if ncfile.f is None:
+            logging.error('egads - netcdf_io.py - EgadsNetCdfStream - __init__ - AttributeError, no file open')
+            raise AttributeError('No file open')
+        if dim not in ncfile.f.dimensions:
+            ncfile.add_dim(dim, None)
+        elif not ncfile.f.dimensions[dim].isunlimited():
+            logging.error('egads - netcdf_io.py - EgadsNetCdfStream - __init__ - ValueError, dimension ' + 
+                          str(dim) + ' is not unlimited')
+            raise ValueError("ERROR: Dimension %s is not unlimited" % dim)
+        self.ncfile = ncfile
+        self.dim = dim
+        self.buffer_length = buffer_length
+        self.flush_interval = flush_interval
+        self._start = len(ncfile.f.dimensions[dim])
+        self._names = None
+        self._buffers = {}
+        self._buffered = 0
+        self._alignment = 1
+        self._last_flush = time.time()
+
+    def append(self, records):
+        """
+        Appends a batch of records to the file.
+
+        :param dict records:
+            Dictionary of variable names and :class:`~egads.core.EgadsData` instances, 
+            or arrays, holding the new records along the first dimension. Variables
+            which don't exist in the file are created from the first batch, with the
+            metadata of the EgadsData instances.
+        """
+
+        if self._names is None:
+            self._init_variables(records)
+        elif set(records) != set(self._names):
+            logging.error('egads - netcdf_io.py - EgadsNetCdfStream - append - KeyError, variables ' + 
+                          str(sorted(records)) + ' dont match ' + str(sorted(self._names)))
+            raise KeyError("ERROR: Variables %s dont match %s" % (sorted(records), sorted(self._names)))
+        values = {}
+        for name in self._names:
+            value = numpy.asanyarray(getattr(records[name], 'value', records[name]))
+            if value.ndim == 0:
+                value = value.reshape(1)
+            values[name] = value
+        lengths = set(len(value) for value in values.itervalues())
+        if len(lengths) > 1:
+            logging.error('egads - netcdf_io.py - EgadsNetCdfStream - append - ValueError, number of records ' + 
+                          'differ between variables')
+            raise ValueError("ERROR: Number of records differ between variables")
+        for name in self._names:
+            self._buffers[name].append(values[name])
+        self._buffered += lengths.pop()
+        if self.flush_interval is not None and time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+        elif self._buffered >= self.buffer_length:
+            end = (self._start + self._buffered) // self._alignment * self._alignment
+            self._write(end - self._start)
+
+    def flush(self):
+        """
+        Writes all buffered records to the file and syncs the file to disk.
+        """
+
+        logging.debug('egads - netcdf_io.py - EgadsNetCdfStream - flush - records ' + str(self._buffered))
+        self._write(self._buffered)
+        self.ncfile.f.sync()
+        self._last_flush = time.time()
+
+    def close(self):
+        """
+        Flushes buffered records. The file itself is not closed.
+        """
+
+        logging.debug('egads - netcdf_io.py - EgadsNetCdfStream - close')
+        if self.ncfile.f is not None:
+            self.flush()
+
+    def _init_variables(self, records):
+        """
+        Creates the variables which don't exist in the file, and sets the alignment
+        and buffer length from their storage chunks.
+        """
+
+        f = self.ncfile.f
+        for name, data in records.iteritems():
+            if name not in f.variables:
+                value = numpy.asanyarray(getattr(data, 'value', data))
+                dims = (self.dim,) + tuple(self._trailing_dim(name, i, length) 
+                                           for i, length in enumerate(value.shape[1:]))
+                metadata = getattr(data, 'metadata', {})
+                fillvalue = metadata.get('_FillValue', metadata.get('missing_value'))
+                varout = self.ncfile._create_variable(name, value.dtype, dims, fillvalue, {})
+                for key, val in metadata.iteritems():
+                    if key != '_FillValue' and val:
+                        setattr(varout, str(key), val)
+                self.ncfile._attribute_cache.pop(name, None)
+            elif f.variables[name].dimensions[0] != self.dim:
+                logging.error('egads - netcdf_io.py - EgadsNetCdfStream - append - ValueError, variable ' + 
+                              str(name) + ' does not start with dimension ' + str(self.dim))
+                raise ValueError("ERROR: Variable %s does not start with dimension %s" % (name, self.dim))
+            storage = _storage_chunk_length(f.variables[name], 0)
+            self._alignment = self._alignment * storage // gcd(self._alignment, storage)
+        if self.buffer_length is None:
+            self.buffer_length = self._alignment
+        self.buffer_length = -(-self.buffer_length // self._alignment) * self._alignment
+        self._names = list(records)
+        self._buffers = dict((name, []) for name in self._names)
+
+    def _trailing_dim(self, name, axis, length):
+        """
+        Creates a fixed dimension for an axis of a new variable which is not the
+        record axis.
+        """
+
+        dim = '%s_dim%d' % (name, axis + 1)
+        if dim not in self.ncfile.f.dimensions:
+            self.ncfile.add_dim(dim, length)
+        return dim
+
+    def _write(self, count):
+        """
+        Writes the first count buffered records to the file and keeps the remaining
+        records in the buffers.
+        """
+
+        if count <= 0:
+            return
+        f = self.ncfile.f
+        for name in self._names:
+            value = numpy.ma.concatenate(self._buffers[name], axis=0)
+            f.variables[name][self._start:self._start + count] = value[:count]
+            self._buffers[name] = [value[count:]] if count < len(value) else []
+        self._start += count
+        self._buffered -= count
+        self.ncfile._time_index.pop(self.dim, None)
+        logging.debug('egads - netcdf_io.py - EgadsNetCdfStream - _write - records ' + str(count) + 
+                      ' -> data write OK')
+
+
+class EgadsNetCdfDataset(object):
+    """
+    Dataset made of several NetCDF files, e.g. the files of all flights of a
+    campaign, following each other in time. Each variable is presented as one
+    virtual array concatenated along the time dimension. The files are indexed
+    by time when the dataset is created, so that time window queries only open
+    the files which overlap the window. Files are opened lazily as
+    :class:`EgadsNetCdf` instances, and the least recently used ones are closed
+    when more than max_open_files are open.
+    """
+
+    def __init__(self, path, time_name='time', max_open_files=8):
+        """
+        Initializes EgadsNetCdfDataset instance.
+
+        :param string|list path:
+            Path of the files, wildcards are supported (see :func:`~egads.input.get_file_list`),
+            or list of file names.
+        :param string time_name:
+            Optional - Name of the time dimension and of its coordinate variable.
+            Default - 'time'.
+        :param int max_open_files:
+            Optional - Maximum number of files open at the same time. Default - 8.
+        """
+
+        logging.debug('egads - netcdf_io.py - EgadsNetCdfDataset - __init__ - path ' + str(path) + 
+                      ', time_name ' + str(time_name) + ', max_open_files ' + str(max_open_files))
+        if isinstance(path, basestring):
+            filenames = get_file_list(path)
+        else:
+            filenames = list(path)
+        if not filenames:
+            logging.error('egads - netcdf_io.py - EgadsNetCdfDataset - __init__ - IOError, no file found')
+            raise IOError("ERROR: No file found for %s" % path)
+        self.time_name = time_name
+        self.max_open_files = max(1, max_open_files)
+        self._files = collections.OrderedDict()
+        self.units = None
+        self.calendar = 'standard'
+        index = []
+        for filename in filenames:
+            f = self._get_file(filename)
+            timevar = f.f.variables[time_name]
+            units = getattr(timevar, 'units', '')
+            if self.units is None:
+                self.units = units
+                self.calendar = getattr(timevar, 'calendar', 'standard')
+            length = len(f.f.dimensions[time_name])
+            if length:
+                first, last = _convert_time([timevar[0], timevar[length - 1]], units, self.units, self.calendar)
+            else:
+                first, last = numpy.inf, -numpy.inf
+            index.append((first, last, length, filename, units))
+        index.sort()
+        self._first = numpy.array([item[0] for item in index])
+        self._last = numpy.array([item[1] for item in index])
+        if index[0][4] != self.units:
+            valid = numpy.isfinite(self._first)
+            self._first[valid] = _convert_time(self._first[valid], self.units, index[0][4], self.calendar)
+            self._last[valid] = _convert_time(self._last[valid], self.units, index[0][4], self.calendar)
+            self.units = index[0][4]
+        self._lengths = [item[2] for item in index]
+        self._offsets = numpy.cumsum([0] + self._lengths)
+        self._filenames = [item[3] for item in index]
+        self._file_units = [item[4] for item in index]
+
+    def get_file_list(self):
+        """
+        Returns the list of files of the dataset, sorted by time.
+        """
+
+        return list(self._filenames)
+
+    def get_variable_list(self):
+        """
+        Returns the list of variables found in the first file of the dataset.
+        """
+
+        return self._get_file(self._filenames[0]).get_variable_list()
+
+    def get_time_range(self):
+        """
+        Returns the first and last time of the dataset, in the units of the time
+        coordinate of the earliest file.
+        """
+
+        return self._first.min(), self._last.max()
+
+    def variable(self, varname):
+        """
+        Returns a :class:`EgadsDatasetVariable` instance presenting a variable of all
+        the files as one virtual array.
+
+        :param string varname:
+            Name of the variable.
+        """
+
+        return EgadsDatasetVariable(self, varname)
+
+    def read_variable(self, varname, time_range=None):
+        """
+        Reads a variable from all the files of the dataset, or from the files
+        overlapping a time window, and concatenates it along time.
+
+        :param string varname:
+            Name of the variable to read in.
+        :param tuple time_range:
+            Optional - Start and end times of the window, included. Times are datetime
+            objects or values in the units of the time coordinate of the earliest file.
+        """
+
+        logging.debug('egads - netcdf_io.py - EgadsNetCdfDataset - read_variable - varname ' + str(varname) + 
+                      ', time_range ' + str(time_range))
+        if time_range is None:
+            return self._read(varname, [(i, slice(None)) for i in xrange(len(self._filenames))])
+        start, end = [_time_value(t, self.units, self.calendar) for t in time_range]
+        parts = []
+        for i in numpy.nonzero((self._last >= start) & (self._first <= end))[0]:
+            f = self._get_file(self._filenames[i])
+            window = _convert_time([start, end], self.units, self._file_units[i], self.calendar)
+            parts.append((i, f._time_slice(self.time_name, window)))
+        return self._read(varname, parts)
+
+    def close(self):
+        """
+        Closes all open files of the dataset.
+        """
+
+        logging.debug('egads - netcdf_io.py - EgadsNetCdfDataset - close')
+        while self._files:
+            _, f = self._files.popitem()
+            f.close()
+
+    def _get_file(self, filename):
+        """
+        Returns the open EgadsNetCdf instance of a file, opening it if needed and
+        closing the least recently used file if too many files are open.
+        """
+
+        try:
+            f = self._files.pop(filename)
+        except KeyError:
+            f = EgadsNetCdf(filename, 'r')
+            if len(self._files) >= self.max_open_files:
+                _, oldest = self._files.popitem(last=False)
+                oldest.close()
+        self._files[filename] = f
+        return f
+
+    def _read(self, varname, parts):
+        """
+        Reads and concatenates the slices of a variable along time given as a
+        list of (file number, slice) pairs. Variables which don't depend on time
+        are read from the first file. Values of the time coordinate are converted
+        to the units of the dataset.
+        """
+
+        f = self._get_file(self._filenames[parts[0][0] if parts else 0])
+        varin = self._get_variable(f, varname)
+        if self.time_name not in varin.dimensions[:1]:
+            return f.read_variable(varname)
+        variable_attrs = f.get_attribute_list(varname)
+        variable_attrs['cdf_name'] = varname
+        is_time = varname == self.time_name
+        if is_time:
+            variable_attrs['units'] = self.units
+        metadata = egads.core.metadata.VariableMetadata(variable_attrs, f.file_metadata)
+        values = [varin[0:0]]
+        for i, index in parts:
+            value = self._get_variable(self._get_file(self._filenames[i]), varname)[index]
+            if is_time:
+                value = _convert_time(value, self._file_units[i], self.units, self.calendar)
+            values.append(value)
+        return egads.EgadsData(numpy.ma.concatenate(values, axis=0), variable_metadata=metadata)
+
+    def _get_variable(self, f, varname):
+        """
+        Returns a variable of an open file, raising a KeyError if it doesn't exist.
+        """
+
+        try:
+            return f.f.variables[varname]
+        except KeyError:
+            logging.exception('egads - netcdf_io.py - EgadsNetCdfDataset - _get_variable - KeyError, variable does not exist in netcdf file')
+            raise KeyError("ERROR: Variable %s does not exist in %s" % (varname, f.filename))
+
+    def __del__(self):
+        """
+        If files are still open on deletion of object, close them.
+        """
+
+        if getattr(self, '_files', None):
+            self.close()
+
+
+class EgadsDatasetVariable(object):
+    """
+    Virtual array of a variable of an :class:`EgadsNetCdfDataset`, concatenated
+    along time. Only the files holding the accessed records are read.
+    """
+
+    def __init__(self, dataset, varname):
+        """
+        Initializes EgadsDatasetVariable instance.
+
+        :param EgadsNetCdfDataset dataset:
+            Dataset the variable belongs to.
+        :param string varname:
+            Name of the variable.
+        """
+
+        self.dataset = dataset
+        self.varname = varname
+
+    @property
+    def shape(self):
+        varin = self.dataset._get_file(self.dataset._filenames[0]).f.variables[self.varname]
+        return (int(self.dataset._offsets[-1]),) + varin.shape[1:]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        """
+        Reads the records given by key, the first item of which indexes the
+        time dimension. Returns an :class:`~egads.core.EgadsData` instance.
+        """
+
+        if not isinstance(key, tuple):
+            key = (key,)
+        index, others = key[0], key[1:]
+        offsets = self.dataset._offsets
+        scalar = isinstance(index, (int, long, numpy.integer))
+        if scalar:
+            if index < 0:
+                index += offsets[-1]
+            start, stop, step = index, index + 1, 1
+        else:
+            start, stop, step = index.indices(offsets[-1])
+            if step < 0:
+                logging.error('egads - netcdf_io.py - EgadsDatasetVariable - __getitem__ - ValueError, negative step')
+                raise ValueError("ERROR: Negative steps are not supported")
+        parts = []
+        for i in numpy.nonzero((offsets[1:] > start) & (offsets[:-1] < stop))[0]:
+            parts.append((i, slice(max(start - offsets[i], 0), min(stop, offsets[i + 1]) - offsets[i])))
+        data = self.dataset._read(self.varname, parts)
+        value = data.value[(slice(None, None, step),) + others]
+        if scalar:
+            value = value[0]
+        return egads.EgadsData(value, variable_metadata=data.metadata)
+
+    def read(self):
+        """
+        Reads the whole variable and returns an :class:`~egads.core.EgadsData` instance.
+        """
+
+        return self.dataset.read_variable(self.varname)
+
+
+def _time_value(t, units, calendar='standard'):
+    """
+    Converts a time given as a datetime object to a value in units. Values are
+    returned unchanged.
+    """
+
+    if hasattr(t, 'timetuple'):
+        return netCDF4.date2num(t, units, calendar)  # @UndefinedVariable
+    return t
+
+
+def _convert_time(values, units, new_units, calendar='standard'):
+    """
+    Converts time values from units to new_units. Values are returned unchanged
+    if units are the same.
+    """
+
+    values = numpy.asarray(values, dtype='float64')
+    if units == new_units:
+        return values
+    dates = netCDF4.num2date(values, units, calendar)  # @UndefinedVariable
+    return numpy.asarray(netCDF4.date2num(dates, new_units, calendar), dtype='float64')  # @UndefinedVariable
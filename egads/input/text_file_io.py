@@ -4,17 +4,23 @@ __version__ = "1.3"
 __all__ = ["EgadsFile", "EgadsCsv", "parse_string_array"]
 
 import csv
-import sys
+import itertools
+import mmap
+import os
 from egads.input import FileCore
 import numpy
 import logging
 
+CSV_BLOCK_ROWS = 65536
+MMAP_BLOCK_BYTES = 2**26
+_FORMAT_DTYPES = {'i': 'i4', 'f': 'f8', 'l':'f8', 's':'a20'}
+
 class EgadsFile(FileCore): 
     """
     Generic class for interfacing with text files.
     """
 
-    def __init__(self, filename=None, perms='r'):
+    def __init__(self, filename=None, perms='r', use_mmap=False):
         """
         Initializes instance of EgadsFile object.
 
@@ -24,10 +30,14 @@ class EgadsFile(FileCore):
             Optional - Permissions used to open file. Options are ``w`` for write (overwrites
             data), ``a`` for append ``r+`` for read and write, and ``r`` for read. ``r`` is the 
             default value.
+        :param bool use_mmap:
+            Optional - If True, a file opened for reading is memory-mapped and :meth:`read`,
+            :meth:`read_line` and :meth:`iter_read` read data from the map. Default - False.
         """
 
-        logging.debug('egads - text_file_io.py - EgadsFile - __init__ - filename ' + str(filename) + ', perms' + str(perms))
-        FileCore.__init__(self, filename, perms, pos=0)
+        logging.debug('egads - text_file_io.py - EgadsFile - __init__ - filename ' + str(filename) + ', perms' +
+                      str(perms) + ', use_mmap ' + str(use_mmap))
+        FileCore.__init__(self, filename, perms, pos=0, use_mmap=use_mmap, data_map=None, line_offsets=None)
 
     def close(self):
         """
@@ -35,6 +45,9 @@ class EgadsFile(FileCore):
         """
 
         logging.debug('egads - text_file_io.py - EgadsFile - close')
+        # the map isn't closed explicitly, as arrays returned by read_records may still use it
+        self.data_map = None
+        self.line_offsets = None
         FileCore.close(self)
         self.pos = 0
 
@@ -57,6 +70,8 @@ class EgadsFile(FileCore):
             self.filename = filename
             self.perms = perms
             self.pos = self.f.tell()
+            if self.use_mmap and perms == 'r':
+                self._get_map()
         except RuntimeError:
             logging.exception('egads - text_file_io.py - EgadsFile - _open_file - RuntimeError, File '+
                            str(filename) + ' doesn''t exist')
@@ -86,7 +101,8 @@ class EgadsFile(FileCore):
         """
         
         logging.debug('egads - text_file_io.py - EgadsFile - get_position')
-        self.pos = self.f.tell()
+        if not self._is_mapped():
+            self.pos = self.f.tell()
         return self.pos
 
     def seek(self, location, from_where=None):
@@ -105,6 +121,9 @@ class EgadsFile(FileCore):
             'c': lambda: 1,
             'e': lambda: 2}
         from_val = from_switch.get(from_where, lambda: 0)()
+        if from_val == 1 and self._is_mapped():
+            # reads from the map don't move the file object, self.pos is the current position
+            location, from_val = self.pos + location, 0
         self.f.seek(location, from_val)
         self.pos = self.f.tell()
 
@@ -137,11 +156,18 @@ class EgadsFile(FileCore):
         """
 
         logging.debug('egads - text_file_io.py - EgadsFile - read - size' + str(size))
-        if size is None:
+        if self._is_mapped():
+            if size is None:
+                filedata = self.data_map[self.pos:]
+            else:
+                filedata = self.data_map[self.pos:self.pos + size]
+            self.pos += len(filedata)
+        elif size is None:
             filedata = self.f.read()
+            self.pos = self.f.tell()
         else:
             filedata = self.f.read(size)
-        self.pos = self.f.tell()
+            self.pos = self.f.tell()
         logging.debug('egads - text_file_io.py - EgadsFile - read - data read OK, self.pos ' + str(self.pos))
         return filedata
 
@@ -151,18 +177,146 @@ class EgadsFile(FileCore):
         """
         
         logging.debug('egads - text_file_io.py - EgadsFile - read_line')
+        if self._is_mapped():
+            end = self.data_map.find('\n', self.pos) + 1 or len(self.data_map)
+            filedata = self.data_map[self.pos:end]
+            self.pos = end
+            return filedata
         filedata = self.f.readline()
         self.pos = self.f.tell()
         return filedata
 
+    def iter_read(self, chunk=None):
+        """
+        Generator reading data from the current position of the file by blocks of
+        lines. After each iteration, :meth:`get_position` returns the position of
+        the next block, which can be given to :meth:`seek` to resume reading later.
+
+        :param int chunk:
+            Optional - Number of lines in each block. Default is ``CSV_BLOCK_ROWS``.
+
+        :returns:
+            String data of the lines of each block.
+        :rtype: string
+        """
+
+        logging.debug('egads - text_file_io.py - EgadsFile - iter_read - chunk ' + str(chunk))
+        if chunk is None:
+            chunk = CSV_BLOCK_ROWS
+        if self._is_mapped():
+            offsets = self.get_line_offsets()
+            size = len(self.data_map)
+            # index of the first line starting after the current position
+            i = numpy.searchsorted(offsets, self.pos, 'right')
+            while self.pos < size:
+                i += chunk - 1
+                end = int(offsets[i]) if i < len(offsets) else size
+                filedata = self.data_map[self.pos:end]
+                self.pos = end
+                i += 1
+                yield filedata
+            return
+        lines = iter(self.f.readline, '')
+        while True:
+            filedata = ''.join(itertools.islice(lines, chunk))
+            self.pos = self.f.tell()
+            if not filedata:
+                break
+            yield filedata
+
     def reset(self):
         """
         Returns to beginning of file
         """
         
         logging.debug('egads - text_file_io.py - EgadsFile - reset')
-        self.f.seek(0)
-        self.pos = self.f.tell()
+        self.seek(0)
+
+    def get_line_offsets(self):
+        """
+        Returns the array of the positions of the beginnings of the lines of the file.
+        The index is built once, by blocks of ``MMAP_BLOCK_BYTES`` bytes of the memory-mapped
+        file (which must be opened for reading).
+        """
+
+        logging.debug('egads - text_file_io.py - EgadsFile - get_line_offsets')
+        if self.line_offsets is None:
+            data_map = self._get_map()
+            size = len(data_map)
+            offsets = [numpy.zeros(min(size, 1), dtype=numpy.int64)]
+            for start in xrange(0, size, MMAP_BLOCK_BYTES):
+                block = numpy.frombuffer(data_map, numpy.uint8, min(MMAP_BLOCK_BYTES, size - start), start)
+                offsets.append(numpy.flatnonzero(block == ord('\n')) + (start + 1))
+            offsets = numpy.concatenate(offsets)
+            if len(offsets) and offsets[-1] == size:
+                offsets = offsets[:-1]
+            self.line_offsets = offsets
+        return self.line_offsets
+
+    def seek_line(self, line):
+        """
+        Change current position in file to the beginning of a line.
+
+        :param int line:
+            Number of the line, starting from 0. Negative numbers count from the last line.
+        """
+
+        logging.debug('egads - text_file_io.py - EgadsFile - seek_line - line ' + str(line))
+        self.seek(int(self.get_line_offsets()[line]))
+
+    def read_records(self, dtype, count=-1):
+        """
+        Reads fixed-size binary records from the current position of the file, which
+        must be opened for reading. The records are not copied: the returned array
+        is a read-only view of the memory-mapped file.
+
+        :param numpy.dtype dtype:
+            Type of the records, for instance ``'<f8'`` or a structured type like
+            ``[('time', '<f8'), ('counts', '<i4', 4)]``.
+        :param int count:
+            Optional - Number of records to read. By default, all the complete records up
+            to the end of the file are read.
+
+        :returns:
+            Array of records.
+        :rtype: numpy.ndarray
+        """
+
+        logging.debug('egads - text_file_io.py - EgadsFile - read_records - dtype ' + str(dtype) + ', count ' +
+                      str(count))
+        data_map = self._get_map()
+        dtype = numpy.dtype(dtype)
+        if count < 0:
+            count = (len(data_map) - self.pos) // dtype.itemsize
+        records = numpy.frombuffer(data_map, dtype, count, self.pos)
+        self.seek(self.pos + count * dtype.itemsize)
+        return records
+
+    def _is_mapped(self):
+        """
+        Private method returning True if data are read from the memory map of the file.
+        In that case, the position of the file object isn't updated by reads, and
+        self.pos is the current position.
+        """
+
+        return self.use_mmap and self.data_map is not None
+
+    def _get_map(self):
+        """
+        Private method returning the read-only memory map of the file, which is created
+        at the first call. An empty string is returned for an empty file, which can't
+        be mapped.
+        """
+
+        if self.data_map is None:
+            if self.perms != 'r':
+                logging.error('egads - text_file_io.py - EgadsFile - _get_map - ValueError, file ' +
+                              str(self.filename) + ' is not opened for reading')
+                raise ValueError("ERROR: File %s must be opened with perms 'r' to be memory-mapped" % self.filename)
+            if os.fstat(self.f.fileno()).st_size == 0:
+                return ''
+            self.data_map = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.data_map
 
     logging.info('egads - text_file_io.py - EgadsFile has been loaded')
 
@@ -172,7 +326,7 @@ class EgadsCsv(EgadsFile):
     Class for reading data from CSV files.
     """
 
-    def __init__(self, filename=None, perms='r', delimiter=',', quotechar='"'):
+    def __init__(self, filename=None, perms='r', delimiter=',', quotechar='"', cache=None):
         """
         Initializes instance of EgadsFile object.
 
@@ -187,16 +341,26 @@ class EgadsCsv(EgadsFile):
         :param string quotechar:
             Optional - One-character string used to quote fields containing special characters.
             The default is '"'.
+        :param ColumnCache cache:
+            Optional - Cache of parsed columns (see :class:`~egads.input.input_core.ColumnCache`).
+            If provided, the columns returned by :meth:`read` for the rest of a file opened
+            for reading are stored in the cache, and memory-mapped from it when the same
+            file is read again from the same position with the same options. Columns
+            loaded from the cache are read-only.
         """
         
         logging.debug('egads - text_file_io.py - EgadsCsv - __init__ - filename ' + str(filename) + 
                       ', perms ' + str(perms) + ', delimiter ' + str(delimiter) + ', quotechar ' +
                       str(quotechar))
         FileCore.__init__(self, filename, perms,
+                           use_mmap=False,
+                           data_map=None,
+                           line_offsets=None,
                            reader=None,
                            writer=None,
                            delimiter=delimiter,
-                           quotechar=quotechar)
+                           quotechar=quotechar,
+                           cache=cache)
 
     def open(self, filename, perms, delimiter=None, quotechar=None):
         """
@@ -243,14 +407,16 @@ class EgadsCsv(EgadsFile):
                 print row
         except csv.Error, e:
             logging.error('egads - text_file_io.py - EgadsCsv - display_file - csv.Error, file ' +
-                          str(self.filename) + ', line ' + str(self.reader.linenum) + ', message ' +
+                          str(self.filename) + ', line ' + str(self.reader.line_num) + ', message ' +
                           str(e))
-            sys.exit('file %s, line %d: %s' % (self.filename, self.reader.linenum, e))
+            raise csv.Error('file %s, line %d: %s' % (self.filename, self.reader.line_num, e))
         self.seek(self.pos)
 
-    def read(self, lines=None, out_format=None):
+    def read(self, lines=None, out_format=None, missing_values=None):
         """
-        Reads in and returns contents of csv file.
+        Reads in and returns contents of csv file. Rows are read by blocks of
+        ``CSV_BLOCK_ROWS`` rows, and each block is parsed directly into typed column
+        arrays, so the whole file is never held as strings.
 
         :param int lines:
             Optional - Number specifying the number of lines to read in. If left blank,
@@ -258,7 +424,12 @@ class EgadsCsv(EgadsFile):
         :param list format:
             Optional - List type composed of one character strings used to decompose elements
             read in to their proper types. Options are ``i`` for int, ``f`` for float,
-            ``l`` for long and ``s`` for string.
+            ``l`` for long and ``s`` for string. NumPy data types (``'f4'``, ``'i8'``...)
+            are also accepted. If the list is shorter than the number of columns, it is
+            repeated.
+        :param list missing_values:
+            Optional - List of strings marking missing values, which are read as NaN in
+            float columns.
 
         :returns:
             List of arrays of values read in from file. If a format string is provided,
@@ -267,36 +438,113 @@ class EgadsCsv(EgadsFile):
         """
 
         logging.debug('egads - text_file_io.py - EgadsCsv - read - lines ' + str(lines) + ', out_format ' +
-                      str(out_format))
-        data = []
-        if lines is None:
-            try:
-                for row in self.reader:
-                    data.append(row)
-            except csv.Error, e:
-                logging.error('egads - text_file_io.py - EgadsCsv - display_file - csv.Error, file ' +
-                          str(self.filename) + ', line ' + str(self.reader.linenum) + ', message ' +
-                          str(e))
-                sys.exit('file %s, line %d: %s' % (self.filename, self.reader.linenum, e))
-        else:
-            try:
-                for _ in xrange(lines):
-                    row = self.reader.next()
-                    data.append(row)
-            except csv.Error, e:
-                logging.error('egads - text_file_io.py - EgadsCsv - display_file - csv.Error, file ' +
-                          str(self.filename) + ', line ' + str(self.reader.linenum) + ', message ' +
-                          str(e))
-                sys.exit('file %s, line %d: %s' % (self.filename, self.reader.linenum, e))
-        data = numpy.array(data)
-        data = data.transpose()
-        if out_format is None:
-            return list(data)
-        else:
-            parsed_data = parse_string_array(data, out_format)
-            return parsed_data
+                      str(out_format) + ', missing_values ' + str(missing_values))
+        cache_options = None
+        if lines is None and self.cache is not None and self._cache_offset is not None:
+            cache_options = ('EgadsCsv', self._cache_offset, self.delimiter, self.quotechar,
+                             None if out_format is None else list(out_format))
+            if missing_values is not None:
+                cache_options += (sorted(missing_values),)
+            columns = self.cache.load(self.filename, cache_options)
+            if columns is not None:
+                logging.debug('egads - text_file_io.py - EgadsCsv - read - data loaded from cache')
+                self.seek(0, 'e')
+                self._cache_offset = None
+                return columns
+        self._cache_offset = None
+        parsed_data = self._read_columns(lines, out_format, missing_values)
+        # rows of ragged files are returned as lists and are not cached
+        if cache_options is not None and all(isinstance(column, numpy.ndarray) for column in parsed_data):
+            self.cache.store(self.filename, parsed_data, cache_options)
+        return parsed_data
         logging.debug('egads - text_file_io.py - EgadsCsv - read - data read OK')
 
+    def iter_read(self, chunk=None, out_format=None, missing_values=None):
+        """
+        Generator reading the csv file from the current position by blocks of lines,
+        each block being returned as :meth:`read` does. After each iteration,
+        :meth:`get_position` returns the position of the next block, which can be
+        given to :meth:`seek` to resume reading later.
+
+        :param int chunk:
+            Optional - Number of lines in each block. Default is ``CSV_BLOCK_ROWS``.
+        :param list out_format:
+            Optional - List of types of the columns, see :meth:`read`.
+        :param list missing_values:
+            Optional - List of strings marking missing values, which are read as NaN in
+            float columns.
+
+        :returns:
+            List of arrays of values of each block.
+        :rtype: list of arrays
+        """
+
+        logging.debug('egads - text_file_io.py - EgadsCsv - iter_read - chunk ' + str(chunk) + ', out_format ' +
+                      str(out_format) + ', missing_values ' + str(missing_values))
+        if chunk is None:
+            chunk = CSV_BLOCK_ROWS
+        self._cache_offset = None
+        while True:
+            pos = self.f.tell()
+            parsed_data = self._read_columns(chunk, out_format, missing_values)
+            self.pos = self.f.tell()
+            if self.pos == pos:
+                break
+            if parsed_data:
+                yield parsed_data
+
+    def _read_columns(self, lines, out_format, missing_values):
+        """
+        Private method reading lines rows (or the rest of the file if lines is None) by
+        blocks of CSV_BLOCK_ROWS rows and returning the list of column arrays. Empty
+        rows are ignored. If rows don't have all the same length (e.g. a NASA Ames CSV
+        file and its header), the rows read are returned as before, one list per row.
+        Raises csv.Error with the file name and line number if a row can't be parsed.
+        """
+
+        try:
+            return self._parse_rows(lines, out_format, missing_values)
+        except csv.Error, e:
+            logging.error('egads - text_file_io.py - EgadsCsv - _read_columns - csv.Error, file ' +
+                          str(self.filename) + ', line ' + str(self.reader.line_num) + ', message ' +
+                          str(e))
+            raise csv.Error('file %s, line %d: %s' % (self.filename, self.reader.line_num, e))
+
+    def _parse_rows(self, lines, out_format, missing_values):
+        """
+        Private method doing the work of _read_columns.
+        """
+
+        if out_format is not None:
+            dtypes = [numpy.dtype(_FORMAT_DTYPES.get(fmt, fmt)) for fmt in out_format]
+        if missing_values is not None:
+            missing_values = set(missing_values)
+        reader = itertools.islice(self.reader, lines)
+        columns = []
+        while True:
+            rows = list(itertools.islice(reader, CSV_BLOCK_ROWS))
+            if not rows:
+                break
+            lengths = set(map(len, rows))
+            if 0 in lengths:
+                lengths.discard(0)
+                rows = [row for row in rows if row]
+            if len(lengths) > 1 or (columns and lengths and lengths != set([len(columns)])):
+                rows = [list(row) for row in zip(*[numpy.concatenate(blocks).tolist() for blocks in columns])] + rows
+                rows.extend(reader)
+                data = numpy.array(rows).transpose()
+                if out_format is None:
+                    return list(data)
+                return parse_string_array(data, out_format)
+            for i, values in enumerate(zip(*rows)):
+                if i == len(columns):
+                    columns.append([])
+                if out_format is None:
+                    columns[i].append(numpy.array(values))
+                else:
+                    columns[i].append(_parse_values(values, dtypes[i % len(dtypes)], missing_values))
+        return [blocks[0] if len(blocks) == 1 else numpy.concatenate(blocks) for blocks in columns]
+
     def skip_line(self, amount=1):
         """
         Skips over line(s) in file.
@@ -308,6 +556,25 @@ class EgadsCsv(EgadsFile):
         logging.debug('egads - text_file_io.py - EgadsCsv - skip_line - amount ' + str(amount))
         for _ in xrange(amount):
             self.f.readline()
+        if self._cache_offset is not None:
+            self._cache_offset = self.f.tell()
+
+    def seek(self, location, from_where=None):
+        """
+        Change current position in file.
+
+        :param integer location:
+            Position in file to seek to.
+        :param char from_where: 
+            Optional - Where to seek from. Valid options are ``b`` for beginning, ``c`` for
+            current and ``e`` for end.
+        """
+
+        EgadsFile.seek(self, location, from_where)
+        if self.perms == 'r':
+            self._cache_offset = self.pos
+        if self.reader is not None:
+            self._set_reader()
 
     def write(self, data):
         """
@@ -321,17 +588,56 @@ class EgadsCsv(EgadsFile):
         self.writer.writerow(data)
         logging.debug('egads - text_file_io.py - EgadsCsv - write - data write OK')
 
-    def writerows(self, data):
+    def writerows(self, data, formats=None):
         """
-        Writes data out to file.
+        Writes data out to file. Columns are not stacked in a single array: rows are
+        formatted by blocks of ``CSV_BLOCK_ROWS`` rows with a single format operation
+        and each block is written at once.
 
         :param list data:
             List of variables to output.
+        :param list formats:
+            Optional - List of format specifiers of the columns, like ``'%.3f'``, or None
+            for the default format of a column. By default, floats are written with
+            their shortest representation, integers as integers and other values as
+            strings, quoted if needed.
         """
         
-        logging.debug('egads - text_file_io.py - EgadsCsv - writerows')
-        data_arr = numpy.column_stack(tuple(data))
-        self.writer.writerows(data_arr)
+        logging.debug('egads - text_file_io.py - EgadsCsv - writerows - formats ' + str(formats))
+        columns = [numpy.asarray(column) for column in data]
+        if not columns:
+            return
+        lengths = [len(column) for column in columns]
+        if len(set(lengths)) > 1:
+            logging.error('egads - text_file_io.py - EgadsCsv - writerows - ValueError, columns have ' +
+                          'different lengths ' + str(lengths))
+            raise ValueError("ERROR: Columns have different lengths %s" % lengths)
+        if formats is None:
+            formats = [None] * len(columns)
+        # floats written with the default format are converted to strings by NumPy
+        as_strings = [fmt is None and column.dtype.kind == 'f' for column, fmt in zip(columns, formats)]
+        formats = [_get_column_format(column) if fmt is None else fmt for column, fmt in zip(columns, formats)]
+        dialect = self.writer.dialect
+        quoted = [column.dtype.kind in 'SUO' for column in columns]
+        specials = (dialect.delimiter, dialect.quotechar, '\r', '\n')
+        line = dialect.delimiter.replace('%', '%%').join(formats) + dialect.lineterminator.replace('%', '%%')
+        nrows = len(columns[0])
+        ncols = len(columns)
+        for start in xrange(0, nrows, CSV_BLOCK_ROWS):
+            end = min(start + CSV_BLOCK_ROWS, nrows)
+            values = [None] * ((end - start) * ncols)
+            for i, column in enumerate(columns):
+                block = column[start:end]
+                if as_strings[i]:
+                    block = block.astype(str)
+                block = block.tolist()
+                if quoted[i]:
+                    block = _quote_values(block, specials, dialect.quotechar)
+                    if ncols == 1:
+                        # as csv writers do, an empty field alone is quoted to keep the row
+                        block = [value or dialect.quotechar * 2 for value in block]
+                values[i::ncols] = block
+            self.f.write((line * (end - start)) % tuple(values))
         logging.debug('egads - text_file_io.py - EgadsCsv - writerows - data write OK')
 
     def _open_file(self, filename, perms):
@@ -359,9 +665,9 @@ class EgadsCsv(EgadsFile):
             self.filename = filename
             self.perms = perms
             self.pos = self.f.tell()
+            self._cache_offset = self.pos if perms == 'r' else None
             if perms == 'r' or perms == 'r+':
-                self.reader = csv.reader(self.f, delimiter=self.delimiter,
-                                         quotechar=self.quotechar)
+                self._set_reader()
             if perms == 'w' or perms == 'a' or perms == 'r+':
                 self.writer = csv.writer(self.f, delimiter=self.delimiter,
                                          quotechar=self.quotechar)
@@ -377,6 +683,17 @@ class EgadsCsv(EgadsFile):
             logging.exception('egads - text_file_io.py - EgadsCsv - _open_file - Exception, Unexpected error')
             raise Exception("ERROR: Unexpected error")
         
+    def _set_reader(self):
+        """
+        Private method creating the csv reader at the current position of the file.
+        Lines are read with readline, so that the file position is exact after each
+        row. As the line iterator stops for good at the end of the file, the reader
+        is created again after each seek.
+        """
+
+        self.reader = csv.reader(iter(self.f.readline, ''), delimiter=self.delimiter,
+                                 quotechar=self.quotechar)
+
     logging.info('egads - text_file_io.py - EgadsCsv has been loaded')
 
 
@@ -397,12 +714,50 @@ def parse_string_array(data, data_format):
     """
     
     logging.debug('egads - text_file_io.py - parse_string_array')
-    format_array_dict = {'i': 'i4', 'f': 'f8', 'l':'f8', 's':'a20'}
     parsed_data = list(data)
     i = 0
     for row in parsed_data:
         fmt_count = i % len(data_format)
-        parsed_data[i] = numpy.asarray(row, dtype=format_array_dict[data_format[fmt_count]])
+        parsed_data[i] = numpy.asarray(row, dtype=_FORMAT_DTYPES[data_format[fmt_count]])
         i += 1
     return parsed_data
 
+
+def _parse_values(values, dtype, missing_values=None):
+    """
+    Converts a sequence of strings to an array of type dtype, strings in missing_values
+    being converted to NaN if dtype is a float type.
+    """
+
+    if missing_values and dtype.kind == 'f':
+        values = ['nan' if value in missing_values else value for value in values]
+    return numpy.array(values, dtype=dtype)
+
+
+def _get_column_format(column):
+    """
+    Returns the default format specifier of the values of an array written to a csv
+    file.
+    """
+
+    if column.dtype.kind in 'iu':
+        return '%d'
+    return '%s'
+
+
+def _quote_values(values, specials, quotechar):
+    """
+    Returns the list of strings of values, those containing one of the specials
+    characters being quoted with quotechar as done by csv writers.
+    """
+
+    values = [value if isinstance(value, basestring) else str(value) for value in values]
+    text = ''.join(values)
+    if not any(char in text for char in specials):
+        return values
+    quoted_values = []
+    for value in values:
+        if any(char in value for char in specials):
+            value = quotechar + value.replace(quotechar, quotechar * 2) + quotechar
+        quoted_values.append(value)
+    return quoted_values
@@ -14,6 +14,7 @@ import egads
 from egads.algorithms import corrections
 from egads.algorithms import mathematics
 from egads.algorithms import transforms
+from egads.algorithms.mathematics import limit_angle_range
 from numpy import nan
 
 
@@ -59,6 +60,18 @@ class MathematicsTestCase(unittest.TestCase):
         self.assertListEqual(res_deriv.value.tolist()[1:-1], deriv_sea_level[1:-1], 'The test vector and derivated vector dont match')
         res_deriv = mathematics.DerivativeWrtTime().run(array_test, time)
         self.assertEqual(res_deriv.shape, array_shape, 'Sea level array shapes dont match')
+
+    def test_limit_angle_range(self):
+        angle = egads.EgadsData(value=[-725.0, -90.0, 0.0, 45.0, 360.0, 1000.0],
+                                units='degree',
+                                long_name='angle')
+        angle_limited = [355.0, 270.0, 0.0, 45.0, 0.0, 280.0]
+        res_angle = mathematics.LimitAngleRange().run(angle)
+        self.assertListEqual(res_angle.value.tolist(), angle_limited, 'The test vector and limited vector dont match')
+        angle_array = angle.value.copy()
+        res_angle = limit_angle_range.limit_angle_range(angle_array, out=angle_array)
+        self.assertTrue(res_angle is angle_array, 'The output array has not been used')
+        self.assertListEqual(angle_array.tolist(), angle_limited, 'The test vector and limited vector dont match')
         
 
 class TransformsTestCase(unittest.TestCase):
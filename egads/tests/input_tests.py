@@ -8,11 +8,21 @@ __author__ = "mfreer, ohenry"
 __date__ = "2016-12-6 09:37"
 __version__ = "1.3"
 
+import os
+import shutil
+import signal
 import tempfile
 import unittest
 import csv
+import datetime
+import logging
+import numpy
 import egads
 import egads.input as einput
+import egads.input.nasa_ames_io as nasa_ames_io
+import egads.input.nasa_ames_io_2 as nasa_ames_io_2
+import egads.input.text_file_io as text_file_io
+import egads.input.convert as convert
 import netCDF4
 from numpy.random.mtrand import uniform
 from numpy.testing import assert_array_equal  # @UnresolvedImport
@@ -211,6 +221,28 @@ class NetCdfFileInputTestCase(unittest.TestCase):
         data = einput.NetCdf(self.file).read_variable(VAR_MULT_NAME, input_range=(None, None, 0, DIM1_LEN - 2))
         assert_array_equal(data, random_mult_data[:, :DIM1_LEN - 2])
 
+    def test_iter_variable(self):
+        """ Test reading data chunk by chunk"""
+
+        chunks = list(einput.NetCdf(self.file).iter_variable(VAR_MULT_NAME, chunk=3))
+        self.assertEqual(len(chunks), 4, 'Number of chunks doesnt match')
+        assert_array_equal(chunks[1], random_mult_data[3:6])
+        chunks = list(einput.NetCdf(self.file).iter_variable([VAR_NAME, VAR_MULT_NAME], chunk=4, dim=DIM1_NAME))
+        assert_array_equal(chunks[2][0], random_data[8:])
+        assert_array_equal(chunks[2][1], random_mult_data[8:])
+        chunks = list(einput.NetCdf(self.file).iter_variable(VAR_MULT_NAME, chunk=2, dim=DIM2_NAME))
+        assert_array_equal(chunks[2], random_mult_data[:, 4:])
+        self.assertRaises(ValueError, list, einput.NetCdf(self.file).iter_variable(VAR_NAME, dim=DIM2_NAME))
+        f = netCDF4.Dataset(self.file, 'a')  # @UndefinedVariable
+        f.createVariable('scalar_var', 'f8', ())[...] = 1.
+        f.close()
+        self.assertRaises(ValueError, list, einput.NetCdf(self.file).iter_variable('scalar_var'))
+        infile = einput.EgadsNetCdf(self.file)
+        for i, data in enumerate(infile.iter_variable(VAR_NAME, chunk=5)):
+            assert_array_equal(data.value, random_data[i * 5:(i + 1) * 5])
+            self.assertEqual(data.metadata['units'], VAR_UNITS, 'EgadsData units attribute doesnt match')
+        infile.close()
+
     def test_read_n6sp_data(self):
         """ Test reading in data using N6SP formatted NetCDF """
 
@@ -224,6 +256,43 @@ class NetCdfFileInputTestCase(unittest.TestCase):
         self.assertEqual(data.metadata['standard_name'], VAR_STD_NAME, 'EgadsData standard name attribute doesnt match')
         infile.close()
 
+    def test_read_lazy_data(self):
+        """ Test reading data through a lazy variable proxy """
+
+        infile = einput.EgadsNetCdf(self.file)
+        proxy = infile.read_variable(VAR_MULT_NAME, lazy=True)
+        self.assertEqual(proxy.shape, (DIM1_LEN, DIM2_LEN), 'Proxy dimensions dont match')
+        self.assertEqual(proxy.units, VAR_MULT_UNITS, 'Proxy units dont match')
+        data = proxy[2:4, 1]
+        assert_array_equal(data.value, random_mult_data[2:4, 1])
+        self.assertEqual(data.metadata['units'], VAR_MULT_UNITS, 'EgadsData units attribute doesnt match')
+        proxy.BLOCK_SIZE = DIM2_LEN * 3
+        self.assertAlmostEqual(proxy.max().value, random_mult_data.max(), 10, 'Proxy maximum doesnt match')
+        self.assertAlmostEqual(proxy.mean().value, random_mult_data.mean(), 10, 'Proxy mean doesnt match')
+        assert_array_equal(proxy.min(axis=0).value, random_mult_data.min(axis=0))
+        assert_array_equal(proxy.sum(axis=1).value, random_mult_data.sum(axis=1))
+        infile.close()
+
+    def test_read_several_variables(self):
+        """ Test reading several variables at once """
+
+        infile = einput.EgadsNetCdf(self.file)
+        data, mult_data = infile.read_variables([VAR_NAME, VAR_MULT_NAME])
+        assert_array_equal(data.value, random_data)
+        assert_array_equal(mult_data.value, random_mult_data)
+        self.assertEqual(data.metadata['units'], VAR_UNITS, 'EgadsData units attribute doesnt match')
+        self.assertEqual(mult_data.metadata['units'], VAR_MULT_UNITS, 'EgadsData units attribute doesnt match')
+        self.assertIs(data.metadata.parent, mult_data.metadata.parent, 'File metadata is not shared')
+        attrs = infile.get_attribute_list(VAR_NAME)
+        attrs['units'] = 'km'
+        self.assertEqual(infile.get_attribute_value('units', VAR_NAME), VAR_UNITS, 'Cached attributes have been modified')
+        infile.close()
+        infile = einput.NetCdf(self.file, 'a')
+        infile.get_attribute_list(VAR_NAME)
+        infile.add_attribute('units', 'km', VAR_NAME)
+        self.assertEqual(infile.get_attribute_value('units', VAR_NAME), 'km', 'Cached attributes have not been updated')
+        infile.close()
+
 
 class NetCdfFileOutputTestCase(unittest.TestCase):
     """ Test output to NetCDF file """
@@ -295,6 +364,75 @@ class NetCdfFileOutputTestCase(unittest.TestCase):
         self.assertEqual(varin.long_name, 'a common data', 'Variable long name dont match')
         f.close()
 
+    def test_compression_and_chunking(self):
+        """ Test compression and chunking options of written variables """
+
+        filename = tempfile.mktemp('.nc')
+        g = einput.EgadsNetCdf(filename, 'w')
+        g.add_dim('time', None, chunk_length=2)
+        g.write_variable(self.data1, 'data_default', ('time',), 'double')
+        g.set_storage_options(zlib=True, complevel=6)
+        g.write_variable(self.data2, 'time', ('time',), 'double')
+        g.write_variable(self.data1, 'data', ('time',), 'double', zlib=False, chunksizes=(4,))
+        g.close()
+        f = netCDF4.Dataset(filename, 'r')  # @UndefinedVariable
+        filters = f.variables['time'].filters()
+        self.assertTrue(filters['zlib'], 'Variable is not compressed')
+        self.assertEqual(filters['complevel'], 6, 'Compression level doesnt match')
+        self.assertEqual(f.variables['time'].chunking(), [2], 'Chunk sizes dont match')
+        self.assertFalse(f.variables['data'].filters()['zlib'], 'Variable is compressed')
+        self.assertEqual(f.variables['data'].chunking(), [4], 'Chunk sizes dont match')
+        self.assertFalse(f.variables['data_default'].filters()['zlib'], 'Variable is compressed by default')
+        assert_array_equal(f.variables['data'][:], self.data1.value)
+        f.close()
+
+    def test_lazy_reduction_masked_chunk(self):
+        """ Test block reductions of a lazy variable with a chunk entirely masked """
+
+        filename = tempfile.mktemp('.nc')
+        g = einput.EgadsNetCdf(filename, 'w')
+        g.add_dim('time', 8)
+        data = egads.EgadsData([1., 2., 3., 4., -999., -999., -999., -999.], units='mm', _FillValue=-999.)
+        g.write_variable(data, 'data', ('time',), 'double', chunksizes=(4,))
+        g.write_variable(egads.EgadsData(data.value[::-1], variable_metadata=data.metadata), 'data_rev',
+                         ('time',), 'double', chunksizes=(4,))
+        g.write_variable(egads.EgadsData([-999.] * 8, units='mm', _FillValue=-999.), 'data_fill', ('time',),
+                         'double', chunksizes=(4,))
+        g.close()
+        f = einput.EgadsNetCdf(filename, 'r')
+        for varname in ('data', 'data_rev'):
+            proxy = f.read_variable(varname, lazy=True)
+            proxy.BLOCK_SIZE = 4
+            self.assertEqual(proxy.min().value, 1., 'Proxy minimum doesnt match')
+            self.assertEqual(proxy.max().value, 4., 'Proxy maximum doesnt match')
+            self.assertEqual(proxy.sum().value, 10., 'Proxy sum doesnt match')
+            self.assertEqual(proxy.mean().value, 2.5, 'Proxy mean doesnt match')
+        proxy = f.read_variable('data_fill', lazy=True)
+        proxy.BLOCK_SIZE = 4
+        self.assertEqual(proxy.sum().value, -999., 'Masked proxy sum doesnt match')
+        self.assertEqual(proxy.mean().value, -999., 'Masked proxy mean doesnt match')
+        f.close()
+
+    def test_stream_writing(self):
+        """ Test appending records through a streaming writer """
+
+        filename = tempfile.mktemp('.nc')
+        g = einput.EgadsNetCdf(filename, 'w')
+        g.add_dim('time', None, chunk_length=2)
+        stream = einput.EgadsNetCdfStream(g, 'time', flush_interval=None)
+        stream.append({'time': self.data2[:3], 'data': self.data1[:3]})
+        self.assertEqual(len(g.f.dimensions['time']), 2, 'Records not written by chunk')
+        stream.append({'time': self.data2[3:], 'data': self.data1[3:]})
+        self.assertRaises(KeyError, stream.append, {'time': self.data2})
+        stream.flush()
+        self.assertEqual(len(g.f.dimensions['time']), len(self.data2), 'Records not flushed')
+        g.close()
+        f = einput.EgadsNetCdf(filename, 'r')
+        data = f.read_variable('data')
+        assert_array_equal(data.value, self.data1.value)
+        self.assertEqual(data.metadata['long_name'], 'a common data', 'Variable long name dont match')
+        f.close()
+
 
 class EgadsFileInputTestCase(unittest.TestCase):
     """ Test input from text file"""
@@ -353,6 +491,60 @@ class EgadsFileInputTestCase(unittest.TestCase):
         self.assertEqual(self.strdata2ln[4], data, 'Data from pos 3 does not match')
         f.close()
 
+    def test_iter_read(self):
+        """ Test reading file by blocks of lines """
+
+        f = einput.EgadsFile(self.filename, 'r')
+        blocks = []
+        for data in f.iter_read(1):
+            blocks.append(data)
+            if len(blocks) == 1:
+                pos = f.get_position()
+        self.assertEqual(self.strdata2ln.splitlines(True), blocks, 'Blocks do not match')
+        f.seek(pos)
+        self.assertEqual([self.strdata2ln[pos:]], list(f.iter_read()), 'Data from position does not match')
+        f.close()
+
+    def test_read_mmap(self):
+        """ Test reading memory-mapped file """
+
+        f = einput.EgadsFile(self.filename, 'r', use_mmap=True)
+        self.assertEqual(self.strdata1ln, f.read_line(), 'One line data does not match')
+        self.assertEqual(self.strdata2ln[len(self.strdata1ln):], f.read(), 'Data read in does not match')
+        assert_array_equal([0, len(self.strdata1ln)], f.get_line_offsets(), 'Line offsets do not match')
+        f.seek_line(-1)
+        self.assertEqual(len(self.strdata1ln), f.get_position(), 'Positions do not match')
+        f.reset()
+        self.assertEqual(self.strdata2ln.splitlines(True), list(f.iter_read(1)), 'Blocks do not match')
+        f.seek(4)
+        self.assertEqual([self.strdata2ln[4:]], list(f.iter_read(2)), 'Blocks do not match')
+        f.reset()
+        f.read(2)
+        f.seek(3, 'c')
+        self.assertEqual(self.strdata2ln[5:], f.read(), 'Data read after seek from current position do not match')
+        f.seek(-3, 'e')
+        self.assertEqual(self.strdata2ln[-3:], f.read(), 'Data read after seek from end do not match')
+        f.close()
+
+    def test_read_records(self):
+        """ Test reading binary records from file """
+
+        records = numpy.zeros(3, dtype=[('time', '<f8'), ('counts', '<i4', 2)])
+        records['time'] = [1.5, 2.5, 3.5]
+        records['counts'] = [[1, 2], [3, 4], [5, 6]]
+        f = open(self.filename, 'wb')
+        f.write('HEAD' + records.tostring())
+        f.close()
+        f = einput.EgadsFile(self.filename, 'r')
+        self.assertEqual('HEAD', f.read(4), 'Header does not match')
+        first = f.read_records(records.dtype, 1)
+        others = f.read_records(records.dtype)
+        assert_array_equal(records[:1], first, 'Records do not match')
+        assert_array_equal(records[1:], others, 'Records do not match')
+        self.assertFalse(others.flags.writeable, 'Records are not read-only')
+        self.assertEqual(4 + records.nbytes, f.get_position(), 'Positions do not match')
+        f.close()
+
 
 class EgadsFileOutputTestCase(unittest.TestCase):
     """ Test output to text file """
@@ -449,6 +641,54 @@ class EgadsCsvInputTestCase(unittest.TestCase):
         assert_array_equal(alt, self.alts, 'Values do not match')
         assert_array_equal(data_str, self.data_as_str, 'Non-formatted data does not match')
 
+    def test_read_typed_data(self):
+        """ Test reading typed data from csv file by blocks and chunks."""
+
+        f = open(self.filename, 'a')
+        f.write('4,3,-2,NA\n')
+        f.close()
+        block_rows = text_file_io.CSV_BLOCK_ROWS
+        text_file_io.CSV_BLOCK_ROWS = 2
+        try:
+            self.f.skip_line()
+            time, lat = self.f.read(2, out_format=['s', 'i8', 'i', 'f'])[:2]
+            lon, alt = self.f.read(out_format=['i', 'f4'], missing_values=['NA'])[2:]
+        finally:
+            text_file_io.CSV_BLOCK_ROWS = block_rows
+        assert_array_equal(time, self.times[:2], 'Values do not match')
+        assert_array_equal(lat, self.lats[:2], 'Values do not match')
+        self.assertEqual(numpy.int64, lat.dtype, 'Type does not match')
+        assert_array_equal(lon, [-1, -2], 'Values do not match')
+        self.assertEqual(numpy.float32, alt.dtype, 'Type does not match')
+        self.assertAlmostEqual(1.7, alt[0], 6, 'Values do not match')
+        self.assertTrue(numpy.isnan(alt[1]), 'Missing value not read as NaN')
+
+    def test_iter_read(self):
+        """ Test reading csv file by blocks of lines and resuming."""
+
+        self.f.skip_line()
+        batches = []
+        for batch in self.f.iter_read(2, out_format=self.format):
+            batches.append(batch)
+            pos = self.f.get_position()
+            break
+        lat = [batch[1] for batch in self.f.iter_read(2, out_format=self.format)]
+        self.f.seek(pos)
+        alt = [batch[3] for batch in self.f.iter_read(2, out_format=self.format)]
+        assert_array_equal(batches[0][0], self.times[:2], 'Values do not match')
+        assert_array_equal(batches[0][3], self.alts[:2], 'Values do not match')
+        self.assertEqual(1, len(lat), 'Number of batches does not match')
+        assert_array_equal(lat[0], self.lats[2:], 'Values do not match')
+        assert_array_equal(alt[0], self.alts[2:], 'Values do not match')
+
+    def test_read_bad_data(self):
+        """ Test error raised when reading bad data from csv file."""
+
+        f = open(self.filename, 'a')
+        f.write('4,3\0,-2,0.5\n')
+        f.close()
+        self.assertRaises(csv.Error, self.f.read)
+
 
 class EgadsCsvOutputTestCase(unittest.TestCase):
     """ Test writing of CSV files. """
@@ -493,6 +733,31 @@ class EgadsCsvOutputTestCase(unittest.TestCase):
         assert_array_equal(alt, self.alts, 'Values do not match')
         assert_array_equal(data_str, self.data_as_str, 'Non-formatted data does not match')
 
+    def test_write_formatted_columns(self):
+        """ Test writing columns with formats and quoted strings to csv file."""
+
+        names = numpy.array(['a', 'b,c', 'd"e'])
+        values = numpy.array([0.1 + 0.2, 1.5, numpy.nan], dtype='f8')
+        f = einput.EgadsCsv(self.filename, 'w')
+        f.writerows([names, values, values, self.lats], formats=[None, '%.2f', None, None])
+        f.close()
+        f = open(self.filename)
+        rows = list(csv.reader(f))
+        f.close()
+        self.assertEqual(['a', '0.30', repr(0.1 + 0.2), '0'], rows[0], 'Row does not match')
+        self.assertEqual(['b,c', '1.50', '1.5', '1'], rows[1], 'Row does not match')
+        self.assertEqual(['d"e', 'nan', 'nan', '2'], rows[2], 'Row does not match')
+        f = einput.EgadsCsv(self.filename, 'w')
+        f.writerows([numpy.array(['a', '', 'b'])])
+        self.assertRaises(ValueError, f.writerows, [names, values[:2]])
+        f.close()
+        f = open(self.filename)
+        self.assertEqual('a\r\n""\r\nb\r\n', f.read(), 'Empty field not quoted')
+        f.close()
+        f = einput.EgadsCsv(self.filename)
+        self.assertEqual(['a', '', 'b'], f.read()[0].tolist(), 'Empty field not read back')
+        f.close()
+
 
 class NAInputTestCase(unittest.TestCase):
     """ Test reading of NASA Ames files. """
@@ -534,6 +799,177 @@ class NAInputTestCase(unittest.TestCase):
         self.assertEqual(self.GPS_LON_min, var1_namecall.value[0], 'Var 1 min values do not match')
         f.close()
 
+    def test_read_records_on_several_lines(self):
+        " Test reading data from NASA Ames file with records written on several lines"
+
+        header, data = NAFILETEXT.split('TIME2\n')
+        items = data.split()
+        f = open(self.filename, 'w')
+        f.write(header + 'TIME2\n' + '\n'.join(' '.join(items[i:i + 3]) + '\n' + ' '.join(items[i + 3:i + 5])
+                                               for i in range(0, len(items), 5)))
+        f.close()
+        f = einput.NasaAmes(self.filename)
+        self.assertEqual([48.0797, 48.0792, 48.0787, 48.0782, 48.0775], f.read_variable(0).value.tolist(),
+                         'Var 0 values do not match')
+        self.assertEqual([51143.42, 51144.42, 51145.42, 51146.42, 51147.42], f.read_variable(3).value.tolist(),
+                         'Var 3 values do not match')
+        f.close()
+        f = open(self.filename, 'w')
+        f.write(header + 'TIME2\n' + '\n'.join(' '.join(items[i:i + 3]) for i in range(0, len(items), 3)))
+        f.close()
+        self.assertRaises(Exception, einput.NasaAmes, self.filename)
+
+
+class NANativeInputTestCase(unittest.TestCase):
+    """ Test reading of NASA Ames files without Nappy. """
+
+    def setUp(self):
+        self.filename = tempfile.mktemp('.na');
+        f = einput.EgadsFile(self.filename, 'w')
+        f.write(NAFILETEXT)
+        f.close()
+
+    def test_read_file(self):
+        " Test reading data from NASA Ames file, compared to the Nappy based reader"
+
+        f = nasa_ames_io_2.NasaAmes(self.filename)
+        g = einput.NasaAmes(self.filename)
+        self.assertEqual(g.file_metadata, f.file_metadata, 'File metadata do not match')
+        self.assertEqual(g.get_variable_list(), f.get_variable_list(), 'Variable names do not match')
+        self.assertEqual(g.get_dimension_list(), f.get_dimension_list(), 'Dimensions do not match')
+        for varname in g.get_variable_list() + g.get_variable_list(vartype='independant'):
+            data = f.read_variable(varname)
+            nappy_data = g.read_variable(varname)
+            self.assertEqual(nappy_data.value.tolist(), data.value.tolist(), 'Values of %s do not match' % varname)
+            self.assertEqual(nappy_data.metadata, data.metadata, 'Metadata of %s do not match' % varname)
+        self.assertEqual(g.get_attribute_value('_FillValue', 1), f.get_attribute_value('_FillValue', 1),
+                         'Attribute values do not match')
+        g.close()
+        f.close()
+
+    def test_read_independant_variable(self):
+        " Test reading the independant variable by name from NASA Ames file"
+
+        f = nasa_ames_io_2.NasaAmes(self.filename)
+        errors = []
+        log_error = logging.error
+        logging.error = lambda msg, *args, **kwargs: errors.append(msg)
+        try:
+            data = f.read_variable('Time_np')
+            self.assertRaises(KeyError, f.read_variable, 'unknown')
+        finally:
+            logging.error = log_error
+        self.assertEqual(data.metadata['standard_name'], 'Time_np', 'Independant variable not read')
+        self.assertEqual(len(errors), 1, 'Errors logged while reading the independant variable')
+        f.close()
+
+    def test_read_chunks(self):
+        " Test reading ranges and blocks of records from NASA Ames file"
+
+        f = nasa_ames_io_2.NasaAmes(self.filename)
+        self.assertEqual([11.2800, 11.2793, 11.2786], f.read_variable('GPS LON', input_range=(1, -1), chunk=40).value.tolist(),
+                         'Values in range do not match')
+        f.close()
+        header = NAFILETEXT.split('TIME2\n')[0] + 'TIME2\n'
+        f = open(self.filename, 'w')
+        f.write(header + '\n'.join('%d %d %d %d %d' % (i, i + 1, i + 2, i + 3, i + 4) for i in range(5000)))
+        f.close()
+        f = nasa_ames_io_2.NasaAmes(self.filename)
+        chunks = list(f.iter_variable(['Time_np', 'Height above sea level'], chunk=1000))
+        self.assertTrue(len(chunks) > 1, 'Data section not read in several blocks')
+        assert_array_equal(numpy.concatenate([chunk[0] for chunk in chunks]), numpy.arange(5000))
+        assert_array_equal(numpy.concatenate([chunk[1] for chunk in chunks]), numpy.arange(3, 5003))
+        assert_array_equal(f.read_variable('GPS LAT', input_range=(4000, 4010), chunk=1000).value, numpy.arange(4001, 4011))
+        f.close()
+
+    def test_unsupported_file(self):
+        " Test handling of unsupported FFI and permissions"
+
+        self.assertRaises(ValueError, nasa_ames_io_2.NasaAmes, self.filename, 'w')
+        f = open(self.filename, 'w')
+        f.write(NAFILETEXT.replace('1001', '1010', 1))
+        f.close()
+        self.assertRaises(ValueError, nasa_ames_io_2.NasaAmes, self.filename)
+
+
+class ColumnCacheTestCase(unittest.TestCase):
+    """ Test caching of parsed columns of text files. """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.na_filename = tempfile.mktemp('.na')
+        f = open(self.na_filename, 'w')
+        f.write(NAFILETEXT)
+        f.close()
+        self.csv_filename = tempfile.mktemp('.csv')
+        f = open(self.csv_filename, 'w')
+        f.write('Time,Lat,Name\n1,0.5,a\n2,1.5,b\n3,2.5,c\n')
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, True)
+        os.remove(self.na_filename)
+        os.remove(self.csv_filename)
+
+    def test_nasa_ames_cache(self):
+        """ Test reading NASA Ames data from the cache """
+
+        cache = einput.ColumnCache(self.directory)
+        for _ in range(2):
+            f = einput.NasaAmes(self.na_filename, cache=cache)
+            self.assertEqual(NA_DICT['V'][2], f.read_variable(2).value.tolist(), 'Values do not match')
+            self.assertEqual(NA_DICT['X'], f.read_variable('Time_np').value.tolist(), 'Values do not match')
+            f.close()
+        self.assertEqual(1, len(os.listdir(self.directory)), 'Data not stored once in the cache')
+        self.assertTrue(isinstance(cache.load(self.na_filename, ('NasaAmes', 1001, 'block'))[0], numpy.memmap),
+                        'Cached data not memory-mapped')
+        f = open(self.na_filename, 'w')
+        f.write(NAFILETEXT.replace('584.3', '584.35'))
+        f.close()
+        f = einput.NasaAmes(self.na_filename, cache=cache)
+        self.assertEqual(584.35, f.read_variable(2).value[0], 'Modified file read from the cache')
+        f.close()
+        self.assertEqual(2, len(os.listdir(self.directory)), 'Modified file not stored in the cache')
+
+    def test_csv_cache(self):
+        """ Test reading CSV data from the cache """
+
+        cache = einput.ColumnCache(self.directory)
+        results = []
+        for _ in range(2):
+            f = einput.EgadsCsv(self.csv_filename, cache=cache)
+            f.skip_line()
+            results.append(f.read(out_format=['i', 'f', 's']))
+            self.assertEqual([], f.read(), 'File not read to its end')
+            f.close()
+        self.assertEqual(1, len(os.listdir(self.directory)), 'Data not stored once in the cache')
+        for parsed, cached in zip(*results):
+            assert_array_equal(parsed, cached)
+            self.assertEqual(parsed.dtype, cached.dtype, 'Types do not match')
+        f = einput.EgadsCsv(self.csv_filename, cache=cache)
+        self.assertEqual(['Time', '1', '2', '3'], f.read()[0].tolist(), 'Cache used for another position')
+        f.close()
+        f = open(self.csv_filename, 'w')
+        f.write('Header\n1,0.5,a\n2,1.5,b\n')
+        f.close()
+        for _ in range(2):
+            f = einput.EgadsCsv(self.csv_filename, cache=cache)
+            self.assertEqual([['Header'], ['1', '0.5', 'a'], ['2', '1.5', 'b']], f.read(), 'Ragged rows do not match')
+            f.close()
+
+    def test_eviction(self):
+        """ Test removal of least recently used entries """
+
+        cache = einput.ColumnCache(self.directory, max_size=1e-3)
+        einput.NasaAmes(self.na_filename, cache=cache).close()
+        einput.EgadsCsv(self.csv_filename, cache=cache).read()
+        self.assertTrue(cache.get_size() <= 1e-3, 'Cache larger than its maximum size')
+        self.assertEqual(None, cache.load(self.na_filename, ('NasaAmes', 1001, 'block')), 'Oldest entry not removed')
+        self.assertNotEqual(None, cache.load(self.csv_filename, ('EgadsCsv', 0, ',', '"', None)),
+                            'Newest entry removed')
+        cache.clear()
+        self.assertEqual(0, cache.get_size(), 'Cache not cleared')
+
 
 class NAOutputTestCase(unittest.TestCase):
     """ Test writing of NASA Ames files. """
@@ -591,6 +1027,101 @@ class NAOutputTestCase(unittest.TestCase):
         self.assertEqual(self.new_data[2], var1_intcall.value.tolist()[2], 'Var do not match')
         g.close()
 
+    def test_read_na_dict(self):
+        " Test sharing of data between NASA Ames file and dictionary"
+
+        f = einput.NasaAmes(self.filename)
+        na_dict = f.read_na_dict()
+        self.assertEqual(NA_DICT['X'] + [0.], na_dict['X'] + [0.], 'Independent values are not a list')
+        na_dict['V'][2][0] = 0.
+        na_dict['V'][2].append(0.)
+        self.assertEqual(NA_DICT['V'][2], f.read_variable(2).value.tolist(), 'Data of file modified')
+        na_dict = f.read_na_dict(share_data=True)
+        self.assertTrue(numpy.may_share_memory(na_dict['V'][2], f.f.V[2]), 'Data copied in dictionary')
+        self.assertRaises(ValueError, na_dict['V'][2].__setitem__, 0, 0.)
+        na_dict['ONAME'] = self.new_originator
+        na_dict['VNAME'][3] = 'Time3 (seconds after midnight)'
+        na_dict['V'][3] = self.new_data
+        self.assertEqual(self.originator, f.get_attribute_value('ONAME'), 'Header of file modified')
+        self.assertEqual(self.var_names, f.get_variable_list(), 'Header of file modified')
+        self.assertEqual(NA_DICT['V'][3], f.read_variable(3).value.tolist(), 'Data of file modified')
+        f.save_na_file(self.filename, na_dict, float_format='%.4f')
+        f.close()
+        g = einput.NasaAmes(self.filename)
+        self.assertEqual(self.new_originator, g.file_metadata['Originator'], 'Originator values do not match')
+        self.assertEqual(self.new_data, g.read_variable('Time3').value.tolist(), 'Var do not match')
+        self.assertEqual(NA_DICT['V'][2], g.read_variable(2).value.tolist(), 'Var do not match')
+        g.close()
+
+    def test_mask_and_scale(self):
+        " Test applying missing values and scale factors when reading NASA Ames file"
+
+        na_dict = dict(NA_DICT, VSCAL=[1, 1, 2, 1], V=NA_DICT['V'][:2] + [[584.3, -9900, 587.8, 591.3, 596.0]] +
+                       NA_DICT['V'][3:])
+        f = einput.NasaAmes()
+        f.save_na_file(self.filename, na_dict, float_format='%.4f')
+        f.close()
+        f = einput.NasaAmes(self.filename)
+        self.assertEqual(-9900., f.read_variable(2).value[1], 'Raw values modified')
+        var = f.read_variable(2, mask_and_scale=True)
+        self.assertTrue(numpy.isnan(var.value[1]), 'Missing value not masked')
+        self.assertEqual(1168.6, var.value[0], 'Value not scaled')
+        self.assertEqual(NA_DICT['V'][1], f.read_variable(1, mask_and_scale=True).value.tolist(), 'Var do not match')
+        f.write_variable([600., numpy.nan, 601., 602., 603.], varname=2)
+        self.assertEqual(-9900., f.read_variable(2).value[1], 'NaN not replaced by missing value')
+        self.assertEqual(1200., f.read_variable(2, mask_and_scale=True).value[0], 'Scaled values not updated')
+        f.close()
+
+    def test_write_variable_block(self):
+        " Test keeping NASA Ames data in one block when writing variables"
+
+        f = einput.NasaAmes(self.filename)
+        f.write_variable(self.new_data, varname="Time2")
+        f.write_variable(egads.EgadsData(self.new_data, units='s', long_name='Time3', scale_factor=1,
+                                          _FillValue=-9900.))
+        self.assertEqual((5, 5), f._block.shape, 'Data not kept in one block')
+        self.assertTrue(numpy.may_share_memory(f.f.V[4], f._block), 'Variable not stored in the block')
+        self.assertEqual(self.new_data, f.read_variable("Time3").value.tolist(), 'Var do not match')
+        f.write_variable(self.new_data, varname="Time_np", vartype='independant')
+        self.assertEqual(self.new_data, f.read_variable("Time_np").value.tolist(), 'Var do not match')
+        f.close()
+
+    def test_write_variable_bad_values(self):
+        " Test writing values which can't be converted to floats in NASA Ames file"
+
+        f = einput.NasaAmes(self.filename)
+        values = ['a', 'b', 'c', 'd', 'e']
+        attrdict = {'standard_name': 'sea level', 'units': 'mm', 'scale_factor': 1, '_FillValue': -9900.}
+        self.assertRaises(ValueError, f.write_variable, values, 'sea level', attrdict=attrdict)
+        self.assertRaises(ValueError, f.write_variable, values, 'GPS LAT')
+        self.assertEqual(4, f.f.NV, 'Number of variables modified')
+        self.assertEqual(self.var_names, f.get_variable_list(), 'Variable names modified')
+        self.assertEqual(4, len(f.f.V), 'Data modified')
+        self.assertEqual(4, len(f.f.VMISS), 'Missing values modified')
+        f.close()
+
+
+    def test_write_file_1010(self):
+        " Test writing and reading data of a NASA Ames file with auxiliary variables"
+
+        na_dict = dict(NA_DICT, FFI=1010, NAUXV=2, ASCAL=[1, 1], AMISS=[-9900, -9900], ANAME=['Aux1 (m)', 'Aux2 (m)'],
+                       A=[[1.5, 2.5, 3.5, 4.5, 5.5], [-1, -2, -3, -4, -5]])
+        f = einput.NasaAmes()
+        f.save_na_file(self.filename, na_dict, float_format='%.4f')
+        f.close()
+        f = einput.NasaAmes(self.filename)
+        na_dict = f.read_na_dict()
+        self.assertEqual(NA_DICT['X'], na_dict['X'], 'Independent values do not match')
+        self.assertEqual([[1.5, 2.5, 3.5, 4.5, 5.5], [-1, -2, -3, -4, -5]], na_dict['A'],
+                         'Auxiliary values do not match')
+        self.assertEqual(NA_DICT['V'], na_dict['V'], 'Var do not match')
+        f.close()
+
+        na_dict = dict(NA_DICT, V=[[float(i) for i in range(5)] for _ in range(4)])
+        na_copy = nasa_ames_io._copy_na_dict(na_dict)
+        self.assertIsNot(na_dict['V'][0], na_copy['V'][0], 'Data list not copied')
+        self.assertIs(na_dict['V'][0][1], na_copy['V'][0][1], 'Scalar values copied')
+
 
 class NetCdfConvertFormatTestCase(unittest.TestCase):
     """ Test conversion between formats using nappy toolbox """
@@ -699,6 +1230,37 @@ class NetCdfConvertFormatTestCase(unittest.TestCase):
         self.assertListEqual(self.data1.value.tolist(), data, 'data and data1 values do not match')
         self.assertListEqual(self.data2.value.tolist(), time, 'time and data2 values do not match') 
 
+    def test_convert_files(self):
+        """ Test batch conversion of NetCDF files with a pool of processes """
+
+        outdir = tempfile.mkdtemp()
+        f = einput.EgadsNetCdf(self.ncfilename)
+        f.convert_to_csv(self.csvfilename)
+        f.close()
+        filenames = [self.ncfilename, os.path.join(outdir, 'missing.nc')]
+        progress = []
+        results = einput.convert_files(filenames, 'csv', outdir, workers=2, 
+                                       progress=lambda done, total, result: progress.append(done))
+        self.assertEqual(progress, [1, 2], 'Progress not reported')
+        self.assertEqual(results[0]['error'], None, 'Conversion failed')
+        self.assertNotEqual(results[1]['error'], None, 'Error not reported')
+        self.assertEqual(open(results[0]['output']).read(), open(self.csvfilename).read(),
+                         'Batch and serial conversions differ')
+        self.assertRaises(ValueError, einput.convert_files, [self.ncfilename, os.path.join(outdir, 
+                          os.path.basename(self.ncfilename))], 'csv', outdir)
+
+    def test_convert_files_lost_worker(self):
+        """ Test batch conversion with a worker process killed during a conversion """
+
+        outdir = tempfile.mkdtemp()
+        filenames = [self.ncfilename, os.path.join(outdir, 'missing.nc')]
+        convert_file = convert._convert_file
+        convert._convert_file = _kill_process
+        try:
+            self.assertRaises(RuntimeError, einput.convert_files, filenames, 'csv', outdir, workers=2)
+        finally:
+            convert._convert_file = convert_file
+
 
 class NAConvertFormatTestCase(unittest.TestCase):
     """ Test conversion between formats using nappy toolbox """
@@ -731,6 +1293,91 @@ class NAConvertFormatTestCase(unittest.TestCase):
         self.assertListEqual(time.value.tolist(), time.value.tolist(), 'both time values do not match')
         
 
+class NetCdfDatasetTestCase(unittest.TestCase):
+    """ Test multi-file NetCDF datasets """
+
+    def setUp(self):
+        self.filenames = []
+        for i, units in enumerate(['seconds since 2017-01-02 00:00:00', 'seconds since 2017-01-01 00:00:00',
+                                   'minutes since 2017-01-03 00:00:00']):
+            filename = tempfile.mktemp('.nc')
+            f = netCDF4.Dataset(filename, 'w')  # @UndefinedVariable
+            f.createDimension('time', DIM1_LEN)
+            f.createDimension(DIM2_NAME, DIM2_LEN)
+            t = f.createVariable('time', 'f8', ('time',))
+            v = f.createVariable(VAR_MULT_NAME, 'f8', ('time', DIM2_NAME))
+            c = f.createVariable(VAR_NAME, 'f8', (DIM2_NAME,))
+            t.units = units
+            v.units = VAR_MULT_UNITS
+            t[:] = range(DIM1_LEN)
+            v[:] = random_mult_data + i
+            c[:] = range(DIM2_LEN)
+            f.close()
+            self.filenames.append(filename)
+        self.data = [random_mult_data + 1, random_mult_data, random_mult_data + 2]
+
+    def test_read_dataset(self):
+        """ Test reading a variable from all files of a dataset """
+
+        dataset = einput.EgadsNetCdfDataset(self.filenames, max_open_files=2)
+        self.assertEqual(dataset.get_file_list(), [self.filenames[1], self.filenames[0], self.filenames[2]],
+                         'Files not sorted by time')
+        data = dataset.read_variable(VAR_MULT_NAME)
+        assert_array_equal(data.value, numpy.concatenate(self.data))
+        self.assertEqual(data.metadata['units'], VAR_MULT_UNITS, 'EgadsData units attribute doesnt match')
+        assert_array_equal(dataset.read_variable(VAR_NAME).value, range(DIM2_LEN))
+        self.assertEqual(len(dataset._files), 2, 'Too many files open')
+        variable = dataset.variable(VAR_MULT_NAME)
+        self.assertEqual(variable.shape, (3 * DIM1_LEN, DIM2_LEN), 'Variable dimensions dont match')
+        assert_array_equal(variable[DIM1_LEN - 2:DIM1_LEN + 3, 1].value, 
+                           numpy.concatenate(self.data)[DIM1_LEN - 2:DIM1_LEN + 3, 1])
+        dataset.close()
+
+    def test_read_dataset_time(self):
+        """ Test reading the time coordinate of files with different units """
+
+        dataset = einput.EgadsNetCdfDataset(self.filenames)
+        expected = numpy.concatenate([numpy.arange(DIM1_LEN), 86400 + numpy.arange(DIM1_LEN),
+                                      172800 + 60 * numpy.arange(DIM1_LEN)])
+        data = dataset.read_variable('time')
+        assert_array_equal(data.value, expected)
+        self.assertEqual(data.metadata['units'], 'seconds since 2017-01-01 00:00:00', 'Time units dont match')
+        assert_array_equal(dataset.variable('time')[DIM1_LEN - 1:DIM1_LEN + 2].value, expected[DIM1_LEN - 1:DIM1_LEN + 2])
+        dataset.close()
+        self.assertRaises(IOError, einput.EgadsNetCdfDataset, [])
+        einput.EgadsNetCdfDataset.__new__(einput.EgadsNetCdfDataset).__del__()
+
+    def test_read_dataset_time_range(self):
+        """ Test reading a time window from a dataset """
+
+        dataset = einput.EgadsNetCdfDataset(self.filenames)
+        data = dataset.read_variable(VAR_MULT_NAME, (datetime.datetime(2017, 1, 2, 0, 0, 5), 
+                                                     datetime.datetime(2017, 1, 3, 0, 1)))
+        assert_array_equal(data.value, numpy.concatenate([self.data[1][5:], self.data[2][:2]]))
+        data = dataset.read_variable(VAR_MULT_NAME, (86400 + 2, 86400 + 3))
+        assert_array_equal(data.value, self.data[1][2:4])
+        dataset.close()
+
+    def test_read_time_range(self):
+        """ Test reading a time window from a NetCDF file """
+
+        f = einput.EgadsNetCdf(self.filenames[0])
+        data = f.read_variable(VAR_MULT_NAME, time_range=(datetime.datetime(2017, 1, 2, 0, 0, 3), 6.5))
+        assert_array_equal(data.value, self.data[1][3:7])
+        self.assertEqual(data.metadata['units'], VAR_MULT_UNITS, 'EgadsData units attribute doesnt match')
+        data = f.read_variable(VAR_MULT_NAME, time_range=(20, 30))
+        self.assertEqual(len(data.value), 0, 'Data read outside of the time window')
+        self.assertRaises(KeyError, f.read_variable, VAR_NAME, time_range=(0, 1))
+        f.close()
+        f = einput.NetCdf(self.filenames[1])
+        assert_array_equal(f.read_variable(VAR_MULT_NAME, time_range=(-1, 0)), self.data[0][:1])
+        f.close()
+
+
+def _kill_process(task):
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
 def suite():
     netcdf_in_suite = unittest.TestLoader().loadTestsFromTestCase(NetCdfFileInputTestCase)
     netcdf_out_suite = unittest.TestLoader().loadTestsFromTestCase(NetCdfFileOutputTestCase)
@@ -739,12 +1386,16 @@ def suite():
     csv_in_suite = unittest.TestLoader().loadTestsFromTestCase(EgadsCsvInputTestCase)
     csv_out_suite = unittest.TestLoader().loadTestsFromTestCase(EgadsCsvOutputTestCase)
     na_in_suite = unittest.TestLoader().loadTestsFromTestCase(NAInputTestCase)
+    na_native_in_suite = unittest.TestLoader().loadTestsFromTestCase(NANativeInputTestCase)
     na_out_suite = unittest.TestLoader().loadTestsFromTestCase(NAOutputTestCase)
     netcdf_convert_format_suite = unittest.TestLoader().loadTestsFromTestCase(NetCdfConvertFormatTestCase)
     nasa_ames_convert_format_suite = unittest.TestLoader().loadTestsFromTestCase(NAConvertFormatTestCase)
+    netcdf_dataset_suite = unittest.TestLoader().loadTestsFromTestCase(NetCdfDatasetTestCase)
+    column_cache_suite = unittest.TestLoader().loadTestsFromTestCase(ColumnCacheTestCase)
     return unittest.TestSuite([netcdf_in_suite, netcdf_out_suite, text_in_suite, text_out_suite, 
-                               csv_in_suite, csv_out_suite, na_in_suite, na_out_suite, 
-                               netcdf_convert_format_suite, nasa_ames_convert_format_suite])
+                               csv_in_suite, csv_out_suite, na_in_suite, na_native_in_suite, na_out_suite, 
+                               netcdf_convert_format_suite, nasa_ames_convert_format_suite,
+                               netcdf_dataset_suite, column_cache_suite])
 
 
 if __name__ == '__main__':
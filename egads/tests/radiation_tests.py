@@ -10,6 +10,7 @@ __all__ = ['RadiationTestCase']
 import unittest
 import numpy as np
 from egads.algorithms import radiation
+from egads.algorithms.radiation import planck_emission, temp_blackbody
 
 
 class RadiationTestCase(unittest.TestCase):
@@ -31,6 +32,16 @@ class RadiationTestCase(unittest.TestCase):
     def test_planck_emission(self):
         res_emission = radiation.PlanckEmission().run(273, 500)
         self.assertAlmostEqual(res_emission.value, 6.35e-40, 42, "Planck emission dont match")
+
+    def test_planck_emission_temp_black_body_kernels(self):
+        temperature = np.linspace(200.0, 350.0, 16)
+        radiance = np.empty_like(temperature)
+        res_radiance = planck_emission.planck_emission(temperature, 10000.0, out=radiance)
+        self.assertTrue(res_radiance is radiance, "Radiance output array not used")
+        res_temperature = temp_blackbody.temp_blackbody(radiance, 10000.0, out=radiance)
+        self.assertTrue(res_temperature is radiance, "Temperature output array not used")
+        for i, _ in enumerate(temperature):
+            self.assertAlmostEqual(res_temperature[i], temperature[i], 6, "Temperature values dont match")
         
     def test_rotate_solar_vector(self):
         solar_zenith = [-90.0,-45.0,0.0,33.0,66.0]
@@ -39,7 +50,7 @@ class RadiationTestCase(unittest.TestCase):
         pitch = [-1.0,5.1,0.01,3.0,1.0]
         yaw = [1.0,0.0,0.0,3.23,11.0,]
         solar_zenith_ai = [89.0, 39.6, 10.0, 29.3, 65.4]
-        solar_azimuth_ai = [359.0,329.1,89.9,13.2,308.6]
+        solar_azimuth_ai = [179.0,329.1,269.9,13.2,308.6]
         solar_zenith_cp, solar_azimuth_cp = radiation.RotateSolarVectorToAircraftFrame().run(solar_zenith, solar_azimuth, roll, pitch, yaw)
         for i, _ in enumerate(solar_zenith_ai):
             self.assertAlmostEqual(solar_zenith_cp.value[i], solar_zenith_ai[i], 1, "Solar zenith dont match")
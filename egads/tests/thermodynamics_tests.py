@@ -11,6 +11,7 @@ import numpy
 import unittest
 import egads
 from egads.algorithms import thermodynamics
+from egads.algorithms.thermodynamics import wind_vector_3d_raf
 
 class  ThermodynamicsTestCase(unittest.TestCase):
     def setUp(self):
@@ -263,6 +264,25 @@ class  ThermodynamicsTestCase(unittest.TestCase):
         V_t = thermodynamics.VelocityTasRaf().run(self.array_test, self.array_test, self.coeff_test)
         self.assertEqual(V_t.shape, self.array_shape, "TAS(RAF) array shapes dont match")
 
+    def test_wind_vector_3d_raf(self):
+        u, v, w = thermodynamics.WindVector3dRaf().run(100., 0., 0., 1., 2., 3., 0., 0., 0., 0., 0., 0.)
+        self.assertAlmostEqual(u.value, 1., 5, 'Easterly wind doesnt match')
+        self.assertAlmostEqual(v.value, -98., 5, 'Northerly wind doesnt match')
+        self.assertAlmostEqual(w.value, 3., 5, 'Upward wind doesnt match')
+        u, v, w = thermodynamics.WindVector3dRaf().run(self.array_test, self.array_test, self.array_test,
+                                                       self.array_test, self.array_test, self.array_test,
+                                                       self.array_test, self.array_test, self.array_test,
+                                                       self.array_test, self.array_test, self.coeff_test)
+        self.assertEqual(u.shape, self.array_shape, 'Wind array shapes dont match')
+        out = (numpy.empty(self.array_shape), numpy.empty(self.array_shape), numpy.empty(self.array_shape))
+        res = wind_vector_3d_raf.wind_vector_3d(self.array_test, self.array_test, self.array_test,
+                                                self.array_test, self.array_test, self.array_test,
+                                                self.array_test, self.array_test, self.array_test,
+                                                self.array_test, self.array_test, self.coeff_test,
+                                                out=out)
+        self.assertTrue(res[0] is out[0], 'Wind output array not used')
+        self.assertTrue(numpy.allclose(res[1], v.value), 'Wind kernel doesnt match')
+
 
 def suite():
     egads_thermo_suite = unittest.TestLoader().loadTestsFromTestCase(ThermodynamicsTestCase)
@@ -51,7 +51,7 @@ class NACore:
 
         self.na_dict={}
         for i in dct.keys():
-            if dct[i] != None:
+            if dct[i] is not None:
                 self.na_dict[i] = dct[i]
         return self.na_dict
 
@@ -19,6 +19,9 @@ import time
 import re
 import StringIO
 
+# Imports from third-party packages
+import numpy
+
 # Imports from nappy package
 import nappy.na_file.na_core
 import nappy.utils.text_parser
@@ -115,6 +118,57 @@ class NAFile(nappy.na_file.na_core.NACore):
         # Set flag to make sure cannot try and write more data
         self.data_written = True
          
+    def _writeDataRows(self, columns, block_rows=10000):
+        """
+        Writes data lines made of one value of each of the columns (lists or arrays),
+        in the same layout as formatting each line with self.format and stripping
+        trailing spaces and commas. Lines are formatted by blocks of block_rows
+        lines with a single format operation and written in one call.
+        """
+        self._writeDataRecords([columns], block_rows)
+
+    def _writeDataRecords(self, lines, block_rows=10000, block_values=1000000):
+        """
+        Writes data records made of one line per item of lines, each line made of
+        one value of each of its columns (lists or arrays), in the same layout as
+        _writeDataRows. Records are formatted by blocks of block_rows records (less
+        if a block would hold more than block_values values) with a single format
+        operation and written in one call.
+        """
+        columns = [column for line_columns in lines for column in line_columns]
+        ncols = len(columns)
+        if ncols == 0:
+            return
+        nrows = len(columns[0])
+        block_rows = max(1, min(block_rows, block_values // ncols))
+        widths = [len(line_columns) for line_columns in lines]
+        annotation = getAnnotation("Data", self.annotation, delimiter = self.delimiter)
+        # Stripping only removes the last delimiter if the delimiter is made of spaces and commas and
+        # if formatted values can't end with a space or a comma (no left-justified padding)
+        exact = (self.delimiter.strip(" ,") == "" and self.float_format.rstrip(" ,") == self.float_format
+                 and "-" not in self.float_format)
+        if exact:
+            record = "".join([annotation.replace("%", "%%") + self.delimiter.join([self.float_format] * width) + "\n"
+                              for width in widths])
+        for start in range(0, nrows, block_rows):
+            end = min(start + block_rows, nrows)
+            values = [None] * ((end - start) * ncols)
+            for n, column in enumerate(columns):
+                column = column[start:end]
+                if hasattr(column, "tolist"):
+                    column = column.tolist()
+                values[n::ncols] = column
+            if exact:
+                self.file.write((record * (end - start)) % tuple(values))
+            else:
+                output = []
+                position = 0
+                for i in range(end - start):
+                    for width in widths:
+                        output.append(annotation + (self.format * width % tuple(values[position:position + width])).rstrip(" ,") + "\n")
+                        position += width
+                self.file.write("".join(output))
+
     def close(self):
         "Wrapper to builtin close file function."
         self.file.close()
@@ -321,9 +375,53 @@ class NAFile(nappy.na_file.na_core.NACore):
         datalines = open(self.filename).readlines()[self.NLHEAD:]
         datalines = self._checkForBlankLines(datalines)
 
+        # FFIs with fixed length records are parsed in a single pass
+        sections = self._getRecordSections()
+        if sections is not None:
+            self._storeRecords(self._readRecords(datalines, sections))
+            return
+
         # Set up loop over unbounded indpendent variable
         m = 0   # Unbounded independent variable mark        
         while len(datalines) > 0:
             datalines = self._readData1(datalines, m)
             datalines = self._readData2(datalines, m)
             m = m + 1
+
+    def _getRecordSections(self):
+        """
+        Returns the list of the number of items in each section of a record of
+        the data section, each section starting on a new line, or None if the
+        records of the FFI don't have a fixed length. In that case the data
+        section is read with the '_readData1' and '_readData2' methods.
+        """
+        return None
+
+    def _readRecords(self, datalines, sections):
+        """
+        Reads all the records of the data section from the list of lines
+        'datalines' in one pass and returns them as a 2-D array of floats
+        with one row per record. 'sections' is the list returned by
+        '_getRecordSections'.
+        """
+        rightStripCurlyBraces = nappy.utils.text_parser.rightStripCurlyBraces
+        lines = [(rightStripCurlyBraces(line) if "{" in line else line).split() for line in datalines]
+        counts = numpy.array([len(items) for items in lines], dtype=numpy.int64)
+        record_length = sum(sections)
+        line_ends = numpy.cumsum(counts)
+        nitems = line_ends[-1] if len(line_ends) else 0
+        nrecords = nitems // record_length
+        # Each section must end at the end of a line
+        section_ends = (numpy.arange(nrecords, dtype=numpy.int64)[:, numpy.newaxis] * record_length +
+                        numpy.cumsum(sections)).ravel()
+        if nitems % record_length or not numpy.in1d(section_ends, line_ends).all():
+            raise Exception("Could not split " + `len(lines)` + " lines exactly into records of " +
+                            `record_length` + " items " + str(tuple(sections)))
+        values = numpy.array([item for items in lines for item in items], dtype=numpy.float64)
+        return values.reshape(nrecords, record_length)
+
+    def _storeRecords(self, records):
+        """
+        Stores the records returned by '_readRecords' in the FFI-specific arrays.
+        """
+        pass
@@ -61,6 +61,20 @@ class NAFile1001(nappy.na_file.na_file.NAFile):
         for n in range(self.NV):
             self.V.append([])
 
+    def _getRecordSections(self):
+        """
+        Returns the number of items in each section of a record.
+        """
+        return [1 + self.NV]
+
+    def _storeRecords(self, records):
+        """
+        Stores the records in the FFI-specific arrays.
+        """
+        self.X = records[:, 0].tolist()
+        for n in range(self.NV):
+            self.V[n] = records[:, 1 + n].tolist()
+
     def _readData1(self, datalines, ivar_count):
         """
         Reads first line/section of current block of data.
@@ -86,13 +100,5 @@ class NAFile1001(nappy.na_file.na_file.NAFile):
         Writes the data section of the file.
         This method can be called directly by the user.
         """
-        
-        for m in range(len(self.X)):
-
-            var_string = self.format % self.X[m]
-
-            for n in range(self.NV):
-                
-                var_string = var_string + (self.format % self.V[n][m])
-
-            self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(" ,")))
+        nrows = len(self.X)
+        self._writeDataRows([self.X[:nrows]] + [self.V[n][:nrows] for n in range(self.NV)])
@@ -64,6 +64,22 @@ class NAFile1010(nappy.na_file.na_file.NAFile):
         for a in range(self.NAUXV):
             self.A.append([])
 
+    def _getRecordSections(self):
+        """
+        Returns the number of items in each section of a record.
+        """
+        return [1 + self.NAUXV, self.NV]
+
+    def _storeRecords(self, records):
+        """
+        Stores the records in the FFI-specific arrays.
+        """
+        self.X = records[:, 0].tolist()
+        for a in range(self.NAUXV):
+            self.A[a] = records[:, 1 + a].tolist()
+        for n in range(self.NV):
+            self.V[n] = records[:, 1 + self.NAUXV + n].tolist()
+
     def _readData1(self, datalines, ivar_count): 
         """
         Reads first line/section of current block of data.
@@ -93,23 +109,12 @@ class NAFile1010(nappy.na_file.na_file.NAFile):
 
         return rtlines
 
-    def writeData(self):									
-         """   											
-         Writes the data section of the file.   					
-         This method can be called directly by the user.   			
-         """   											
-         for m in range(len(self.X)):   						
-             # Write Independent variable mark and auxiliary variables   	
-             var_string = self.format % self.X[m]   
-					
-             for a in range(self.NAUXV):   						
-                 var_string = var_string + (self.format % self.A[a][m])
-	
-             self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(" ,")))	
-			
-             # Write dependant variables   						
-             var_string = ""   								
-             for n in range(self.NV):							
-                  var_string = var_string + (self.format % self.V[n][m])   	
-	
-             self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(' ,'))) 					
+    def writeData(self):
+        """
+        Writes the data section of the file.
+        This method can be called directly by the user.
+        """
+        # Each record is a line of independent and auxiliary variables and a line of dependant variables
+        nrows = len(self.X)
+        self._writeDataRecords([[self.X[:nrows]] + [self.A[a][:nrows] for a in range(self.NAUXV)],
+                                [self.V[n][:nrows] for n in range(self.NV)]])
@@ -56,6 +56,12 @@ class NAFile1020(nappy.na_file.na_file_1010.NAFile1010):
         self._fixHeaderLength()
         self.file.write(self.header.read())
 
+    def _getRecordSections(self):
+        """
+        Records of this FFI are read with the '_readData1' and '_readData2' methods.
+        """
+        return None
+
     def _readData2(self, datalines, ivar_count):
         """
         Reads second line/section (if used) of current block of data.
@@ -83,29 +89,15 @@ class NAFile1020(nappy.na_file.na_file_1010.NAFile1010):
         self.X[0] = newX
         self._normalized_X = True
 
-    def writeData(self):										
-         """   													
-         Writes the data section of the file.   							
-         This method can be called directly by the user.   					
-         """   													
-         for m in range(len(self.X)):   								
-            # Write Independent variable mark and auxiliary variables   			
-            var_string = self.format % self.X[m]   	
-						
-            for a in range(self.NAUXV):   								
-                var_string = var_string + (self.format % self.A[a][m])   
-			
-            self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(" ,")))
-				
-            # Write dependant variables																		
-            count = 0											
-            for n in range(self.NV):									
-                var_string = ""	
-								        
-                for p in range(self.NVPM):								
-                    var_ind = (m * self.NVPM) + p 							
-                    var_string = var_string + (self.format % self.V[n][var_ind])   		
-                    count = count + 1	
-								
-                self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" %var_string.rstrip(' ,')))
-
+    def writeData(self):
+        """
+        Writes the data section of the file.
+        This method can be called directly by the user.
+        """
+        # Each record is a line of independent and auxiliary variables and a line of NVPM values
+        # for each dependant variable
+        nrows = len(self.X)
+        lines = [[self.X[:nrows]] + [self.A[a][:nrows] for a in range(self.NAUXV)]]
+        for n in range(self.NV):
+            lines.append([self.V[n][p::self.NVPM][:nrows] for p in range(self.NVPM)])
+        self._writeDataRecords(lines)
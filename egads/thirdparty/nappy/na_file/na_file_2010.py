@@ -12,6 +12,9 @@ Container module for NAFile2010 class.
 
 # Imports from python standard library
 
+# Imports from third-party packages
+import numpy
+
 # Imports from local package
 import nappy.utils.text_parser
 import nappy.utils.list_manipulator
@@ -101,6 +104,25 @@ class NAFile2010(nappy.na_file.na_file.NAFile):
         for a in range(self.NAUXV):
             self.A.append([])
             
+    def _getRecordSections(self):
+        """
+        Returns the number of items in each section of a record.
+        """
+        return [1 + self.NAUXV] + [self.arraySize] * self.NV
+
+    def _storeRecords(self, records):
+        """
+        Stores the records in the FFI-specific arrays.
+        """
+        self.X[0] = records[:, 0].tolist()
+        for a in range(self.NAUXV):
+            self.A[a] = records[:, 1 + a].tolist()
+        start = 1 + self.NAUXV
+        for n in range(self.NV):
+            end = start + self.arraySize
+            self.V[n] = records[:, start:end].reshape([len(records)] + self.NX).tolist()
+            start = end
+
     def _readData1(self, datalines, ivar_count):
         """
         Reads first line/section of current block of data.
@@ -134,20 +156,16 @@ class NAFile2010(nappy.na_file.na_file.NAFile):
         """        
         # Set up unbounded IV loop
         self.NX.reverse()
-        for m in range(len(self.X[0])):
-
-            # Write unbounded independent variable mark and auxiliary variables
-            var_string = self.format % self.X[0][m]
-
-            for a in range(self.NAUXV):
-                var_string = var_string + (self.format % self.A[a][m])
-            self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(" ,")))
-            
-            # Write Variables
-            for n in range(self.NV):
-                outlines = nappy.utils.list_manipulator.recursiveListWriter(self.V[n][m], self.NX, delimiter = self.delimiter, float_format = self.float_format)
-                for line in outlines:
-                    self.file.write(wrapLine("Data", self.annotation, self.delimiter, line))
+        nrows = len(self.X[0])
+        # Each record is a line of unbounded independent variable mark and auxiliary variables and, for each
+        # variable, lines of NX[-1] values
+        width = self.NX[-1]
+        nlines = int(numpy.prod(self.NX[:-1]))
+        lines = [[self.X[0][:nrows]] + [self.A[a][:nrows] for a in range(self.NAUXV)]]
+        for n in range(self.NV):
+            values = numpy.reshape(self.V[n][:nrows], (nrows, nlines, width))
+            lines.extend([[values[:, l, p] for p in range(width)] for l in range(nlines)])
+        self._writeDataRecords(lines)
 
     def _normalizeIndVars(self):
         """
@@ -70,6 +70,12 @@ class NAFile2110(nappy.na_file.na_file_2010.NAFile2010):
         for i in range(self.NAUXV):
            self.A.append([])
 
+    def _getRecordSections(self):
+        """
+        Records of this FFI are read with the '_readData1' and '_readData2' methods.
+        """
+        return None
+
     def _readData1(self, datalines, ivar_count): 
         """
         Reads first line/section of current block of data.
@@ -121,18 +127,8 @@ class NAFile2110(nappy.na_file.na_file_2010.NAFile2010):
         for m in range(len(self.X)):
 
             # Write unbounded independent variable mark and auxiliary variables
-            var_string = self.format % self.X[m][0]
-
             # Loop through aux vars which includes NX as first aux var
-            for a in range(self.NAUXV): 
-                var_string = var_string + (self.format % self.A[a][m])
-            self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(" ,")))
+            self._writeDataRows([[self.X[m][0]]] + [[self.A[a][m]] for a in range(self.NAUXV)])
 
             # Write second independant variable and dependant variables
-            for p in range(self.NX[m]):
-                var_string = self.format % self.X[m][1][p]
-
-                for n in range(self.NV):
-                    var_string = var_string + (self.format %self.V[n][m][p])
-
-                self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" %var_string.rstrip(" ,")))
+            self._writeDataRows([self.X[m][1][:self.NX[m]]] + [self.V[n][m][:self.NX[m]] for n in range(self.NV)])
@@ -144,10 +144,4 @@ class NAFile2160(nappy.na_file.na_file_2110.NAFile2110):
                 self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(" ,")))
 
             # Write second independant variable and dependant variables
-            for p in range(self.NX[m]):
-                var_string = self.format % self.X[m][1][p]
-
-                for n in range(self.NV):
-                    var_string = var_string + (self.format % self.V[n][m][p])
-
-                self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(" ,")))
+            self._writeDataRows([self.X[m][1][:self.NX[m]]] + [self.V[n][m][:self.NX[m]] for n in range(self.NV)])
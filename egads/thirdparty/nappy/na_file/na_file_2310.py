@@ -12,6 +12,9 @@ Container module for NAFile2310 class.
 
 # Imports from python standard library
 
+# Imports from third-party packages
+import numpy
+
 # Imports from local package
 import nappy.utils.text_parser
 import nappy.na_file.na_file_2110
@@ -107,9 +110,6 @@ class NAFile2310(nappy.na_file.na_file_2110.NAFile2110):
 
             self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(" ,")))
 
-            # Write second independant variable and dependant variables
-            var_string = ""
-            for p in range(self.NX[m]):
-                for n in range(self.NV):
-                    var_string = var_string + (self.format %self.V[n][m][p])
-            self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % var_string.rstrip(" ,")))
+            # Write dependant variables, all on one line
+            values = numpy.transpose([self.V[n][m][:self.NX[m]] for n in range(self.NV)]).ravel().tolist()
+            self.file.write(wrapLine("Data", self.annotation, self.delimiter, "%s\n" % (self.format * len(values) % tuple(values)).rstrip(" ,")))
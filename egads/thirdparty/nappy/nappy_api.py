@@ -240,7 +240,7 @@ def convertNAToCSV(na_file, csv_file=None, annotation=False, no_header=False):
 def convertNCToNA(nc_file, na_file=None, var_ids=None, na_items_to_override={},
             only_return_file_names=False, exclude_vars=[],
             requested_ffi=None, delimiter=default_delimiter, float_format=default_float_format, 
-            size_limit=None, annotation=False, no_header=False,
+            size_limit=None, annotation=False, no_header=False, workers=None,
             ):
     """
     Takes a NetCDF file and converts the contents to one or more NASA Ames files. 
@@ -268,10 +268,12 @@ def convertNCToNA(nc_file, na_file=None, var_ids=None, na_items_to_override={},
     annotation - if set to True write the output file with an additional left-hand column 
               describing the contents of each header line.
     no_header - if set to True then only the data blocks are written to file.
+    workers - number of processes writing the files split on size_limit (default is
+              the number of CPUs).
     """
     arg_dict = vars()
     for arg_out in ("na_file", "only_return_file_names", "delimiter", "float_format", 
-                    "size_limit", "annotation", "no_header"):
+                    "size_limit", "annotation", "no_header", "workers"):
         del arg_dict[arg_out]
 
     if na_file == None:
@@ -286,7 +288,8 @@ def convertNCToNA(nc_file, na_file=None, var_ids=None, na_items_to_override={},
         return convertor.constructNAFileNames(na_file)
     else:
         convertor.writeNAFiles(na_file, delimiter=delimiter, float_format=float_format, 
-                               size_limit=size_limit, annotation=annotation, no_header=no_header)
+                               size_limit=size_limit, annotation=annotation, no_header=no_header,
+                               workers=workers)
         log.info(convertor.output_message)
         output_files_written = convertor.output_files_written
         log.info(output_files_written)
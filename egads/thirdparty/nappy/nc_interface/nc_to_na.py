@@ -14,12 +14,14 @@ one or more NASA Ames files.
 # Imports from python standard library
 import sys
 import logging
+import multiprocessing
 
 # Import from nappy package
 import nappy
 from nappy.na_error import na_error
 import nappy.utils
 import nappy.utils.common_utils
+import nappy.utils.process_utils
 import nappy.nc_interface.cdms_to_na
 import nappy.nc_interface.na_content_collector
 
@@ -151,12 +153,14 @@ class NCToNA(nappy.nc_interface.cdms_to_na.CDMSToNA):
         return file_names
 
     def writeNAFiles(self, na_file=None, delimiter=default_delimiter, annotation=False,
-                     float_format=default_float_format, size_limit=None, no_header=False):
+                     float_format=default_float_format, size_limit=None, no_header=False, workers=None):
         """
         Writes the self.na_dict_list content to one or more NASA Ames files.
         Output file names are based on the self.nc_file name unless specified
         in the na_file_name argument in which case that provides the main name
         that is appended to if multiple output file names are required.
+        If files are split because of size_limit, workers is the number of processes
+        writing the volumes (default is the number of CPUs).
 
         TODO: no_header is NOT implemented.
         """
@@ -233,7 +237,7 @@ class NCToNA(nappy.nc_interface.cdms_to_na.CDMSToNA):
             if size_limit is not None and (this_na_dict["FFI"] == 1001 and len(this_na_dict["V"][0]) > size_limit):
                 files_written = self._writeNAFileSubsetsWithinSizeLimit(this_na_dict, file_name, delimiter=delimiter,
                                                                         float_format=float_format, size_limit=size_limit,
-                                                                        annotation=annotation)
+                                                                        annotation=annotation, workers=workers)
                 file_list.extend(files_written)
 
             # If not having to split file into multiple outputs (normal condition)
@@ -281,14 +285,18 @@ class NCToNA(nappy.nc_interface.cdms_to_na.CDMSToNA):
         return self.output_message
 
     def _writeNAFileSubsetsWithinSizeLimit(self, this_na_dict, file_name, delimiter, 
-                      float_format, size_limit, annotation):
+                      float_format, size_limit, annotation, workers=None):
         """
         If self.size_limit is specified and FFI is 1001 we can chunk the output into 
         different files in a NASA Ames compliant way. 
+        Volumes hold views of the independent and dependent variables arrays and
+        are written concurrently by workers processes (default is the number of CPUs).
         Returns list of file names of outputs written.
         """
-        file_names = []
-        var_list = this_na_dict["V"]
+        # Only the header items are copied in the na dictionary of each volume, data are array views
+        source_na_dict = this_na_dict.copy()
+        source_na_dict["X"] = numpy.asarray(this_na_dict["X"])
+        var_list = [numpy.asarray(v) for v in this_na_dict["V"]]
         array_length = len(var_list[0])
         nvol_info = divmod(array_length, size_limit)
         nvol = nvol_info[0]
@@ -296,42 +304,33 @@ class NCToNA(nappy.nc_interface.cdms_to_na.CDMSToNA):
         # create the number of volumes (files) that need to be written.
         if nvol_info[1] > 0: nvol = nvol + 1
 
-        start = 0
-        letter_count = 0
-        ivol = 0
-
-        # Loop through until full array length has been written to a set of files.
-        while start < array_length:
-            ivol = ivol + 1
-            end = start + size_limit
-
-            if end > array_length:
-                end = array_length
-
-            current_block = []
-            # Write new V array
-            for v in var_list:
-                current_block.append(v[start:end])
-
-            # Adjust X accordingly in the na dictionary, because independent variable has been reduced in size
-            na_dict_copy = nappy.utils.common_utils.modifyNADictCopy(this_na_dict, current_block, 
+        file_names = []
+        tasks = []
+        for ivol in range(1, nvol + 1):
+            start = (ivol - 1) * size_limit
+            end = min(start + size_limit, array_length)
+            current_block = [v[start:end] for v in var_list]
+            na_dict_copy = nappy.utils.common_utils.modifyNADictCopy(source_na_dict, current_block,
                                                                       start, end, ivol, nvol)
-            # Append a letter to the file name for writing this block to
+            # Append the volume number to the file name for writing this block to
             file_name_plus_letter = "%s-%.3d.na" % (file_name[:-3], ivol)
-            file_list.append(file_name_plus_letter)
-
-            # Write data to output file
-            x = nappy.openNAFile(file_name_plus_letter, 'w', na_dict_copy)
-            x.write(delimiter=delimiter, float_format=float_format, annotation=annotation)
-            x.close()
+            file_names.append(file_name_plus_letter)
+            tasks.append((file_name_plus_letter, na_dict_copy, delimiter, float_format, annotation))
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                _writeNAFileVolume(task)
+        else:
+            # a volume writer killed while writing raises LostTaskError instead of blocking
+            for _ in nappy.utils.process_utils.iterTasks(_writeNAFileVolume, tasks, workers):
+                pass
 
+        for file_name_plus_letter in file_names:
             msg = "\nOutput files split on size limit: %s\nFilename used: %s" % (size_limit, file_name_plus_letter)
             if DEBUG: log.debug(msg)
             self.output_message.append(msg)
-            letter_count = letter_count + 1
-            start = end
-
-            file_names.append(file_name_plus_letter) 
 
         return file_names
 
@@ -418,3 +417,13 @@ class NCToNA(nappy.nc_interface.cdms_to_na.CDMSToNA):
     
         return combined_comments
 
+
+def _writeNAFileVolume(task):
+    """
+    Writes one volume of a NASA Ames file split on size limit. task is a tuple of
+    (file_name, na_dict, delimiter, float_format, annotation).
+    """
+    (file_name, na_dict, delimiter, float_format, annotation) = task
+    x = nappy.openNAFile(file_name, 'w', na_dict)
+    x.write(delimiter=delimiter, float_format=float_format, annotation=annotation)
+    x.close()
@@ -0,0 +1,86 @@
+"""
+process_utils.py
+================
+
+Functions running tasks in parallel in worker processes.
+
+"""
+
+# Standard library imports
+import multiprocessing
+import Queue
+
+POLL_INTERVAL = 0.1
+
+
+class LostTaskError(RuntimeError):
+    """
+    Raised when a worker process exits without returning the result of its task,
+    e.g. when it is killed by the OOM killer. The indices attribute holds the
+    indices of the lost tasks.
+    """
+
+    def __init__(self, indices):
+        RuntimeError.__init__(self, "Worker process died while running tasks %s" % indices)
+        self.indices = indices
+
+
+def iterTasks(func, tasks, workers, admit=None, poll_interval=POLL_INTERVAL):
+    """
+    Generator running func(task) for each task of tasks, each in its own process,
+    with at most workers processes at the same time. Yields (index, result) pairs
+    in the order tasks complete. Exceptions raised by func are raised again.
+
+    Processes are managed explicitly rather than through multiprocessing.Pool,
+    which silently drops the task of a worker which dies: a process which exits
+    without returning its result raises LostTaskError.
+
+    admit is an optional function called with the list of indices of the running
+    tasks and the index of the next task, returning False if the next task has to
+    wait for running tasks to complete. A task is always started if no other task
+    is running.
+    """
+    results = multiprocessing.Queue()
+    pending = range(len(tasks))
+    running = {}
+    try:
+        while pending or running:
+            while (pending and len(running) < workers and
+                   (not running or admit is None or admit(running.keys(), pending[0]))):
+                index = pending.pop(0)
+                process = multiprocessing.Process(target=_runTask, args=(func, index, tasks[index], results))
+                process.daemon = True
+                process.start()
+                running[index] = process
+
+            # processes which have exited before waiting have put their result in the
+            # queue before exiting, so they are lost if the queue stays empty
+            exited = sorted(index for index, process in running.iteritems() if process.exitcode is not None)
+            try:
+                # polled with a timeout, so that a KeyboardInterrupt stops the wait
+                index, success, value = results.get(timeout=poll_interval)
+            except Queue.Empty:
+                if exited:
+                    raise LostTaskError(exited)
+                continue
+
+            running.pop(index).join()
+            if not success:
+                raise value
+            yield index, value
+    finally:
+        for process in running.values():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+
+def _runTask(func, index, task, results):
+    """
+    Runs func(task) in a worker process and puts the result, or the exception
+    raised, in the results queue.
+    """
+    try:
+        results.put((index, True, func(task)))
+    except Exception, error:
+        results.put((index, False, error))